@@ -0,0 +1,17 @@
+"""Benchmarks for the primitives, combinators and grammars of
+parsemon over inputs from a kilobyte to ten megabytes.
+
+Run the suite and store the results as a baseline::
+
+    python -m benchmarks run --output baseline.json
+
+After a change, run the suite again and compare the results with the
+baseline.  The comparison exits with status 1 if a benchmark got
+slower by more than the threshold::
+
+    python -m benchmarks run --output current.json
+    python -m benchmarks compare baseline.json current.json
+
+``python -m benchmarks memory`` measures the peak memory of parser
+runs instead, see ``benchmarks.memory``.
+"""
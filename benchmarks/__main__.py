@@ -0,0 +1,149 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Dict, List
+
+from parsemon import run_parser
+from parsemon.stream import IOStream, NativeStringStream, StringStream
+
+from . import memory
+from .cases import CASES
+
+STREAMS = {
+    stream.__name__: stream for stream in (NativeStringStream, StringStream, IOStream)
+}
+SIZES = (1_000, 100_000, 1_000_000, 10_000_000)
+DEFAULT_THRESHOLD = 0.1
+
+
+def measure(case, stream, size: int, repeat: int) -> Dict[str, float]:
+    """Parse a document of about ``size`` characters and return the
+    best time of ``repeat`` runs.  Large documents are parsed once."""
+    parser = case.parser()
+    document = case.document(size)
+    timings = []
+    for _ in range(repeat if size < 1_000_000 else 1):
+        start = time.perf_counter()
+        run_parser(parser, document, stream_implementation=stream)
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+    return {
+        "size": len(document),
+        "seconds": seconds,
+        "characters_per_second": len(document) / seconds,
+    }
+
+
+def run(arguments) -> int:
+    results = dict()
+    for case in CASES:
+        if arguments.filter and arguments.filter not in case.name:
+            continue
+        for stream_name in arguments.streams:
+            for size in arguments.sizes:
+                if size > arguments.max_size:
+                    continue
+                key = "{case}/{stream}/{size}".format(
+                    case=case.name, stream=stream_name, size=size
+                )
+                results[key] = measure(
+                    case, STREAMS[stream_name], size, arguments.repeat
+                )
+                print(
+                    "{key}: {seconds:.4f}s".format(
+                        key=key, seconds=results[key]["seconds"]
+                    ),
+                    file=sys.stderr,
+                )
+    baseline = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(arguments.output, "w") as output:
+        json.dump(baseline, output, indent=2, sort_keys=True)
+    return 0
+
+
+def regressions(baseline, current, threshold: float) -> List[str]:
+    """Return a message for every benchmark that got slower by more
+    than ``threshold``, e.g. ``0.1`` for ten percent."""
+    found = []
+    for key, result in sorted(current["results"].items()):
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        ratio = result["seconds"] / before["seconds"]
+        if ratio > 1 + threshold:
+            found.append(
+                "{key}: {before:.4f}s -> {after:.4f}s ({change:+.0%})".format(
+                    key=key,
+                    before=before["seconds"],
+                    after=result["seconds"],
+                    change=ratio - 1,
+                )
+            )
+    return found
+
+
+def compare(arguments) -> int:
+    with open(arguments.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(arguments.current) as current_file:
+        current = json.load(current_file)
+    found = regressions(baseline, current, arguments.threshold)
+    for message in found:
+        print(message)
+    missing = set(baseline["results"]) - set(current["results"])
+    if missing:
+        print(
+            "Not measured: {keys}".format(keys=", ".join(sorted(missing))),
+            file=sys.stderr,
+        )
+    return 1 if found else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_command = commands.add_parser("run", help="run the benchmarks")
+    run_command.add_argument("--output", default="benchmarks.json")
+    run_command.add_argument(
+        "--filter", help="only run the cases whose name contains this"
+    )
+    run_command.add_argument(
+        "--streams", nargs="+", choices=sorted(STREAMS), default=sorted(STREAMS)
+    )
+    run_command.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    run_command.add_argument(
+        "--max-size",
+        type=int,
+        default=max(SIZES),
+        help="skip the sizes larger than this",
+    )
+    run_command.add_argument("--repeat", type=int, default=5)
+    run_command.set_defaults(handler=run)
+    compare_command = commands.add_parser(
+        "compare", help="flag the benchmarks that got slower"
+    )
+    compare_command.add_argument("baseline")
+    compare_command.add_argument("current")
+    compare_command.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_command.set_defaults(handler=compare)
+    memory_command = commands.add_parser(
+        "memory", help="measure the memory needed per character of input"
+    )
+    memory_command.add_argument("--output", default="memory.json")
+    memory_command.add_argument(
+        "--filter", help="only run the workloads whose name contains this"
+    )
+    memory_command.add_argument("--size", type=int, default=memory.DEFAULT_SIZE)
+    memory_command.set_defaults(handler=memory.run)
+    arguments = parser.parse_args()
+    return arguments.handler(arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
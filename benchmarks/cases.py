@@ -0,0 +1,102 @@
+"""The benchmarks of the suite.  Every case combines a parser with a
+function that generates an input of about the requested size."""
+from dataclasses import dataclass
+from typing import Any, Callable, List
+
+from parsemon import (
+    bind,
+    chain,
+    character,
+    choice,
+    do,
+    literal,
+    many,
+    many1,
+    none_of,
+    one_of,
+    seperated_by,
+    take_while,
+    unit,
+    until,
+)
+from parsemon.json import json_document
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    parser: Callable[[], Any]
+    document: Callable[[int], str]
+
+
+def repeated(unit: str, suffix: str = "") -> Callable[[int], str]:
+    """Return a function that repeats ``unit`` until the document has
+    about the requested size."""
+
+    def document(size: int) -> str:
+        return unit * max(1, (size - len(suffix)) // len(unit)) + suffix
+
+    return document
+
+
+def json_array(size: int) -> str:
+    item = '{"name": "value with \\"escapes\\"", "number": -12.5e3, "list": [1, true, null]}'
+    return "[" + ", ".join([item] * max(1, size // (len(item) + 2))) + "]"
+
+
+def csv_table(size: int) -> str:
+    row = "1997,Ford,E350,3000.00\n"
+    return row * max(1, size // len(row))
+
+
+@do
+def pair():
+    first = yield character()
+    second = yield character()
+    return first + second
+
+
+def csv_grammar():
+    field = take_while(",\n", negate=True)
+    return many(
+        bind(
+            seperated_by(field, literal(",")),
+            lambda fields: chain(literal("\n"), unit(fields)),
+        )
+    )
+
+
+CASES: List[Case] = [
+    Case("literal", lambda: many(literal("ab")), repeated("ab")),
+    Case("one_of", lambda: many(one_of("0123456789")), repeated("0123456789")),
+    Case("none_of", lambda: many(none_of(",")), repeated("abc")),
+    Case("character", lambda: many(character()), repeated("abc")),
+    Case(
+        "bind",
+        lambda: many(bind(character(), lambda found: literal(found))),
+        repeated("aabb"),
+    ),
+    Case(
+        "choice",
+        lambda: many(choice(literal("a"), choice(literal("b"), literal("c")))),
+        repeated("abc"),
+    ),
+    Case(
+        "many",
+        lambda: many(chain(many1(one_of("a")), literal(" "))),
+        repeated("aaaa "),
+    ),
+    Case(
+        "until",
+        lambda: until(character(), literal("end")),
+        repeated("abc", suffix="end"),
+    ),
+    Case(
+        "seperated_by",
+        lambda: seperated_by(take_while("0123456789"), literal(",")),
+        repeated("1234,"),
+    ),
+    Case("do", lambda: many(pair()), repeated("ab")),
+    Case("json_document", json_document, json_array),
+    Case("csv", csv_grammar, csv_table),
+]
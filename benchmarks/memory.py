@@ -0,0 +1,174 @@
+"""Measure how much memory ``run_parser`` needs per character of input.
+
+Every workload runs in a fresh process, so that the maximum resident
+set size of one workload is not inflated by the ones before it.  The
+peak of the allocations traced by ``tracemalloc`` is measured in a
+second run of the same workload.  A third, observed run counts the
+objects that the parser run allocates:
+
+- ``calls``: the ``trampoline.Call`` objects, one per bounce
+- ``results``: the ``result.Result`` objects passed to continuations
+- ``closures``: the continuations that are python functions
+- ``values``: the value returned by the parser, including the
+  objects that it contains
+
+``python -m benchmarks memory`` runs all workloads.
+"""
+import gc
+import json
+import resource
+import subprocess
+import sys
+import tracemalloc
+import types
+import weakref
+from typing import Any, Dict
+
+from parsemon import many, one_of, run_parser
+from parsemon.extensions import result, trampoline
+from parsemon.internals.instrumentation import Observer, observe
+from parsemon.json import json_document
+
+DEFAULT_SIZE = 1_000_000
+
+
+def large_array(size: int) -> str:
+    return "[" + ", ".join(["12345"] * max(1, size // 7)) + "]"
+
+
+def deep_nesting(size: int) -> str:
+    depth = max(1, size // 2)
+    return "[" * depth + "]" * depth
+
+
+def long_string(size: int) -> str:
+    return '"' + "a" * max(0, size - 2) + '"'
+
+
+WORKLOADS = {
+    "json_large_array": (json_document, large_array),
+    "json_deep_nesting": (json_document, deep_nesting),
+    "json_long_string": (json_document, long_string),
+    "many": (lambda: many(one_of("ab")), lambda size: "ab" * (size // 2)),
+}
+
+
+class AllocationCounter(Observer):
+    """Counts the objects that are passed through the trampoline."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.results = 0
+        self.closures = 0
+        self._last_result = None
+        self._seen_closures: weakref.WeakSet = weakref.WeakSet()
+
+    def call(self, function, arguments) -> None:
+        self.calls += 1
+        for argument in arguments:
+            if isinstance(argument, result.Result):
+                if argument is not self._last_result:
+                    self._last_result = argument
+                    self.results += 1
+            elif isinstance(argument, types.FunctionType):
+                if argument not in self._seen_closures:
+                    self._seen_closures.add(argument)
+                    self.closures += 1
+
+
+def deep_size(value: Any) -> int:
+    """Return the size of ``value`` and all objects in it in bytes."""
+    seen = set()
+    pending = [value]
+    size = 0
+    while pending:
+        item = pending.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            pending.extend(item)
+    return size
+
+
+def measure_in_this_process(workload: str, size: int) -> Dict[str, Any]:
+    parser_factory, document_factory = WORKLOADS[workload]
+    parser = parser_factory()
+    document = document_factory(size)
+    gc.collect()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    parsed = run_parser(parser, document)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    value_bytes = deep_size(parsed.value)
+    del parsed
+    gc.collect()
+
+    tracemalloc.start()
+    run_parser(parser, document)
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+
+    with observe(AllocationCounter()) as counter:
+        run_parser(parser, document)
+    closure_size = sys.getsizeof(lambda: None)
+    breakdown = {
+        "calls": counter.calls * sys.getsizeof(trampoline.Call(None)),
+        "results": counter.results * sys.getsizeof(result.success(None)),
+        "closures": counter.closures * closure_size,
+        "values": value_bytes,
+    }
+    return {
+        "size": len(document),
+        "peak_traced_bytes": peak_traced,
+        "peak_traced_bytes_per_character": peak_traced / len(document),
+        # ru_maxrss is measured in kilobytes on linux.
+        "max_rss_growth_bytes": (rss_after - rss_before) * 1024,
+        "max_rss_growth_per_character": (rss_after - rss_before) * 1024 / len(document),
+        "allocated_bytes": breakdown,
+        "allocated_objects": {
+            "calls": counter.calls,
+            "results": counter.results,
+            "closures": counter.closures,
+        },
+    }
+
+
+def measure(workload: str, size: int) -> Dict[str, Any]:
+    """Run ``workload`` on an input of about ``size`` characters in a
+    fresh process and return its measurements."""
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.memory", workload, str(size)],
+        check=True,
+        stdout=subprocess.PIPE,
+    )
+    return json.loads(completed.stdout)
+
+
+def run(arguments) -> int:
+    results = dict()
+    for workload in sorted(WORKLOADS):
+        if arguments.filter and arguments.filter not in workload:
+            continue
+        key = "{workload}/{size}".format(workload=workload, size=arguments.size)
+        results[key] = measure(workload, arguments.size)
+        print(
+            "{key}: {traced:.1f} traced bytes, {rss:.1f} RSS bytes per character".format(
+                key=key,
+                traced=results[key]["peak_traced_bytes_per_character"],
+                rss=results[key]["max_rss_growth_per_character"],
+            ),
+            file=sys.stderr,
+        )
+    with open(arguments.output, "w") as output:
+        json.dump({"results": results}, output, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    workload, size = sys.argv[1:]
+    json.dump(measure_in_this_process(workload, int(size)), sys.stdout)
@@ -0,0 +1,26 @@
+from typing import Any, Optional
+
+from .primitives import CharacterSet
+
+class RepetitionParser:
+    def __init__(
+        self,
+        parser: Any,
+        separator: Optional[Any] = ...,
+        minimum: int = ...,
+        collect: bool = ...,
+    ) -> None: ...
+    @property
+    def parser(self) -> Any: ...
+    @property
+    def separator(self) -> Optional[Any]: ...
+    @property
+    def minimum(self) -> int: ...
+    @property
+    def collect(self) -> bool: ...
+    @property
+    def first_set(self) -> Optional[CharacterSet]: ...
+    def __call__(self, stream: Any, continuation: Any) -> Any: ...
+
+class RepetitionContinuation:
+    def __call__(self, stream: Any, parsing_result: Any) -> Any: ...
@@ -1,5 +1,50 @@
-from typing import Any, Callable
+from typing import Any, Callable, Optional, Union
+
+class CharacterSet:
+    def __init__(self, characters: str, negated: bool = ...) -> None: ...
+    @property
+    def negated(self) -> bool: ...
+    def __contains__(self, character: str) -> bool: ...
+    def __or__(self, other: CharacterSet) -> CharacterSet: ...
 
 class LiteralParser:
     def __init__(self, expected: str) -> None: ...
+    @property
+    def first_set(self) -> Optional[CharacterSet]: ...
+    def __call__(self, stream: Any, continuation: Any) -> Any: ...
+
+class OneOfParser:
+    def __init__(self, expected: str) -> None: ...
+    @property
+    def first_set(self) -> CharacterSet: ...
+    def __call__(self, stream: Any, continuation: Any) -> Any: ...
+
+class NoneOfParser:
+    def __init__(self, forbidden: str) -> None: ...
+    @property
+    def first_set(self) -> CharacterSet: ...
+    def __call__(self, stream: Any, continuation: Any) -> Any: ...
+
+class CharacterParser:
+    def __init__(self, count: int = ...) -> None: ...
+    @property
+    def first_set(self) -> Optional[CharacterSet]: ...
+    def __call__(self, stream: Any, continuation: Any) -> Any: ...
+
+class EndOfFileParser:
+    def __init__(self) -> None: ...
+    @property
+    def first_set(self) -> Optional[CharacterSet]: ...
+    def __call__(self, stream: Any, continuation: Any) -> Any: ...
+
+class SpanParser:
+    def __init__(
+        self,
+        characters: Union[str, Callable[[str], bool]],
+        minimum: int = ...,
+        collect: bool = ...,
+        negate: bool = ...,
+    ) -> None: ...
+    @property
+    def first_set(self) -> Optional[CharacterSet]: ...
     def __call__(self, stream: Any, continuation: Any) -> Any: ...
@@ -2,10 +2,23 @@ from typing import Generic, List, TypeVar
 
 T = TypeVar("T")
 
-class Failure: ...
+class Failure:
+    @property
+    def message(self) -> str: ...
+    @property
+    def position(self) -> int: ...
+
+class Reason:
+    @staticmethod
+    def message(message: str) -> Reason: ...
+    @staticmethod
+    def expected(expected: str) -> Reason: ...
 
 class Result(Generic[T]):
     def get_failures(self) -> List[Failure]: ...
+    def __add__(self, other: Result[T]) -> Result[T]: ...
+    def merge_farthest(self, other: Result[T], limit: int) -> Result[T]: ...
 
 def success(value: T) -> Result[T]: ...
 def failure(message: str, position: int) -> Result[T]: ...
+def rejected(reason: Reason, position: int) -> Result[T]: ...
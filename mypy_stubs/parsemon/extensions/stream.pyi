@@ -0,0 +1,20 @@
+import re
+from typing import Optional
+
+from parsemon.stream import ResetPoint, Stream
+
+class StringStreamResetPoint(ResetPoint):
+    def destroy(self) -> None: ...
+    def get_position(self) -> int: ...
+
+class StringStream(Stream):
+    def __init__(self, content: str, position: int = ...) -> None: ...
+    @classmethod
+    def from_string(cls, content: str) -> StringStream: ...
+    def next(self) -> Optional[str]: ...
+    def read(self) -> Optional[str]: ...
+    def position(self) -> int: ...
+    def to_string(self) -> str: ...
+    def get_reset_point(self) -> StringStreamResetPoint: ...
+    def match_pattern(self, pattern: re.Pattern) -> Optional[re.Match]: ...
+    def reset_stream(self, reset_point: ResetPoint) -> None: ...
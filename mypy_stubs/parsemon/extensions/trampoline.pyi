@@ -1,9 +1,13 @@
-from typing import Any
+from typing import Any, Tuple
 
 class Call:
+    function: Any
+    args: Tuple[Any, ...]
     def __init__(self, function: Any, *args: Any, **kwargs: Any): ...
+    def invoke(self) -> Any: ...
 
 class Result:
+    value: Any
     def __init__(self, value: Any): ...
 
 def with_trampoline(*args: Any): ...
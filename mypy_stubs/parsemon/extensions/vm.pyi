@@ -0,0 +1,18 @@
+from typing import Any, List, Optional, Tuple
+
+from .primitives import CharacterSet
+
+class Program:
+    def __init__(
+        self,
+        instructions: List[Tuple[str, Any]],
+        first_set: Optional[CharacterSet],
+        cut_scope: Any,
+    ) -> None: ...
+    @property
+    def first_set(self) -> Optional[CharacterSet]: ...
+    def __len__(self) -> int: ...
+    def __call__(self, stream: Any, continuation: Any) -> Any: ...
+
+class Finish:
+    def __call__(self, stream: Any, parsing_result: Any) -> Any: ...
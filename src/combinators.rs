@@ -0,0 +1,246 @@
+use pyo3::exceptions::PyException;
+use pyo3::gc::PyVisit;
+use pyo3::prelude::*;
+use pyo3::types::PyList;
+use pyo3::PyTraverseError;
+
+use crate::result;
+use crate::stream::{ResetPoint, Stream};
+use crate::trampoline;
+
+/// Apply a parser repeatedly until it fails.  The loop runs inside a
+/// single continuation object instead of a chain of `choice` and
+/// `try_parser` closures.  If `separator` is given, it is parsed
+/// between two consecutive occurrences of `parser`.
+#[pyclass]
+pub struct RepetitionParser {
+    parser: Option<PyObject>,
+    separator: Option<PyObject>,
+    minimum: usize,
+    collect: bool,
+}
+
+#[pymethods]
+impl RepetitionParser {
+    #[new]
+    #[args(separator = "None", minimum = "0", collect = "true")]
+    fn new(parser: PyObject, separator: Option<PyObject>, minimum: usize, collect: bool) -> Self {
+        RepetitionParser {
+            parser: Some(parser),
+            separator,
+            minimum,
+            collect,
+        }
+    }
+
+    #[getter]
+    fn parser(&self, py: Python) -> PyResult<PyObject> {
+        Ok(required(&self.parser)?.clone_ref(py))
+    }
+
+    #[getter]
+    fn separator(&self, py: Python) -> Option<PyObject> {
+        self.separator
+            .as_ref()
+            .map(|separator| separator.clone_ref(py))
+    }
+
+    #[getter]
+    fn minimum(&self) -> usize {
+        self.minimum
+    }
+
+    #[getter]
+    fn collect(&self) -> bool {
+        self.collect
+    }
+
+    /// A repetition that has to match at least once starts like the
+    /// repeated parser.  Otherwise it may succeed on any input.
+    #[getter]
+    fn first_set(&self, py: Python) -> PyResult<PyObject> {
+        match &self.parser {
+            Some(parser) if self.minimum > 0 => match parser.getattr(py, "first_set") {
+                Ok(first_set) => Ok(first_set),
+                Err(_) => Ok(py.None()),
+            },
+            _ => Ok(py.None()),
+        }
+    }
+
+    fn __call__(
+        &self,
+        py: Python,
+        stream: PyObject,
+        continuation: PyObject,
+    ) -> PyResult<trampoline::Call> {
+        let parser = required(&self.parser)?.clone_ref(py);
+        let reset_point = Stream::new(stream.as_ref(py))?.get_reset_point()?;
+        let repetition_continuation = Py::new(
+            py,
+            RepetitionContinuation {
+                parser: Some(parser.clone_ref(py)),
+                separator: self
+                    .separator
+                    .as_ref()
+                    .map(|separator| separator.clone_ref(py)),
+                continuation: Some(continuation),
+                results: if self.collect { Some(Vec::new()) } else { None },
+                count: 0,
+                minimum: self.minimum,
+                reset_point: Some(reset_point),
+                expecting_separator: false,
+            },
+        )?;
+        Ok(trampoline::Call::positional(
+            py,
+            parser,
+            (stream, repetition_continuation.into_py(py)),
+        ))
+    }
+
+    fn __traverse__(&self, visit: PyVisit) -> std::result::Result<(), PyTraverseError> {
+        if let Some(parser) = &self.parser {
+            visit.call(parser)?;
+        }
+        if let Some(separator) = &self.separator {
+            visit.call(separator)?;
+        }
+        Ok(())
+    }
+
+    fn __clear__(&mut self) {
+        self.parser = None;
+        self.separator = None;
+    }
+}
+
+#[pyclass]
+pub struct RepetitionContinuation {
+    parser: Option<PyObject>,
+    separator: Option<PyObject>,
+    continuation: Option<PyObject>,
+    results: Option<Vec<PyObject>>,
+    count: usize,
+    minimum: usize,
+    reset_point: Option<ResetPoint>,
+    expecting_separator: bool,
+}
+
+#[pymethods]
+impl RepetitionContinuation {
+    fn __call__(
+        mut slf: PyRefMut<Self>,
+        py: Python,
+        stream: PyObject,
+        parsing_result: Py<result::Result>,
+    ) -> PyResult<trampoline::Call> {
+        let mut input = Stream::new(stream.as_ref(py))?;
+        if parsing_result.borrow(py).is_failure() {
+            let continuation = required(&slf.continuation)?.clone_ref(py);
+            let reset_point = slf.reset_point.take();
+            if slf.count < slf.minimum {
+                if let Some(reset_point) = reset_point {
+                    reset_point.destroy(py)?;
+                }
+                drop(input);
+                return Ok(trampoline::Call::positional(
+                    py,
+                    continuation,
+                    (stream, parsing_result.into_py(py)),
+                ));
+            }
+            if let Some(reset_point) = reset_point {
+                input.reset_stream(py, &reset_point)?;
+                reset_point.destroy(py)?;
+            }
+            drop(input);
+            let value = match slf.results.take() {
+                Some(results) => PyList::new(py, results).into_py(py),
+                None => py.None(),
+            };
+            return Ok(trampoline::Call::positional(
+                py,
+                continuation,
+                (stream, result::success(py, value).into_py(py)),
+            ));
+        }
+        let next_parser = if slf.expecting_separator {
+            slf.expecting_separator = false;
+            required(&slf.parser)?.clone_ref(py)
+        } else {
+            slf.count += 1;
+            if slf.results.is_some() {
+                let value = parsing_result.borrow(py).value(py)?;
+                if let Some(results) = slf.results.as_mut() {
+                    results.push(value);
+                }
+            }
+            if let Some(reset_point) = slf.reset_point.take() {
+                reset_point.destroy(py)?;
+            }
+            slf.reset_point = Some(input.get_reset_point()?);
+            match slf
+                .separator
+                .as_ref()
+                .map(|separator| separator.clone_ref(py))
+            {
+                Some(separator) => {
+                    slf.expecting_separator = true;
+                    separator
+                }
+                None => required(&slf.parser)?.clone_ref(py),
+            }
+        };
+        drop(input);
+        Ok(trampoline::Call::positional(
+            py,
+            next_parser,
+            (stream, slf.into_py(py)),
+        ))
+    }
+
+    fn __traverse__(&self, visit: PyVisit) -> std::result::Result<(), PyTraverseError> {
+        if let Some(parser) = &self.parser {
+            visit.call(parser)?;
+        }
+        if let Some(separator) = &self.separator {
+            visit.call(separator)?;
+        }
+        if let Some(continuation) = &self.continuation {
+            visit.call(continuation)?;
+        }
+        if let Some(results) = &self.results {
+            for value in results.iter() {
+                visit.call(value)?;
+            }
+        }
+        if let Some(ResetPoint::Foreign(reset_point)) = &self.reset_point {
+            visit.call(reset_point)?;
+        }
+        Ok(())
+    }
+
+    fn __clear__(&mut self) {
+        self.parser = None;
+        self.separator = None;
+        self.continuation = None;
+        self.results = None;
+        self.reset_point = None;
+    }
+}
+
+fn required(object: &Option<PyObject>) -> PyResult<&PyObject> {
+    match object {
+        Some(object) => Ok(object),
+        None => Err(PyException::new_err(
+            "Parser was cleared by the garbage collector",
+        )),
+    }
+}
+
+pub fn initialize_module(module: &PyModule) -> PyResult<()> {
+    module.add_class::<RepetitionParser>()?;
+    module.add_class::<RepetitionContinuation>()?;
+    Ok(())
+}
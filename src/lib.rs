@@ -1,8 +1,11 @@
 use pyo3::prelude::*;
 
+mod combinators;
 mod primitives;
 mod result;
+mod stream;
 mod trampoline;
+mod vm;
 
 fn add_submodule<F>(
     py: Python<'_>,
@@ -24,5 +27,8 @@ fn extensions(py: Python<'_>, module: &PyModule) -> PyResult<()> {
     add_submodule(py, "result", result::initialize_module, &module)?;
     add_submodule(py, "trampoline", trampoline::initialize_trampoline, &module)?;
     add_submodule(py, "primitives", primitives::initialize_module, &module)?;
+    add_submodule(py, "stream", stream::initialize_module, &module)?;
+    add_submodule(py, "combinators", combinators::initialize_module, &module)?;
+    add_submodule(py, "vm", vm::initialize_module, &module)?;
     Ok(())
 }
@@ -3,18 +3,27 @@
 from .basic import floating_point, integer
 from .coroutine import do
 from .error import FileTooLarge, ParsingFailed
+from .hotspots import record_hotspots
+from .incremental import IncrementalParser
 from .internals import (
     bind,
     character,
     choose_parser,
+    cut,
     end_of_file,
     fail,
     fmap,
     literal,
+    memo,
     none_of,
     one_of,
+    regex,
+    skip_while,
+    take_while,
+    take_while1,
     try_parser,
 )
+from .metrics import ParseMetrics, measure
 from .parser import (
     ParsingResult,
     chain,
@@ -24,10 +33,15 @@ from .parser import (
     many,
     many1,
     parse_file,
+    parse_iter,
     repeat,
     run_parser,
     seperated_by,
+    skip_many,
+    skip_many1,
     unit,
     until,
     whitespace,
 )
+from .profiling import named, profile
+from .tracing import trace
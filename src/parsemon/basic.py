@@ -3,8 +3,8 @@
 from typing import Tuple
 
 from .coroutine import do
-from .internals import fmap, literal, try_parser
-from .parser import chain, choice, choices, many, many1, one_of, unit
+from .internals import fmap, literal, regex, take_while, try_parser
+from .parser import chain, choice, choices, one_of, unit
 
 
 def concat(chars):
@@ -14,7 +14,7 @@ def concat(chars):
 
 DIGITS = "0123456789"
 DIGIT = one_of(DIGITS)
-PARSE_DIGITS = fmap(concat, many1(DIGIT))
+PARSE_DIGITS = regex("[0-9]+")
 
 
 @do
@@ -29,7 +29,7 @@ def integer():
         first = yield DIGIT
     else:
         sign = 1
-    rest = yield fmap(concat, many(DIGIT))
+    rest = yield take_while(DIGITS)
     return sign * int(first + rest)
 
 
@@ -0,0 +1,114 @@
+"""This module contains parsers for binary data like wire protocols.
+
+The parsers in this module read from a ``BytesStream``.  They slice
+the underlying buffer instead of reading byte by byte, so fixed size
+fields and blocks are parsed without creating a python object for
+every byte.  Blocks are returned as ``memoryview`` objects that share
+the memory of the input.
+"""
+from typing import Union
+
+from parsemon.extensions import result, trampoline
+from parsemon.extensions.primitives import CharacterSet
+
+from .error import ParsingFailed
+from .internals import bind, run
+from .internals.first_set import with_first_set
+from .internals.memo import DEFAULT_MEMO_SIZE
+from .parser import parsing_result
+from .stream import BytesStream
+
+ANY_BYTE = CharacterSet("", negated=True)
+
+
+def take(count: int):
+    """Parse exactly ``count`` bytes and return them as a
+    ``memoryview``.  No input is consumed if fewer bytes are left."""
+    reason = result.Reason.expected("{count} bytes".format(count=count))
+
+    def parser(stream, continuation):
+        view = stream.take(count)
+        if view is None:
+            return trampoline.Call(
+                continuation, stream, result.rejected(reason, stream.position())
+            )
+        return trampoline.Call(continuation, stream, result.success(view))
+
+    return with_first_set(parser, ANY_BYTE if count > 0 else None)
+
+
+def byte_literal(expected: bytes):
+    """Parse exactly the bytes given and return them.  No input is
+    consumed if the input does not match."""
+    reason = result.Reason.expected(repr(expected))
+
+    def parser(stream, continuation):
+        reset_point = stream.get_reset_point()
+        view = stream.take(len(expected))
+        if view is None or view != expected:
+            stream.reset_stream(reset_point)
+            reset_point.destroy()
+            return trampoline.Call(
+                continuation, stream, result.rejected(reason, stream.position())
+            )
+        reset_point.destroy()
+        return trampoline.Call(continuation, stream, result.success(expected))
+
+    return with_first_set(parser, CharacterSet(chr(expected[0])) if expected else None)
+
+
+def integer(size: int, byteorder: str = "big", signed: bool = False):
+    """Parse an integer that is stored in ``size`` bytes.
+
+    :param byteorder: either ``"big"`` or ``"little"``
+    :param signed: if true, the integer is read in two's complement
+    """
+    reason = result.Reason.expected("{size} byte integer".format(size=size))
+
+    def parser(stream, continuation):
+        view = stream.take(size)
+        if view is None:
+            return trampoline.Call(
+                continuation, stream, result.rejected(reason, stream.position())
+            )
+        return trampoline.Call(
+            continuation,
+            stream,
+            result.success(int.from_bytes(view, byteorder, signed=signed)),
+        )
+
+    return with_first_set(parser, ANY_BYTE if size > 0 else None)
+
+
+def length_prefixed(length_parser):
+    """Parse an integer with ``length_parser`` and return a
+    ``memoryview`` of that many bytes that follow it.
+
+    ``length_prefixed(integer(2))`` parses blocks that start with
+    their length as a two byte big endian integer.
+    """
+    return bind(length_parser, take)
+
+
+def parse_bytes(
+    parser,
+    content: Union[bytes, bytearray, memoryview],
+    memo_size: int = DEFAULT_MEMO_SIZE,
+):
+    """Parse ``content`` with ``parser`` through a ``BytesStream``.
+
+    The ``remaining_input`` of the result is a ``memoryview`` of the
+    bytes that were not consumed.  Failures report their position as
+    an offset in bytes.
+    """
+    stream, parsed = run(parser, BytesStream(content), memo_size=memo_size)
+    if parsed.is_failure():
+        raise ParsingFailed(
+            " OR ".join(
+                "{message} @ byte {position}".format(
+                    message=failure.message, position=failure.position
+                )
+                for failure in parsed.get_failures()
+            )
+        )
+    return parsing_result(value=parsed.value, remaining_input=stream.remaining())
@@ -0,0 +1,236 @@
+"""Translate parsers into flat instruction sequences.
+
+The program returned by ``compile`` is run by the parsing machine in
+``parsemon.extensions.vm``.  The machine keeps the values of parsers
+on a value stack and handles alternatives with an explicit stack of
+backtracking frames instead of allocating continuations while
+parsing.  Only functions passed by the user, e.g. the mappings of
+``fmap`` or the bodies of ``bind`` and ``do``, are called back in
+python.  Parsers that the compiler does not know are run through the
+trampoline.
+
+The compiler is not part of the public interface of ``parsemon`` yet.
+Parsers that the machine does not know and the parsers returned by
+the bodies of ``bind`` are run by a trampoline of their own, nested
+inside of the machine.  Recursive grammars built with ``bind`` or
+``do`` therefore use the native stack once per level of nesting, and
+deeply nested input can exhaust it.  Choices are tried one after the
+other since programs do not dispatch on first sets.
+"""
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from parsemon.extensions import combinators, vm
+
+from .internals.backtracking import CutScope
+from .internals.first_set import first_set
+from .internals.structure import NATIVE_PRIMITIVES, STRUCTURAL_OPERATIONS, structure
+
+LEAF_OPERATIONS = ("unit", "fail", "cut", "regex")
+
+
+def compile(parser) -> vm.Program:
+    """Compile ``parser`` into a program for the parsing machine.
+
+    The resulting parser accepts the same input and produces the same
+    results and error messages as ``parser``.  Parsers that appear
+    more than once in ``parser`` are compiled only once and called as
+    subroutines.
+    """
+    return _Compiler(parser).program()
+
+
+class _Label:
+    """An address in the program that is not known yet."""
+
+
+class _Compiler:
+    def __init__(self, parser) -> None:
+        self.parser = parser
+        self.instructions: List[Tuple[str, Any]] = []
+        self.addresses: Dict[_Label, int] = dict()
+        self.subroutines: Dict[Any, _Label] = dict()
+        self.shared = {
+            node
+            for node, count in _count_references(parser).items()
+            if count > 1 and not _is_leaf(node)
+        }
+
+    def program(self) -> vm.Program:
+        self.emit(self.parser)
+        compiled_subroutines = set()
+        while len(compiled_subroutines) < len(self.subroutines):
+            for node, label in list(self.subroutines.items()):
+                if node in compiled_subroutines:
+                    continue
+                compiled_subroutines.add(node)
+                self.addresses[label] = len(self.instructions)
+                self.emit(node)
+        return vm.Program(
+            [
+                (operation, self.addresses[operand])
+                if isinstance(operand, _Label)
+                else (operation, operand)
+                for operation, operand in self.instructions
+            ],
+            first_set(self.parser),
+            CutScope(),
+        )
+
+    def emit(self, node) -> None:
+        """Emit the instructions for ``node`` and a final ``return``."""
+        self.emit_body(node)
+        self.instructions.append(("return", None))
+
+    def emit_body(self, root) -> None:
+        # Parsers can be nested very deeply, e.g. when many parsers
+        # are combined with ``reduce``.  That is why we keep a stack
+        # of pending work instead of recursing.
+        work: List[Tuple[str, Any]] = [("node", root)]
+        while work:
+            kind, item = work.pop()
+            if kind == "instruction":
+                self.instructions.append(item)
+            elif kind == "label":
+                self.addresses[item] = len(self.instructions)
+            elif item is not root and item in self.shared:
+                label = self.subroutines.setdefault(item, _Label())
+                self.instructions.append(("jump", label))
+            else:
+                work.extend(reversed(self.lower(item)))
+
+    def lower(self, node) -> List[Tuple[str, Any]]:
+        """Return the work needed to emit the instructions of ``node``
+        as a list of ``("node", parser)``, ``("instruction",
+        instruction)`` and ``("label", label)`` items."""
+        if isinstance(node, NATIVE_PRIMITIVES):
+            return [_instruction("match", node)]
+        if isinstance(node, combinators.RepetitionParser):
+            return _lower_repetition(node)
+        description = structure(node)
+        if description is None:
+            return [_instruction("call", node)]
+        operation, *operands = description
+        if operation == "sequence":
+            first, second = operands
+            return [("node", first), _instruction("pop"), ("node", second)]
+        if operation == "followed_by":
+            parser, suffix_parser = operands
+            return [("node", parser), ("node", suffix_parser), _instruction("pop")]
+        if operation == "bind":
+            parser, binding = operands
+            return [("node", parser), _instruction("bind", binding)]
+        if operation == "map":
+            mapping, parser = operands
+            return [("node", parser), _instruction("map", mapping)]
+        if operation == "named":
+            return [("node", operands[0])]
+        if operation in ("choice", "choices"):
+            return _lower_alternatives(operands)
+        if operation == "try":
+            return [
+                _instruction("mark"),
+                ("node", operands[0]),
+                _instruction("release"),
+            ]
+        if operation == "look_ahead":
+            return [
+                _instruction("look_ahead"),
+                ("node", operands[0]),
+                _instruction("rewind"),
+            ]
+        if operation == "unit":
+            return [_instruction("push", operands[0])]
+        if operation == "fail":
+            return [_instruction("fail", operands[0])]
+        if operation == "cut":
+            return [_instruction("cut")]
+        return [_instruction("call", node)]
+
+
+def _instruction(operation: str, operand: Any = None) -> Tuple[str, Any]:
+    return ("instruction", (operation, operand))
+
+
+def _lower_alternatives(alternatives) -> List[Tuple[str, Any]]:
+    """Lower ``choose_parser`` applied from left to right to
+    ``alternatives``.  All alternatives share one scope for ``cut``."""
+    work: List[Tuple[str, Any]] = [("node", alternatives[0])]
+    for alternative in alternatives[1:]:
+        other, end = _Label(), _Label()
+        work = (
+            [_instruction("choice", other)]
+            + work
+            + [
+                _instruction("commit", end),
+                ("label", other),
+                ("node", alternative),
+                _instruction("end_choice"),
+                ("label", end),
+            ]
+        )
+    return [_instruction("scope")] + work + [_instruction("end_scope")]
+
+
+def _lower_repetition(node) -> List[Tuple[str, Any]]:
+    """Lower ``many``, ``many1`` and ``seperated_by``.  The required
+    occurrences are unrolled and followed by a loop over the optional
+    ones."""
+    parser, separator = node.parser, node.separator
+    keep = _instruction("append" if node.collect else "pop")
+    work = [_instruction("new_list" if node.collect else "push")]
+    for count in range(node.minimum):
+        if count and separator is not None:
+            work += [("node", separator), _instruction("pop")]
+        work += [("node", parser), keep]
+    loop, exit = _Label(), _Label()
+    if node.minimum == 0 and separator is not None:
+        work += [
+            _instruction("repeat", exit),
+            ("node", parser),
+            keep,
+            _instruction("iterate", loop),
+        ]
+    work += [("label", loop), _instruction("repeat", exit)]
+    if separator is not None:
+        work += [("node", separator), _instruction("pop")]
+    work += [("node", parser), keep, _instruction("iterate", loop), ("label", exit)]
+    return work
+
+
+def _children(node) -> List[Any]:
+    if isinstance(node, combinators.RepetitionParser):
+        return [node.parser] + ([] if node.separator is None else [node.separator])
+    description = structure(node)
+    if description is None:
+        return []
+    operation, *operands = description
+    if operation in STRUCTURAL_OPERATIONS:
+        return operands
+    if operation in ("bind", "named"):
+        return operands[:1]
+    if operation == "map":
+        return operands[1:]
+    return []
+
+
+def _is_leaf(node) -> bool:
+    if isinstance(node, NATIVE_PRIMITIVES):
+        return True
+    description = structure(node)
+    return description is None or description[0] in LEAF_OPERATIONS
+
+
+def _count_references(parser) -> Counter:
+    references: Counter = Counter()
+    visited = set()
+    pending = [parser]
+    while pending:
+        node = pending.pop()
+        if node in visited:
+            continue
+        visited.add(node)
+        for child in _children(node):
+            references[child] += 1
+            pending.append(child)
+    return references
@@ -3,6 +3,7 @@ from functools import wraps
 from parsemon.extensions import trampoline
 
 from .extensions import result
+from .internals.instrumentation import with_name
 
 
 def do(f):
@@ -22,6 +23,8 @@ def do(f):
             third = yield character()
             return first + second + third
 
+    Profiles and traces show the resulting parsers under the name of
+    the decorated function.
     """
 
     @wraps(f)
@@ -57,6 +60,6 @@ def do(f):
                 do_continuation,
             )
 
-        return _do_parser
+        return with_name(_do_parser, f.__name__)
 
     return decorator
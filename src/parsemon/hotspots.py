@@ -0,0 +1,96 @@
+"""Find the regions of the input that are parsed over and over again.
+
+When a parser fails after consuming input, e.g. inside of
+``try_parser`` or an alternative of a choice, the stream is reset and
+the input since the reset point is parsed again.  ``record_hotspots``
+counts for every offset how often that happened in the parser runs
+that are started in its ``with`` block::
+
+    with record_hotspots() as hotspots:
+        run_parser(grammar, document)
+    print(hotspots.report(document))
+
+Use one ``with`` block per document since offsets of different
+documents are not told apart.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from .internals.instrumentation import Observer, observe
+from .sourcemap import SourceMap, display_location
+
+
+@dataclass(frozen=True)
+class Hotspot:
+    """The offsets from ``start`` up to but excluding ``end`` were
+    parsed again ``count`` times after a reset."""
+
+    start: int
+    end: int
+    count: int
+
+
+class Hotspots(Observer):
+    """Counts how often the offsets of the input were parsed again."""
+
+    def __init__(self) -> None:
+        # Every reset from ``position`` back to ``target`` adds one
+        # to the counts of the offsets in between.  Only the changes
+        # of the count at the boundaries are stored.
+        self._changes: Counter = Counter()
+
+    def reset(self, position: int, target: int) -> None:
+        if target < position:
+            self._changes[target] += 1
+            self._changes[position] -= 1
+
+    def regions(self) -> List[Hotspot]:
+        """Return the regions of the input that were parsed again,
+        ordered by their offset.  Adjacent offsets that were parsed
+        again equally often form a single region."""
+        found = []
+        count = 0
+        offsets = sorted(self._changes)
+        for start, end in zip(offsets, offsets[1:]):
+            count += self._changes[start]
+            if count:
+                found.append(Hotspot(start, end, count))
+        return found
+
+    def histogram(self) -> Dict[int, int]:
+        """Return how often every offset was parsed again.  Offsets
+        that were parsed only once are left out."""
+        return {
+            offset: region.count
+            for region in self.regions()
+            for offset in range(region.start, region.end)
+        }
+
+    def report(self, document: str, limit: Optional[int] = 10) -> str:
+        """Render the regions with the most repeated parsing first.
+        Locations are computed in ``document``, which should be the
+        input of the recorded run."""
+        hottest = sorted(
+            self.regions(), key=lambda region: (-region.count, region.start)
+        )[:limit]
+        locations = SourceMap(document).locate_all(
+            offset for region in hottest for offset in (region.start, region.end - 1)
+        )
+        return "\n".join(
+            "{count} times: {start} to {end}".format(
+                count=region.count,
+                start=display_location(*start),
+                end=display_location(*end),
+            )
+            for region, start, end in zip(hottest, locations[::2], locations[1::2])
+        )
+
+
+@contextmanager
+def record_hotspots() -> Iterator[Hotspots]:
+    """Record the input that parser runs in the ``with`` block parse
+    again after resetting the stream."""
+    with observe(Hotspots()) as hotspots:
+        yield hotspots
@@ -0,0 +1,380 @@
+"""Parse input that arrives in chunks, e.g. from a socket or a pipe."""
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from typing import Any, List, Optional, Tuple
+
+from parsemon.extensions import trampoline, vm
+
+from .error import FileTooLarge, ParsingFailed
+from .internals.backtracking import ChoiceFrame, current_choice_frames
+from .internals.memo import DEFAULT_MEMO_SIZE, MemoTable, current_memo_table
+from .sourcemap import display_location
+from .stream import (
+    PATTERN_LOOKBEHIND_SIZE,
+    PATTERN_WINDOW_SIZE,
+    ResetPoint,
+    Stream,
+    StringStreamResetPoint,
+)
+
+COMPILED_PARSER_MESSAGE = "Compiled parsers cannot be resumed with more input"
+
+
+class NeedMoreInput(Exception):
+    """Raised by an ``IncrementalStream`` when a parser looks past the
+    input that was received so far."""
+
+
+class IncrementalStream(Stream):
+    """A stream over input that is received piece by piece.
+
+    Reading past the end of the input received so far raises
+    ``NeedMoreInput`` until the stream is closed.  Positions are
+    counted from the beginning of the whole input, even after the
+    consumed part of the input was released.
+    """
+
+    def __init__(self) -> None:
+        # The chunks before ``self._first`` were released.  They are
+        # removed from the lists once they make up half of them.
+        self._chunks: List[str] = []
+        self._chunk_starts: List[int] = []
+        self._first = 0
+        self._end = 0
+        self._chunk = ""
+        self._chunk_start = 0
+        self._window = ""
+        self._window_start = 0
+        # ``match_pattern`` does not try to match at
+        # ``self._retry_position`` again before the input reaches
+        # ``self._retry_end``.
+        self._retry_position = -1
+        self._retry_end = 0
+        self._position = 0
+        self._closed = False
+        self._released_position = 0
+        self._discarded_linebreaks = 0
+        self._last_discarded_linebreak = -1
+
+    @classmethod
+    def from_string(cls, content: str) -> IncrementalStream:
+        stream = cls()
+        stream.feed(content)
+        stream.close()
+        return stream
+
+    def feed(self, chunk: str) -> None:
+        self._drop_released_input()
+        if chunk:
+            self._chunks.append(chunk)
+            self._chunk_starts.append(self._end)
+            self._end += len(chunk)
+
+    def close(self) -> None:
+        self._closed = True
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def is_exhausted(self) -> bool:
+        """Check if all input received so far was consumed."""
+        return self._position >= self._end
+
+    def next(self) -> Optional[str]:
+        index = self._position - self._chunk_start
+        if 0 <= index < len(self._chunk):
+            return self._chunk[index]
+        if self._position < self._end:
+            index = self._chunk_index(self._position)
+            self._chunk = self._chunks[index]
+            self._chunk_start = self._chunk_starts[index]
+            return self._chunk[self._position - self._chunk_start]
+        if self._closed:
+            return None
+        raise NeedMoreInput()
+
+    def read(self) -> Optional[str]:
+        character = self.next()
+        if character is not None:
+            self._position += 1
+        return character
+
+    def position(self) -> int:
+        return self._position
+
+    def seek(self, position: int) -> None:
+        self._position = position
+
+    def to_string(self) -> str:
+        if self._position >= self._end:
+            return ""
+        index = self._chunk_index(self._position)
+        rest = "".join(self._chunks[index:])
+        return rest[self._position - self._chunk_starts[index] :]
+
+    def get_reset_point(self) -> StringStreamResetPoint:
+        return StringStreamResetPoint(self._position)
+
+    def reset_stream(self, reset_point: ResetPoint) -> None:
+        self._position = reset_point.get_position()
+
+    def match_pattern(self, pattern: re.Pattern) -> Optional[re.Match]:
+        """Match ``pattern`` against the buffered input as described in
+        ``Stream.match_pattern``.
+
+        Regular expressions cannot tell if a longer input could still
+        match.  That is why more input is requested while the stream
+        is open and the pattern matches up to the end of the buffer.
+        Like ``Stream.match_pattern``, a pattern that fails is only
+        retried with more input if fewer than ``PATTERN_WINDOW_SIZE``
+        characters are buffered after the current position.
+
+        The buffered input is joined into a window that is reused until
+        more input is fed.  A match that reached the end of at least
+        ``PATTERN_WINDOW_SIZE`` characters is only retried after the
+        input after the position doubled, so that long matches do not
+        join and scan the buffer again for every small chunk.
+        """
+        if (
+            not self._closed
+            and self._position == self._retry_position
+            and self._end < self._retry_end
+        ):
+            raise NeedMoreInput()
+        is_before_window = (
+            self._window_start > self._offset()
+            and self._position - self._window_start < PATTERN_LOOKBEHIND_SIZE
+        )
+        if is_before_window or self._window_start + len(self._window) != self._end:
+            self._load_window()
+        index = self._position - self._window_start
+        found = pattern.match(self._window, index)
+        if not self._closed:
+            if found is None:
+                if len(self._window) - index < PATTERN_WINDOW_SIZE:
+                    raise NeedMoreInput()
+            elif found.end() == len(self._window):
+                size = self._end - self._position
+                if size >= PATTERN_WINDOW_SIZE:
+                    self._retry_position = self._position
+                    self._retry_end = self._position + 2 * size
+                raise NeedMoreInput()
+        if found is not None:
+            self._position = self._window_start + found.end()
+        return found
+
+    def buffered_size(self) -> int:
+        """Number of characters that were received but not released."""
+        return self._end - self._released_position
+
+    def release_consumed(self) -> None:
+        """Release the input before the current position.  Reset points
+        to positions before it must not be used afterwards.  The
+        memory is reclaimed when the next chunk is fed so that
+        releasing after every small value stays cheap."""
+        self._released_position = self._position
+
+    def _load_window(self) -> None:
+        """Join the chunks from the current position to the end of the
+        input into the window that ``match_pattern`` matches against."""
+        start = max(self._position - PATTERN_LOOKBEHIND_SIZE, 0)
+        index = max(self._chunk_index(start), self._first)
+        self._window = "".join(self._chunks[index:])
+        if index < len(self._chunks):
+            self._window_start = self._chunk_starts[index]
+        else:
+            self._window_start = self._end
+
+    def _offset(self) -> int:
+        if self._first < len(self._chunk_starts):
+            return self._chunk_starts[self._first]
+        return self._end
+
+    def _chunk_index(self, position: int) -> int:
+        return bisect_right(self._chunk_starts, position, self._first) - 1
+
+    def _drop_released_input(self) -> None:
+        # Keep some released input for lookbehind assertions in
+        # ``match_pattern``.
+        oldest_position = self._released_position - PATTERN_LOOKBEHIND_SIZE
+        while (
+            self._first < len(self._chunks)
+            and self._chunk_starts[self._first] + len(self._chunks[self._first])
+            <= oldest_position
+        ):
+            chunk = self._chunks[self._first]
+            linebreaks = chunk.count("\n")
+            if linebreaks:
+                self._discarded_linebreaks += linebreaks
+                self._last_discarded_linebreak = self._chunk_starts[
+                    self._first
+                ] + chunk.rindex("\n")
+            self._first += 1
+        if self._first > len(self._chunks) // 2:
+            del self._chunks[: self._first]
+            del self._chunk_starts[: self._first]
+            self._first = 0
+
+    def location(self, position: int) -> Tuple[int, int]:
+        """Return line and column of ``position`` like
+        ``sourcemap.find_location_in_indices`` does for a complete
+        document."""
+        offset = self._offset()
+        buffered = "".join(self._chunks[self._first :])
+        before = buffered[: max(position - offset, 0)]
+        linebreaks = before.count("\n")
+        if linebreaks:
+            last_linebreak = offset + before.rindex("\n")
+        else:
+            last_linebreak = self._last_discarded_linebreak
+        return (
+            self._discarded_linebreaks + linebreaks + 1,
+            position - last_linebreak - 1,
+        )
+
+
+class IncrementalParser:
+    """Apply ``parser`` repeatedly to input that is fed in chunks.
+
+    Every value that ``parser`` produces is returned from the call to
+    ``feed`` or ``close`` that completed it.  When the parser needs
+    more input than was fed so far, parsing is suspended and resumed
+    by the next call to ``feed``::
+
+        incremental_parser = IncrementalParser(json_document())
+        incremental_parser.feed('{"a": ')  # returns []
+        incremental_parser.feed('1} [2]')  # returns [{"a": 1}]
+        incremental_parser.close()  # returns [[2]]
+
+    Input that was consumed by a completed value is released.  If
+    ``parser`` fails, ``ParsingFailed`` is raised by the call that
+    detected the failure or, if that call completed values before, by
+    the next call.  If ``max_size`` is given, ``FileTooLarge`` is
+    raised in the same way as soon as a single value spans more than
+    ``max_size`` characters of input.
+
+    Programs returned by ``parsemon.compiler.compile`` run to the end
+    without suspending and cannot be resumed with more input.  They
+    are rejected with ``ValueError``, also when they are part of
+    ``parser`` and look past the input fed so far.
+    """
+
+    def __init__(
+        self,
+        parser,
+        memo_size: int = DEFAULT_MEMO_SIZE,
+        max_size: Optional[int] = None,
+    ) -> None:
+        if isinstance(parser, vm.Program):
+            raise ValueError(COMPILED_PARSER_MESSAGE)
+        self._parser = parser
+        self._memo_size = memo_size
+        self._max_size = max_size
+        self._stream = IncrementalStream()
+        self._pending: Optional[trampoline.Call] = None
+        self._memo_table: Optional[MemoTable] = None
+        self._choice_frames: List[ChoiceFrame] = []
+        self._start_position = 0
+        self._parsing_result: Any = None
+        self._error: Optional[Exception] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Append ``chunk`` to the input and return the values that
+        were completed by it."""
+        if self._stream.closed:
+            raise ValueError("Cannot feed input after close()")
+        self._stream.feed(chunk)
+        return self._parse_available_input()
+
+    def close(self) -> List[Any]:
+        """Mark the end of the input and return the remaining values."""
+        self._stream.close()
+        return self._parse_available_input()
+
+    def _parse_available_input(self) -> List[Any]:
+        if self._error is not None:
+            raise self._error
+        values: List[Any] = []
+        while True:
+            if self._pending is None:
+                if self._stream.is_exhausted():
+                    return values
+                self._start_value()
+            try:
+                if not self._resume():
+                    self._check_size(self._stream.buffered_size())
+                    return values
+                values.append(self._finish_value())
+            except (ParsingFailed, FileTooLarge) as error:
+                self._error = error
+                if values:
+                    return values
+                raise
+
+    def _start_value(self) -> None:
+        self._start_position = self._stream.position()
+        self._memo_table = MemoTable(self._memo_size)
+        self._choice_frames = []
+        self._pending = trampoline.Call(self._parser, self._stream, self._finish)
+
+    def _finish(self, stream, parsing_result):
+        self._parsing_result = parsing_result
+        return trampoline.Result(None)
+
+    def _resume(self) -> bool:
+        """Bounce the pending calls until the current value is complete
+        or more input is needed.  Returns if the value is complete."""
+        token = current_memo_table.set(self._memo_table)
+        frames_token = current_choice_frames.set(self._choice_frames)
+        try:
+            pending = self._pending
+            while isinstance(pending, trampoline.Call):
+                position = self._stream.position()
+                try:
+                    pending = pending.invoke()
+                except NeedMoreInput:
+                    if isinstance(pending.function, vm.Program):
+                        raise ValueError(COMPILED_PARSER_MESSAGE)
+                    self._stream.seek(position)
+                    self._pending = pending
+                    return False
+            self._pending = None
+            return True
+        finally:
+            current_choice_frames.reset(frames_token)
+            current_memo_table.reset(token)
+
+    def _finish_value(self) -> Any:
+        parsing_result, self._parsing_result = self._parsing_result, None
+        if self._memo_table is not None:
+            self._memo_table.clear()
+        self._memo_table = None
+        if parsing_result.is_failure():
+            raise ParsingFailed(
+                " OR ".join(
+                    self._render(failure.message, failure.position)
+                    for failure in parsing_result.get_failures()
+                )
+            )
+        self._check_size(self._stream.position() - self._start_position)
+        if self._stream.position() == self._start_position:
+            raise ParsingFailed(
+                self._render(
+                    "Parser succeeded without consuming input", self._start_position
+                )
+            )
+        self._stream.release_consumed()
+        return parsing_result.value
+
+    def _check_size(self, size: int) -> None:
+        if self._max_size is not None and size > self._max_size:
+            raise FileTooLarge("Input to be parsed exceeded maximum size")
+
+    def _render(self, message: str, position: int) -> str:
+        return "{message} @ {location}".format(
+            message=message,
+            location=display_location(*self._stream.location(position)),
+        )
@@ -1,4 +1,6 @@
-from .parser import bind, choose_parser, run
+from .backtracking import cut
+from .memo import memo
+from .parser import bind, choose_parser, dispatch_parser, run
 from .primitives import (
     character,
     end_of_file,
@@ -8,6 +10,10 @@ from .primitives import (
     look_ahead,
     none_of,
     one_of,
+    regex,
+    skip_while,
+    take_while,
+    take_while1,
     try_parser,
     unit,
 )
@@ -0,0 +1,139 @@
+"""Commit to an alternative with ``cut``.
+
+Choices and ``try_parser`` register a frame for as long as they run
+if ``cut`` may run inside of them.  ``cut`` commits the frames up to
+and including the innermost choice.  Committed frames give up the
+reset point of the stream right away, so the stream can release
+buffered input, and the choice drops the failures of the
+alternatives that were tried before.
+"""
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional
+
+from parsemon.extensions import result, trampoline
+
+from .structure import describe
+
+
+class ChoiceFrame:
+    """Backtracking state of a choice or ``try_parser`` that is in
+    progress."""
+
+    __slots__ = ("is_choice", "is_committed", "reset_point")
+
+    def __init__(self, is_choice: bool, reset_point=None) -> None:
+        self.is_choice = is_choice
+        self.is_committed = False
+        self.reset_point = reset_point
+
+    def commit(self) -> None:
+        self.is_committed = True
+        self.release()
+
+    def release(self) -> None:
+        if self.reset_point is not None:
+            self.reset_point.destroy()
+            self.reset_point = None
+
+
+current_choice_frames: ContextVar[Optional[List[ChoiceFrame]]] = ContextVar(
+    "current_choice_frames", default=None
+)
+
+
+def merge_all_failures(failure, other):
+    """Keep the failures of all alternatives."""
+    return failure + other
+
+
+def merge_farthest_failures(limit: int):
+    """Return a function that only keeps the failures at the farthest
+    position of the input, at most ``limit`` of them."""
+
+    def _merge_farthest_failures(failure, other):
+        return failure.merge_farthest(other, limit)
+
+    return _merge_farthest_failures
+
+
+current_failure_merge: ContextVar[Callable[[Any, Any], Any]] = ContextVar(
+    "current_failure_merge", default=merge_all_failures
+)
+"""How choices combine the failures of their alternatives in the
+current parser run."""
+
+
+def merge_failures(failure, other):
+    """Combine the failures of two alternatives of a choice."""
+    return current_failure_merge.get()(failure, other)
+
+
+def enter(frame: ChoiceFrame) -> ChoiceFrame:
+    """Register ``frame`` for the current parser run."""
+    frames = current_choice_frames.get()
+    if frames is not None:
+        frames.append(frame)
+    return frame
+
+
+def leave(frame: ChoiceFrame) -> None:
+    """Unregister ``frame``.  Frames are left in reverse order of
+    entering them since every parser calls its continuation once.  A
+    ``RuntimeError`` is raised if ``frame`` is not the innermost
+    frame."""
+    frames = current_choice_frames.get()
+    if frames is None:
+        return
+    if not frames or frames[-1] is not frame:
+        raise RuntimeError("Choice frame was left out of order")
+    frames.pop()
+
+
+def commit_choice() -> None:
+    """Commit all frames up to and including the innermost choice."""
+    frames = current_choice_frames.get()
+    if not frames:
+        return
+    for frame in reversed(frames):
+        frame.commit()
+        if frame.is_choice:
+            return
+
+
+def cut():
+    """Commit to the current alternative of the innermost enclosing
+    choice.
+
+    If the alternative fails after the cut, the choice fails as well
+    instead of trying the remaining alternatives, and only the
+    failures after the cut are reported.  ``try_parser`` inside of
+    the choice does not reset the stream anymore either.  ``many``
+    and its relatives are not choices in this sense.  The parser
+    consumes no input and returns ``None``.
+    """
+
+    def parser(stream, continuation):
+        commit_choice()
+        return trampoline.Call(continuation, stream, result.success(None))
+
+    return describe(parser, "cut")
+
+
+class CutScope:
+    """Connects the choices of compiled programs with the frames of
+    the parsers that they run through the trampoline and with the way
+    failures are merged in the current run."""
+
+    def merge_failures(self, failure, other):
+        return merge_failures(failure, other)
+
+    def enter(self) -> ChoiceFrame:
+        return enter(ChoiceFrame(is_choice=True))
+
+    def leave(self, frame: ChoiceFrame) -> bool:
+        """Unregister ``frame`` and report if it was committed."""
+        leave(frame)
+        return frame.is_committed
+
+    def cut(self) -> None:
+        commit_choice()
@@ -0,0 +1,38 @@
+"""First sets describe the characters a parser can start with.
+
+A parser ``p`` with a first set ``s`` promises that it fails without
+consuming input whenever the next character of the stream is not in
+``s`` or when the stream is exhausted.  A first set of ``None`` means
+that nothing is known about ``p``, e.g. because it may succeed
+without consuming any input.  ``choices`` uses first sets to skip
+alternatives that cannot succeed on the next character.
+"""
+from functools import reduce
+from typing import Optional
+
+from parsemon.extensions.primitives import CharacterSet
+
+
+def first_set(parser) -> Optional[CharacterSet]:
+    """Return the first set reported by ``parser`` or ``None``."""
+    return getattr(parser, "first_set", None)
+
+
+def with_first_set(parser, characters: Optional[CharacterSet]):
+    """Attach the first set ``characters`` to the python parser
+    ``parser`` and return the parser."""
+    parser.first_set = characters
+    return parser
+
+
+def union(*first_sets: Optional[CharacterSet]) -> Optional[CharacterSet]:
+    """Combine the first sets of alternatives.  The result is unknown
+    if any of the alternatives is unknown."""
+    if any(characters is None for characters in first_sets):
+        return None
+    return reduce(lambda left, right: left | right, first_sets)
+
+
+def nothing() -> CharacterSet:
+    """The first set of parsers that never succeed."""
+    return CharacterSet("")
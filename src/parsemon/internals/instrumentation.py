@@ -0,0 +1,175 @@
+"""Observe parser runs without slowing down the runs nobody observes.
+
+Parser runs use the native trampoline unless an ``Observer`` is
+registered with ``observe``.  Runs started while observers are
+registered bounce their calls in python instead and tell the
+observers about every parser that is entered and exited and about
+every reset of the stream.  Parsers inside of compiled programs are
+not observed.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional, Tuple, TypeVar
+
+from parsemon.extensions import result, trampoline
+
+from .structure import structure
+
+
+class Observer:
+    """Base class for the observers of parser runs.  The methods are
+    called in the order the events happen and do nothing by
+    default."""
+
+    def begin_run(self) -> None:
+        """A parser run starts."""
+
+    def end_run(self, bounces: int) -> None:
+        """A parser run finished after bouncing ``bounces`` calls."""
+
+    def call(self, function, arguments: Tuple[Any, ...]) -> None:
+        """The trampoline calls ``function`` with ``arguments``."""
+
+    def enter(self, parser, position: int) -> None:
+        """``parser`` starts at ``position`` of the input."""
+
+    def exit(self, parser, position: int, parsing_result) -> None:
+        """``parser`` passed ``parsing_result`` to its continuation at
+        ``position``.  Parsers exit in reverse order of entering."""
+
+    def reset_point(self, position: int) -> None:
+        """A reset point for ``position`` was taken from the stream."""
+
+    def reset(self, position: int, target: int) -> None:
+        """The stream was reset from ``position`` to ``target``."""
+
+    def merge(self) -> None:
+        """The failures of two alternatives were merged."""
+
+
+ObserverType = TypeVar("ObserverType", bound=Observer)
+
+current_observers: ContextVar[Tuple[Observer, ...]] = ContextVar(
+    "current_observers", default=()
+)
+
+
+@contextmanager
+def observe(observer: ObserverType) -> Iterator[ObserverType]:
+    """Report the parser runs started in the ``with`` block to
+    ``observer``."""
+    token = current_observers.set(current_observers.get() + (observer,))
+    try:
+        yield observer
+    finally:
+        current_observers.reset(token)
+
+
+def with_name(parser, name: str):
+    """Attach ``name`` to the python parser ``parser`` and return the
+    parser."""
+    parser.parser_name = name
+    return parser
+
+
+def parser_name(parser) -> Optional[str]:
+    """Return the name attached to ``parser`` or ``None``."""
+    return getattr(parser, "parser_name", None)
+
+
+def display_name(parser) -> str:
+    """Return the name of ``parser`` or, for parsers without a name,
+    the combinator or class that built it."""
+    name = parser_name(parser)
+    if name is not None:
+        return name
+    description = structure(parser)
+    if description is not None:
+        return description[0]
+    return getattr(parser, "__qualname__", type(parser).__name__)
+
+
+class ObservedStream:
+    """Delegate to ``stream`` and report its resets to ``observers``."""
+
+    def __init__(self, stream, observers: Tuple[Observer, ...]) -> None:
+        self._stream = stream
+        self._observers = observers
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+    def get_reset_point(self):
+        reset_point = self._stream.get_reset_point()
+        position = self._stream.position()
+        for observer in self._observers:
+            observer.reset_point(position)
+        return reset_point
+
+    def reset_stream(self, reset_point) -> None:
+        position = self._stream.position()
+        self._stream.reset_stream(reset_point)
+        target = self._stream.position()
+        for observer in self._observers:
+            observer.reset(position, target)
+
+
+def observed_merge(observers: Tuple[Observer, ...], merge):
+    """Return a function that merges failures like ``merge`` and
+    reports every merge to ``observers``."""
+
+    def _observed_merge(failure, other):
+        for observer in observers:
+            observer.merge()
+        return merge(failure, other)
+
+    return _observed_merge
+
+
+def with_observed_trampoline(observers: Tuple[Observer, ...], function, *args):
+    """Bounce the calls returned by ``function(*args)`` like
+    ``trampoline.with_trampoline`` does and report them to
+    ``observers``.
+
+    A call of a parser passes a stream and a continuation.  The
+    parser is exited when that continuation is called with a result.
+    Parsers that hand their continuation on to another parser exit
+    together with that parser.
+    """
+    for observer in observers:
+        observer.begin_run()
+    active: List[Tuple[Any, Any]] = []
+    bounces = 0
+    pending = function(*args)
+    while isinstance(pending, trampoline.Call):
+        bounces += 1
+        called, arguments = pending.function, pending.args
+        for observer in observers:
+            observer.call(called, arguments)
+        if len(arguments) == 2:
+            stream, argument = arguments
+            if isinstance(argument, result.Result):
+                _exit(observers, active, called, stream.position(), argument)
+            else:
+                active.append((called, argument))
+                position = stream.position()
+                for observer in observers:
+                    observer.enter(called, position)
+        pending = pending.invoke()
+    for observer in observers:
+        observer.end_run(bounces)
+    return pending.value
+
+
+def _exit(observers, active, continuation, position, parsing_result) -> None:
+    index = len(active)
+    while index and active[index - 1][1] is not continuation:
+        index -= 1
+    if not index:
+        return
+    while index > 1 and active[index - 2][1] is continuation:
+        index -= 1
+    while len(active) >= index:
+        parser, _ = active.pop()
+        for observer in observers:
+            observer.exit(parser, position, parsing_result)
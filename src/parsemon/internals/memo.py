@@ -0,0 +1,110 @@
+"""Packrat memoization of parser results for the duration of a single
+parser run.
+"""
+import heapq
+from contextvars import ContextVar
+from itertools import count
+from typing import Any, Dict, List, Optional, Tuple
+
+from parsemon.extensions import trampoline
+
+from .first_set import first_set, with_first_set
+from .structure import may_cut
+
+DEFAULT_MEMO_SIZE = 4096
+"""Default number of results kept by the memo table of a parser run."""
+
+
+class MemoTable:
+    """Cache ``(parser, start position) -> (end position, result)``.
+
+    The table holds at most ``max_size`` entries.  When it is full the
+    entries with the lowest start position are evicted first since the
+    parser is least likely to return to the beginning of the input.
+
+    Every entry keeps a reset point at its end position, so that a hit
+    can move the stream there.  Streams that buffer their input, like
+    ``IOStream``, keep the input after the oldest of these positions
+    until the entry is evicted or the table is cleared.  ``max_size``
+    bounds that cost as well.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MEMO_SIZE) -> None:
+        self.max_size = max_size
+        self._entries: Dict[Tuple[Any, int], Tuple[Any, Any]] = dict()
+        self._positions: List[Tuple[int, int, Tuple[Any, int]]] = []
+        self._counter = count()
+
+    def lookup(self, key: Tuple[Any, int]) -> Optional[Tuple[Any, Any]]:
+        return self._entries.get(key)
+
+    def store(self, key: Tuple[Any, int], end_point, parsing_result) -> None:
+        """Store the result of a parser run.  An entry that is already
+        stored for ``key`` is kept since ``parser`` produces the same
+        result every time."""
+        if self.max_size <= 0 or key in self._entries:
+            end_point.destroy()
+            return
+        while len(self._entries) >= self.max_size:
+            self._evict()
+        self._entries[key] = (end_point, parsing_result)
+        heapq.heappush(self._positions, (key[1], next(self._counter), key))
+
+    def _evict(self) -> None:
+        _, _, key = heapq.heappop(self._positions)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            end_point, _ = entry
+            end_point.destroy()
+
+    def clear(self) -> None:
+        """Remove all entries and destroy their reset points."""
+        for end_point, _ in self._entries.values():
+            end_point.destroy()
+        self._entries.clear()
+        self._positions.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+current_memo_table: ContextVar[Optional[MemoTable]] = ContextVar(
+    "current_memo_table", default=None
+)
+
+
+def memo(parser):
+    """Cache the results of ``parser`` by input position.
+
+    When the resulting parser is applied at a position where ``parser``
+    already ran during the same call to ``run_parser``, the stored
+    result is returned and the stream is moved to where ``parser``
+    stopped back then.  This turns repeated parsing of shared prefixes
+    in alternatives into a table lookup.  ``parser`` must not depend
+    on anything but the input at its start position.
+
+    A ``cut`` inside of ``parser`` only commits the enclosing choice
+    when ``parser`` actually runs.  Returning a stored result does
+    not commit anything, so a memoized parser should not contain a
+    ``cut`` that the surrounding grammar relies on.
+    """
+
+    def _memo_parser(stream, continuation):
+        table = current_memo_table.get()
+        if table is None:
+            return trampoline.Call(parser, stream, continuation)
+        key = (parser, stream.position())
+        entry = table.lookup(key)
+        if entry is not None:
+            end_point, parsing_result = entry
+            stream.reset_stream(end_point)
+            return trampoline.Call(continuation, stream, parsing_result)
+
+        def _store_result(progressed_stream, parsing_result):
+            table.store(key, progressed_stream.get_reset_point(), parsing_result)
+            return trampoline.Call(continuation, progressed_stream, parsing_result)
+
+        return trampoline.Call(parser, stream, _store_result)
+
+    _memo_parser.may_cut = may_cut(parser)
+    return with_first_set(_memo_parser, first_set(parser))
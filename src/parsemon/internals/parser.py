@@ -3,6 +3,14 @@ not intended to be used from outside of this library.
 """
 from parsemon.extensions import trampoline
 
+from . import backtracking
+from . import first_set as first_sets
+from . import instrumentation, structure
+from .memo import DEFAULT_MEMO_SIZE, MemoTable, current_memo_table
+from .structure import describe
+
+_NOT_COMPUTED = object()
+
 
 def bind(parser, binding):
     def _combined_parser(stream, continuation):
@@ -24,53 +32,226 @@ def bind(parser, binding):
             bind_continuation,
         )
 
-    return _combined_parser
+    first_sets.with_first_set(_combined_parser, first_sets.first_set(parser))
+    return describe(_combined_parser, "bind", parser, binding)
 
 
 def choose_parser(parser, other):
-    def _choice_parser(stream, continuation):
-        def _choice_continuation(progressed_stream, parser_result):
-            def _error_message_continuation(final_stream, other_result):
-                if other_result.is_failure():
-                    final_result = parser_result + other_result
-                else:
-                    final_result = other_result
-                return trampoline.Call(
-                    continuation,
-                    final_stream,
-                    final_result,
-                )
+    _choice_parser = alternatives_parser((parser, other))
+    first_sets.with_first_set(
+        _choice_parser,
+        first_sets.union(first_sets.first_set(parser), first_sets.first_set(other)),
+    )
+    return describe(_choice_parser, "choice", parser, other)
 
-            if parser_result.is_failure():
-                return trampoline.Call(
-                    other,
-                    progressed_stream,
-                    _error_message_continuation,
-                )
-            else:
+
+def alternatives_parser(alternatives):
+    """Try ``alternatives`` from left to right until one succeeds.
+    If all of them fail, the failures of all alternatives are
+    reported.  A ``cut`` in one of the alternatives commits to it."""
+    first, *rest = alternatives
+    may_cut = any(structure.may_cut(alternative) for alternative in alternatives)
+
+    def _alternatives_parser(stream, continuation):
+        frame = None
+        if may_cut:
+            frame = backtracking.enter(backtracking.ChoiceFrame(is_choice=True))
+        remaining_alternatives = iter(rest)
+        failure = None
+
+        def _choice_continuation(progressed_stream, parsing_result):
+            nonlocal failure
+            if parsing_result.is_failure() and (
+                frame is None or not frame.is_committed
+            ):
+                if failure is not None:
+                    parsing_result = backtracking.merge_failures(
+                        failure, parsing_result
+                    )
+                alternative = next(remaining_alternatives, None)
+                if alternative is not None:
+                    failure = parsing_result
+                    return trampoline.Call(
+                        alternative, progressed_stream, _choice_continuation
+                    )
+            if frame is not None:
+                backtracking.leave(frame)
+            return trampoline.Call(continuation, progressed_stream, parsing_result)
+
+        return trampoline.Call(first, stream, _choice_continuation)
+
+    return _alternatives_parser
+
+
+def dispatch_parser(alternatives):
+    """Try ``alternatives`` one at a time like a chain of
+    ``choose_parser``, but skip the alternatives whose first set does
+    not admit the next character of the stream.
+
+    The viable alternatives are computed once per ASCII character and
+    cached.  For other characters they are computed when needed, so
+    the cache does not grow with the input.  Alternatives are tried
+    in order and none of them runs twice.  Once an alternative failed
+    after consuming input, the following alternatives run like in the
+    chain, since their first sets do not apply at the new position.
+    The skipped alternatives only run if all others failed, to report
+    their failures.  This way the result, including all error
+    messages, is the same as without dispatching.
+    """
+    full_chain = alternatives_parser(alternatives)
+    alternative_first_sets = [
+        first_sets.first_set(alternative) for alternative in alternatives
+    ]
+    if all(characters is None for characters in alternative_first_sets):
+        return describe(full_chain, "choices", *alternatives)
+    alternatives = tuple(alternatives)
+    may_cut = any(structure.may_cut(alternative) for alternative in alternatives)
+    ascii_table = [_NOT_COMPUTED] * 128
+
+    def _compute_viable_alternatives(character):
+        viable = tuple(
+            characters is None or (character is not None and character in characters)
+            for characters in alternative_first_sets
+        )
+        if not any(viable) or all(viable):
+            return None
+        return viable
+
+    def _viable_alternatives(character):
+        if character is None or ord(character) >= 128:
+            return _compute_viable_alternatives(character)
+        viable = ascii_table[ord(character)]
+        if viable is _NOT_COMPUTED:
+            viable = ascii_table[ord(character)] = _compute_viable_alternatives(
+                character
+            )
+        return viable
+
+    def _dispatch_parser(stream, continuation):
+        viable = _viable_alternatives(stream.next())
+        if viable is None:
+            return trampoline.Call(full_chain, stream, continuation)
+        start_position = stream.position()
+        frame = backtracking.ChoiceFrame(is_choice=True)
+        if may_cut:
+            backtracking.enter(frame)
+        failures = [None] * len(alternatives)
+        skipped = []
+        current = -1
+
+        def _next_alternative(progressed_stream):
+            nonlocal current
+            current += 1
+            while current < len(alternatives):
+                if progressed_stream.position() != start_position:
+                    return alternatives[current]
+                if viable[current]:
+                    # If this alternative consumes input and fails, the
+                    # skipped alternatives have to run at the start
+                    # position later on.
+                    if skipped and frame.reset_point is None:
+                        frame.reset_point = progressed_stream.get_reset_point()
+                    return alternatives[current]
+                skipped.append(current)
+                current += 1
+            return None
+
+        def _finish(progressed_stream, parsing_result):
+            if may_cut:
+                backtracking.leave(frame)
+            frame.release()
+            return trampoline.Call(continuation, progressed_stream, parsing_result)
+
+        def _merged_failures():
+            merged = None
+            for failure in failures:
+                if failure is not None:
+                    merged = (
+                        failure
+                        if merged is None
+                        else backtracking.merge_failures(merged, failure)
+                    )
+            return merged
+
+        def _dispatch_continuation(progressed_stream, parsing_result):
+            if not parsing_result.is_failure() or frame.is_committed:
+                return _finish(progressed_stream, parsing_result)
+            failures[current] = parsing_result
+            alternative = _next_alternative(progressed_stream)
+            if alternative is not None:
                 return trampoline.Call(
-                    continuation,
-                    progressed_stream,
-                    parser_result,
+                    alternative, progressed_stream, _dispatch_continuation
                 )
+            if not skipped:
+                return _finish(progressed_stream, _merged_failures())
+            # The skipped alternatives fail without consuming input at
+            # the start position.  They run there to report their
+            # failures and the stream returns to where the last
+            # alternative failed afterwards.
+            end_point = None
+            if progressed_stream.position() != start_position:
+                end_point = progressed_stream.get_reset_point()
+                progressed_stream.reset_stream(frame.reset_point)
+            pending_skipped = iter(skipped)
+
+            def _skipped_continuation(skipped_stream, skipped_result):
+                failures[index] = skipped_result
+                return _run_skipped(skipped_stream)
+
+            def _run_skipped(skipped_stream):
+                nonlocal index
+                index = next(pending_skipped, None)
+                if index is not None:
+                    return trampoline.Call(
+                        alternatives[index], skipped_stream, _skipped_continuation
+                    )
+                if end_point is not None:
+                    skipped_stream.reset_stream(end_point)
+                    end_point.destroy()
+                return _finish(skipped_stream, _merged_failures())
+
+            index = None
+            return _run_skipped(progressed_stream)
 
         return trampoline.Call(
-            parser,
-            stream,
-            _choice_continuation,
+            _next_alternative(stream), stream, _dispatch_continuation
         )
 
-    return _choice_parser
+    first_sets.with_first_set(
+        _dispatch_parser, first_sets.union(*alternative_first_sets)
+    )
+    return describe(_dispatch_parser, "choices", *alternatives)
 
 
-def run(parser, input_stream):
-    return trampoline.with_trampoline(
-        parser,
-        input_stream,
-        lambda stream, x: trampoline.Result(
-            (
-                stream,
-                x,
+def run(parser, input_stream, memo_size=DEFAULT_MEMO_SIZE, max_failures=None):
+    memo_table = MemoTable(memo_size)
+    token = current_memo_table.set(memo_table)
+    frames_token = backtracking.current_choice_frames.set([])
+    if max_failures is None:
+        merge = backtracking.merge_all_failures
+    else:
+        merge = backtracking.merge_farthest_failures(max_failures)
+    observers = instrumentation.current_observers.get()
+    if observers:
+        merge = instrumentation.observed_merge(observers, merge)
+    merge_token = backtracking.current_failure_merge.set(merge)
+    try:
+        if observers:
+            _, parsing_result = instrumentation.with_observed_trampoline(
+                observers,
+                trampoline.Call,
+                parser,
+                instrumentation.ObservedStream(input_stream, observers),
+                _finish_run,
             )
-        ),
-    )
+            return input_stream, parsing_result
+        return trampoline.with_trampoline(parser, input_stream, _finish_run)
+    finally:
+        backtracking.current_failure_merge.reset(merge_token)
+        backtracking.current_choice_frames.reset(frames_token)
+        current_memo_table.reset(token)
+        memo_table.clear()
+
+
+def _finish_run(stream, parsing_result):
+    return trampoline.Result((stream, parsing_result))
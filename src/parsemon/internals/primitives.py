@@ -1,15 +1,20 @@
+import re
+
 from parsemon.extensions import primitives, result, trampoline
 
+from . import backtracking, structure
+from .first_set import first_set, nothing, with_first_set
+from .structure import describe
+
 
 def look_ahead(parser):
     def _wrapped_parser(stream, continuation):
         reset_point = stream.get_reset_point()
 
         def _reset_stream(stream, parsing_result):
-            if parsing_result.is_failure():
-                reset_point.destroy()
-            else:
+            if not parsing_result.is_failure():
                 stream.reset_stream(reset_point)
+            reset_point.destroy()
             return trampoline.Call(
                 continuation,
                 stream,
@@ -22,18 +27,31 @@ def look_ahead(parser):
             _reset_stream,
         )
 
-    return _wrapped_parser
+    with_first_set(_wrapped_parser, first_set(parser))
+    return describe(_wrapped_parser, "look_ahead", parser)
 
 
 def try_parser(parser):
+    may_cut = structure.may_cut(parser)
+
     def _wrapped_parser(stream, continuation):
         reset_point = stream.get_reset_point()
+        frame = None
+        if may_cut:
+            frame = backtracking.enter(
+                backtracking.ChoiceFrame(is_choice=False, reset_point=reset_point)
+            )
 
         def _reset_stream(progressed_stream, parsing_result):
-            if parsing_result.is_failure():
-                stream.reset_stream(reset_point)
-            else:
+            if frame is None:
+                if parsing_result.is_failure():
+                    stream.reset_stream(reset_point)
                 reset_point.destroy()
+            else:
+                backtracking.leave(frame)
+                if parsing_result.is_failure() and not frame.is_committed:
+                    stream.reset_stream(reset_point)
+                frame.release()
             return trampoline.Call(
                 continuation,
                 stream,
@@ -46,7 +64,8 @@ def try_parser(parser):
             _reset_stream,
         )
 
-    return _wrapped_parser
+    with_first_set(_wrapped_parser, first_set(parser))
+    return describe(_wrapped_parser, "try", parser)
 
 
 def unit(value):
@@ -59,50 +78,24 @@ def unit(value):
             ),
         )
 
-    return parser
+    return describe(parser, "unit", value)
 
 
 def fail(msg):
     """This parser always fails with the message passed as ``msg``."""
 
+    reason = result.Reason.message(msg)
+
     def parser(stream, cont):
-        return trampoline.Call(
-            cont, stream, result.failure(message=msg, position=stream.position())
-        )
+        return trampoline.Call(cont, stream, result.rejected(reason, stream.position()))
 
-    return parser
+    with_first_set(parser, nothing())
+    return describe(parser, "fail", msg)
 
 
 def character(n: int = 1):
     """Parse exactly n characters, the default is 1."""
-
-    def parser(stream, cont):
-        results = []
-        read_count = 0
-        for _ in range(0, n):
-            char_found = stream.read()
-            if not char_found:
-                break
-            read_count += 1
-            results.append(char_found)
-        if read_count < n:
-            return trampoline.Call(
-                cont,
-                stream,
-                result.failure(
-                    message="Expected character but found end of string",
-                    position=stream.position(),
-                ),
-            )
-        return trampoline.Call(
-            cont,
-            stream,
-            result.success(
-                value="".join(results),
-            ),
-        )
-
-    return parser
+    return primitives.CharacterParser(n)
 
 
 def literal(expected):
@@ -114,100 +107,76 @@ def literal(expected):
     return primitives.LiteralParser(expected)
 
 
-def none_of(chars: str):
-    """Parse any character except the ones in ``chars``
+def regex(pattern, flags: int = 0, group=0):
+    """Parse input matching the regular expression ``pattern``.
 
-    This parser will fail if it finds a character that is in
-    ``chars``.
+    The expression is matched in one step at the current position of
+    the stream instead of combining single character parsers for
+    tokens with a regular shape.  Like ``re.match``, the alternatives
+    of the expression are tried from left to right and the first one
+    that matches wins, even if a later one would match more input.
+    The parser returns the text of the match group ``group``, which
+    defaults to the whole match.
 
+    :param pattern: a regular expression, either as a string or
+        already compiled
+    :param flags: flags passed to ``re.compile``
+    :param group: index or name of the match group to return
     """
+    compiled_pattern = re.compile(pattern, flags)
+    reason = result.Reason.expected(
+        "input matching `{pattern}`".format(pattern=compiled_pattern.pattern)
+    )
 
     def parser(stream, cont):
-        next_char = stream.next()
-        if next_char is None:
+        found = stream.match_pattern(compiled_pattern)
+        if found is None:
             return trampoline.Call(
-                cont,
-                stream,
-                result.failure(
-                    message=" ".join(
-                        [
-                            "Expected any char except `{forbidden}` but found end"
-                            "of string"
-                        ]
-                    ).format(
-                        forbidden=chars,
-                    ),
-                    position=stream.position(),
-                ),
-            )
-        if next_char not in chars:
-            read_character = stream.read()
-            return trampoline.Call(
-                cont,
-                stream,
-                result.success(
-                    value=read_character,
-                ),
-            )
-        else:
-            return trampoline.Call(
-                cont,
-                stream,
-                result.failure(
-                    message=" ".join(
-                        [
-                            "Expected anything except one of `{forbidden}` but"
-                            "found {actual}"
-                        ]
-                    ).format(forbidden=chars, actual=stream.next()),
-                    position=stream.position(),
-                ),
+                cont, stream, result.rejected(reason, stream.position())
             )
+        return trampoline.Call(cont, stream, result.success(found.group(group)))
 
-    return parser
+    return describe(parser, "regex", compiled_pattern, group)
 
 
-def one_of(expected: str):
-    """Parse only characters contained in ``expected``."""
+def take_while(characters, negate: bool = False):
+    """Parse the longest run of characters that are accepted by
+    ``characters`` and return it as a single string.
 
-    def parser(stream, cont):
-        next_character = stream.next()
-        if next_character is None:
-            return trampoline.Call(
-                cont,
-                stream,
-                result.failure(
-                    message=(
-                        "Expected on of `{expected}` but found end of string".format(
-                            expected=expected
-                        )
-                    ),
-                    position=stream.position(),
-                ),
-            )
-        if next_character in expected:
-            read_character = stream.read()
-            return trampoline.Call(
-                cont,
-                stream,
-                result.success(
-                    value=read_character,
-                ),
-            )
-        else:
-            return trampoline.Call(
-                cont,
-                stream,
-                result.failure(
-                    message=("Expected one of `{expected}` but found {actual}").format(
-                        expected=expected,
-                        actual=stream.next(),
-                    ),
-                    position=stream.position(),
-                ),
-            )
+    ``characters`` is either a string of accepted characters or a
+    predicate that is called with every character.  If ``negate`` is
+    true, the accepted characters are inverted.  The resulting parser
+    never fails, it returns an empty string if the first character is
+    not accepted.
+    """
+    return primitives.SpanParser(characters, negate=negate)
+
+
+def take_while1(characters, negate: bool = False):
+    """Like ``take_while`` but fail if not at least one character is
+    accepted."""
+    return primitives.SpanParser(characters, minimum=1, negate=negate)
+
+
+def skip_while(characters, negate: bool = False):
+    """Like ``take_while`` but discard the characters found.  The
+    resulting parser returns ``None``."""
+    return primitives.SpanParser(characters, collect=False, negate=negate)
+
+
+def none_of(chars: str):
+    """Parse any character except the ones in ``chars``
 
-    return parser
+    This parser will fail if it finds a character that is in
+    ``chars``.
+
+    """
+    return primitives.NoneOfParser(chars)
+
+
+def one_of(expected: str):
+    """Parse only characters contained in ``expected``."""
+    return primitives.OneOfParser(expected)
 
 
 def fmap(mapping, parser):
@@ -222,32 +191,11 @@ def fmap(mapping, parser):
             ),
         )
 
-    return new_parser
+    with_first_set(new_parser, first_set(parser))
+    return describe(new_parser, "map", mapping, parser)
 
 
 def end_of_file():
     """Returns a parser that only succeeds with a value of None if there
     would be no further input to consume"""
-
-    def parser(stream, cont):
-        if stream.next() is None:
-            return trampoline.Call(
-                cont,
-                stream,
-                result.success(
-                    value=None,
-                ),
-            )
-        else:
-            return trampoline.Call(
-                cont,
-                stream,
-                result.failure(
-                    message="Expected end-of-file but found `{char}`".format(
-                        char=stream.next(),
-                    ),
-                    position=stream.position(),
-                ),
-            )
-
-    return parser
+    return primitives.EndOfFileParser()
@@ -0,0 +1,76 @@
+"""Combinators record how they were built so that ``parsemon.compiler.compile``
+can translate them into programs for the parsing machine.
+
+A structure is a tuple of an operation name and the operands passed
+to the combinator, e.g. ``("choice", parser, other)``.  Parsers
+without a structure are treated as opaque by the compiler.
+
+The structure also tells if a parser may run ``cut``.  Choices only
+register a frame for ``cut`` if one of their alternatives may run it.
+"""
+from typing import Any, Optional, Tuple
+
+from parsemon.extensions import combinators, primitives
+
+NATIVE_PRIMITIVES = (
+    primitives.LiteralParser,
+    primitives.OneOfParser,
+    primitives.NoneOfParser,
+    primitives.SpanParser,
+    primitives.CharacterParser,
+    primitives.EndOfFileParser,
+)
+
+CUT_FREE_OPERATIONS = ("unit", "fail", "regex")
+STRUCTURAL_OPERATIONS = (
+    "sequence",
+    "followed_by",
+    "choice",
+    "choices",
+    "try",
+    "look_ahead",
+)
+
+
+def describe(parser, operation: str, *operands):
+    """Record that ``parser`` was built by ``operation`` from
+    ``operands`` and return the parser."""
+    parser.structure = (operation,) + operands
+    parser.may_cut = _may_cut(operation, operands)
+    return parser
+
+
+def structure(parser) -> Optional[Tuple[Any, ...]]:
+    """Return the structure recorded for ``parser`` or ``None``."""
+    return getattr(parser, "structure", None)
+
+
+def may_cut(parser) -> bool:
+    """Check if ``cut`` may run while ``parser`` runs.  This is assumed
+    for all parsers that are not known to be free of cuts, e.g. the
+    parsers returned by the bindings of ``bind``."""
+    try:
+        return parser.may_cut
+    except AttributeError:
+        pass
+    if isinstance(parser, NATIVE_PRIMITIVES):
+        return False
+    if isinstance(parser, combinators.RepetitionParser):
+        return may_cut(parser.parser) or (
+            parser.separator is not None and may_cut(parser.separator)
+        )
+    return True
+
+
+def _may_cut(operation: str, operands: Tuple[Any, ...]) -> bool:
+    if operation in CUT_FREE_OPERATIONS:
+        return False
+    if operation == "map":
+        _, parser = operands
+        return may_cut(parser)
+    if operation == "named":
+        parser, _ = operands
+        return may_cut(parser)
+    if operation in STRUCTURAL_OPERATIONS:
+        return any(may_cut(operand) for operand in operands)
+    return True
@@ -1,7 +1,20 @@
 """This module parses json to python"""
 
+from parsemon.extensions import trampoline
+from parsemon.extensions.primitives import CharacterSet
+
 from .coroutine import do
-from .internals import fail, fmap, literal, look_ahead, none_of, try_parser, unit
+from .internals import (
+    fail,
+    fmap,
+    literal,
+    look_ahead,
+    skip_while,
+    take_while1,
+    try_parser,
+    unit,
+)
+from .internals.first_set import first_set, with_first_set
 from .parser import (
     chain,
     choice,
@@ -12,7 +25,7 @@ from .parser import (
     one_of,
     repeat,
     seperated_by,
-    whitespace,
+    whitespace_characters,
 )
 
 
@@ -20,7 +33,7 @@ def concat(parser):
     return fmap("".join, parser)
 
 
-whitespaces = many(whitespace)
+whitespaces = skip_while(whitespace_characters)
 
 escape_pairs = (
     ("b", "\b"),
@@ -53,7 +66,9 @@ escaped_char = chain(literal("\\"), escaped_char)
 
 
 def json_string():
-    json_string_inner = concat(many(choice(escaped_char, none_of('"\\'))))
+    json_string_inner = concat(
+        many(choice(escaped_char, take_while1('"\\', negate=True)))
+    )
     return enclosed_by(json_string_inner, literal('"'))
 
 
@@ -118,26 +133,21 @@ def json_number():
         return int(integer_part)
 
 
-@do
 def json_bool():
-    return (
-        yield (
-            choice(
-                fmap(lambda _: True, literal("true")),
-                fmap(lambda _: False, literal("false")),
-            )
-        )
+    return choice(
+        fmap(lambda _: True, literal("true")),
+        fmap(lambda _: False, literal("false")),
     )
 
 
-@do
 def json_null():
-    yield literal("null")
-    return None
+    return chain(literal("null"), unit(None))
 
 
-@do
-def json_list():
+def json_list(value_parser=None):
+    if value_parser is None:
+        value_parser = json_value()
+
     values_seperator = chain(
         whitespaces,
         literal(","),
@@ -145,28 +155,28 @@ def json_list():
     )
 
     values = seperated_by(
-        json_value(),
+        value_parser,
         values_seperator,
     )
 
-    return (
-        yield enclosed_by(
-            values,
-            chain(literal("["), whitespaces),
-            chain(whitespaces, literal("]")),
-        )
+    return enclosed_by(
+        values,
+        chain(literal("["), whitespaces),
+        chain(whitespaces, literal("]")),
     )
 
 
-@do
-def json_object():
+def json_object(value_parser=None):
+    if value_parser is None:
+        value_parser = json_value()
+
     @do
     def key_value_pair():
         key = yield json_string()
         yield whitespaces
         yield literal(":")
         yield whitespaces
-        value = yield json_value()
+        value = yield value_parser
         return (key, value)
 
     pair_seperator = chain(
@@ -175,30 +185,41 @@ def json_object():
         whitespaces,
     )
 
-    key_value_pairs = yield enclosed_by(
-        seperated_by(
-            key_value_pair(),
-            pair_seperator,
+    return fmap(
+        dict,
+        enclosed_by(
+            seperated_by(
+                key_value_pair(),
+                pair_seperator,
+            ),
+            chain(literal("{"), whitespaces),
+            chain(whitespaces, literal("}")),
         ),
-        chain(literal("{"), whitespaces),
-        chain(whitespaces, literal("}")),
     )
 
-    results = dict()
-    for key, value in key_value_pairs:
-        results[key] = value
-    return results
+
+JSON_NUMBER_START = CharacterSet("-0123456789")
 
 
 def json_value():
-    return choices(
-        json_number(),
+    """Parse any json value.  Lists and objects refer back to the
+    returned parser for their values, so the grammar is built only
+    once."""
+    value = None
+
+    def _json_value(stream, continuation):
+        return trampoline.Call(value, stream, continuation)
+
+    value = choices(
+        with_first_set(json_number(), JSON_NUMBER_START),
         json_string(),
         json_null(),
-        json_list(),
-        json_object(),
+        json_list(_json_value),
+        json_object(_json_value),
         json_bool(),
     )
+    with_first_set(_json_value, first_set(value))
+    return value
 
 
 @do
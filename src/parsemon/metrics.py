@@ -0,0 +1,119 @@
+"""Collect aggregate numbers about parser runs, e.g. to export them
+to a monitoring system.
+
+``run_parser(parser, text, metrics=True)`` attaches the
+``ParseMetrics`` of the run to the ``ParsingResult``.  A function
+passed as ``metrics`` is called with them instead, also when parsing
+fails.  ``measure`` reports the metrics of every parser run that is
+started in its ``with`` block.  Measured runs are slower than runs
+that are not measured.
+"""
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+
+from .internals.instrumentation import (
+    Observer,
+    observe,
+    with_observed_trampoline,
+)
+
+
+@dataclass
+class ParseMetrics:
+    """Numbers about a single parser run.
+
+    ``bounces`` is the number of calls that the trampoline made.
+    ``consumed`` is the number of characters between the start and
+    the end of the run.  ``reset_points`` counts the reset points
+    taken from the stream and ``rollbacks`` the resets that moved the
+    stream backwards.  ``failures`` counts the distinct failures that
+    parsers passed to their continuations and ``merged_failures`` how
+    often the failures of alternatives were merged, including the
+    choices inside of compiled programs.
+    ``peak_continuations`` is the largest number of parsers that were
+    waiting for their continuation at the same time.
+    """
+
+    bounces: int = 0
+    consumed: int = 0
+    seconds: float = 0.0
+    reset_points: int = 0
+    rollbacks: int = 0
+    failures: int = 0
+    merged_failures: int = 0
+    peak_continuations: int = 0
+
+    @property
+    def characters_per_second(self) -> float:
+        if not self.seconds:
+            return 0.0
+        return self.consumed / self.seconds
+
+
+class MetricsCollector(Observer):
+    """Passes the ``ParseMetrics`` of every run to ``report``."""
+
+    def __init__(self, report: Callable[[ParseMetrics], None]) -> None:
+        self.report = report
+        self._metrics = ParseMetrics()
+        self._start_time = 0.0
+        self._start_position: Optional[int] = None
+        self._continuations = 0
+        self._last_failure: Any = None
+
+    def begin_run(self) -> None:
+        self._metrics = ParseMetrics()
+        self._start_position = None
+        self._continuations = 0
+        self._last_failure = None
+        self._start_time = time.perf_counter()
+
+    def end_run(self, bounces: int) -> None:
+        metrics = self._metrics
+        metrics.seconds = time.perf_counter() - self._start_time
+        metrics.bounces = bounces
+        self._last_failure = None
+        self.report(metrics)
+
+    def enter(self, parser, position: int) -> None:
+        if self._start_position is None:
+            self._start_position = position
+        self._continuations += 1
+        self._metrics.peak_continuations = max(
+            self._metrics.peak_continuations, self._continuations
+        )
+
+    def exit(self, parser, position: int, parsing_result) -> None:
+        self._continuations -= 1
+        if self._start_position is not None:
+            self._metrics.consumed = position - self._start_position
+        if parsing_result.is_failure() and parsing_result is not self._last_failure:
+            self._last_failure = parsing_result
+            self._metrics.failures += 1
+
+    def reset_point(self, position: int) -> None:
+        self._metrics.reset_points += 1
+
+    def reset(self, position: int, target: int) -> None:
+        if target < position:
+            self._metrics.rollbacks += 1
+
+    def merge(self) -> None:
+        self._metrics.merged_failures += 1
+
+
+@contextmanager
+def measure(report: Callable[[ParseMetrics], None]) -> Iterator[MetricsCollector]:
+    """Pass the ``ParseMetrics`` of every parser run in the ``with``
+    block to ``report`` when the run finishes."""
+    with observe(MetricsCollector(report)) as collector:
+        yield collector
+
+
+def with_measured_trampoline(report: Callable[[ParseMetrics], None], function, *args):
+    """Behave like ``trampoline.with_trampoline`` and pass the
+    ``ParseMetrics`` of the calls to ``report``.  Reset points,
+    rollbacks and merged failures are only counted in parser runs."""
+    return with_observed_trampoline((MetricsCollector(report),), function, *args)
@@ -1,18 +1,31 @@
 """This module contains the basic building blocks for implementing parsers"""
 
+import os
 from dataclasses import dataclass
 from functools import reduce
-from typing import Any, List, Type, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from parsemon.extensions import combinators
 
 from .coroutine import do
 from .error import FileTooLarge, ParsingFailed
-from .internals import bind, choose_parser, one_of, run, try_parser, unit
-from .sourcemap import (
-    display_location,
-    find_linebreak_indices,
-    find_location_in_indices,
-)
-from .stream import Stream, StringStream
+from .incremental import IncrementalParser
+from .internals import bind, choose_parser, dispatch_parser, one_of, run, unit
+from .internals.memo import DEFAULT_MEMO_SIZE
+from .internals.structure import describe
+from .metrics import ParseMetrics, measure
+from .sourcemap import SourceMap, display_location
+from .stream import MappedFileStream, NativeStringStream, Stream
 
 T = TypeVar("T")
 
@@ -20,19 +33,14 @@ T = TypeVar("T")
 @dataclass
 class ParsingResult:
     value: Any
-    remaining_input: str
+    remaining_input: Union[str, memoryview]
+    metrics: Optional[ParseMetrics] = None
 
 
 def parsing_result(value, remaining_input):
     return ParsingResult(value, remaining_input)
 
 
-_NO_FURTHER_RESULT = object()
-"""This is only intended for internal use.  We use _NO_FURTHER_RESULT
-to signal that a parser was not able to yield a result.  We could use
-None here but then we would not be able to work with parsers that
-would actually return None as a positive parsing result.
-"""
 _DELIMITER_TOKEN = object()
 """This is only intended for internal use.  Its primary use is for
 cases where we want to parse, until we find some form of delimiter.
@@ -48,7 +56,7 @@ def chain(first, second, *rest):
     """
 
     def _chain(p1, p2):
-        return bind(p1, lambda _: p2)
+        return describe(bind(p1, lambda _: p2), "sequence", p1, p2)
 
     first_and_second_parser_combined = _chain(first, second)
     return reduce(_chain, rest, first_and_second_parser_combined)
@@ -63,11 +71,16 @@ def choice(
 
 
 def choices(parser, *parsers):
-    """Try the given parsers one at a time until one succeeds"""
-    return reduce(choice, [parser] + list(parsers))
+    """Try the given parsers one at a time until one succeeds
+
+    Alternatives that report a first set are skipped when they cannot
+    succeed on the next character of the input.
+    """
+    if not parsers:
+        return parser
+    return dispatch_parser([parser] + list(parsers))
 
 
-@do
 def many(original_parser):
     """Apply a parser 0 or more times
 
@@ -78,20 +91,9 @@ def many(original_parser):
     :param original_parser: this parser will be applied as often as
         possible by the resulting new parser
     """
-    results = []
-
-    while True:
-        current_result = yield choice(
-            try_parser(original_parser), unit(_NO_FURTHER_RESULT)
-        )
-        if current_result is _NO_FURTHER_RESULT:
-            break
-        else:
-            results.append(current_result)
-    return results
+    return combinators.RepetitionParser(original_parser)
 
 
-@do
 def many1(original_parser):
     """Apply a parser 1 or more times
 
@@ -103,10 +105,27 @@ def many1(original_parser):
         resulting parser
 
     """
-    return [(yield original_parser)] + (yield many(original_parser))
+    return combinators.RepetitionParser(original_parser, minimum=1)
+
+
+def skip_many(original_parser):
+    """Apply a parser 0 or more times and discard its results
+
+    This behaves like ``many`` but does not build a list of results.
+    The resulting parser returns ``None``.
+    """
+    return combinators.RepetitionParser(original_parser, collect=False)
+
+
+def skip_many1(original_parser):
+    """Apply a parser 1 or more times and discard its results
+
+    This behaves like ``many1`` but does not build a list of results.
+    The resulting parser returns ``None``.
+    """
+    return combinators.RepetitionParser(original_parser, minimum=1, collect=False)
 
 
-@do
 def seperated_by(parser, seperator):
     """Apply the input parser as often as possible, where occurences are
     seperated by input that can be parsed by 'seperator'.
@@ -116,15 +135,9 @@ def seperated_by(parser, seperator):
     parse the string ``1,2,3,4`` and return the list
     ``['1','2','3','4']``.
     """
-    results: List[Any] = []
-    first_elem = yield choice(try_parser(parser), unit(_NO_FURTHER_RESULT))
-    if first_elem is _NO_FURTHER_RESULT:
-        return results
-    rest_elems = yield many(chain(seperator, parser))
-    return [first_elem] + rest_elems
+    return combinators.RepetitionParser(parser, separator=seperator)
 
 
-@do
 def enclosed_by(
     parser,
     prefix_parser,
@@ -136,40 +149,183 @@ def enclosed_by(
     consume the string ``"example"`` and return the python string
     ``'example'``.
     """
-    yield prefix_parser
-    result = yield parser
-    yield suffix_parser or prefix_parser
-    return result
+    suffix_parser = suffix_parser or prefix_parser
+    return chain(prefix_parser, _followed_by(parser, suffix_parser))
+
+
+def _followed_by(parser, suffix_parser):
+    return describe(
+        bind(parser, lambda result: chain(suffix_parser, unit(result))),
+        "followed_by",
+        parser,
+        suffix_parser,
+    )
 
 
 def run_parser(
     p,
     input_string: str,
-    stream_implementation: Type[Stream] = StringStream,
+    stream_implementation: Type[Stream] = NativeStringStream,
+    memo_size: int = DEFAULT_MEMO_SIZE,
+    max_failures: Optional[int] = None,
+    metrics: Union[bool, Callable[[ParseMetrics], None]] = False,
 ):
-    """Parse string input_string with parser p"""
+    """Parse string input_string with parser p
+
+    :param stream_implementation: the ``Stream`` class used to feed
+        ``input_string`` to the parser.  Defaults to the native string
+        stream.
+    :param memo_size: maximum number of results that parsers wrapped
+        with ``memo`` keep during this run.  Every result keeps a reset
+        point at its end, which holds on to buffered input of streams
+        like ``IOStream``.
+    :param max_failures: if given, a failed choice only reports the
+        failures of the alternatives that got farthest into the input,
+        at most ``max_failures`` distinct ones.  By default the
+        failures of all alternatives are reported.
+    :param metrics: if true, the ``ParseMetrics`` of the run are
+        attached to the result.  A function passed instead is called
+        with them, also when parsing fails.  Measured runs are slower.
+    """
+
+    def locate_all(positions):
+        return SourceMap(input_string).locate_all(positions)
 
-    def render_failure(failure):
-        linebreaks = find_linebreak_indices(input_string)
-        line, column = find_location_in_indices(failure.position, linebreaks)
-        return "{message} @ {location}".format(
-            message=failure.message, location=display_location(line, column)
+    def parse():
+        return _parse_stream(
+            p,
+            stream_implementation.from_string(input_string),
+            locate_all,
+            memo_size,
+            max_failures,
         )
 
-    stream, result = run(p, StringStream.from_string(input_string))
+    if not metrics:
+        return parse()
+    reports: List[ParseMetrics] = []
+    with measure(reports.append):
+        try:
+            parsed = parse()
+        finally:
+            if callable(metrics) and reports:
+                metrics(reports[-1])
+    if metrics is True:
+        parsed.metrics = reports[-1]
+    return parsed
+
+
+MAPPED_FILE_THRESHOLD = 16 * 1024 * 1024
+"""Files given by path that are larger than this many bytes are
+mapped into memory instead of being read at once."""
+
+
+def parse_file(
+    parser,
+    input_file,
+    max_size=None,
+    memo_size: int = DEFAULT_MEMO_SIZE,
+    max_failures: Optional[int] = None,
+):
+    """Parse the content of a file with ``parser``
+
+    ``input_file`` is either a file opened in text mode or the path of
+    a UTF-8 encoded file.  A path to a file of up to
+    ``MAPPED_FILE_THRESHOLD`` bytes is read at once and parsed from a
+    ``NativeStringStream``.  Larger files are mapped into memory and
+    decoded lazily while the parser consumes them, so parsing starts
+    right away and memory use stays flat.  The ``MappedFileStream``
+    used for them reads every character in python, which makes
+    parsing slower than from a ``NativeStringStream``.
+
+    :param max_size: raise ``FileTooLarge`` if the file is larger.  For
+        paths the size is taken in bytes from the file system without
+        reading the file, otherwise it is counted in characters.
+    :param memo_size: like for ``run_parser``
+    :param max_failures: like for ``run_parser``
+    """
+    if isinstance(input_file, (str, os.PathLike)):
+        size = os.path.getsize(input_file)
+        if max_size is not None and size > max_size:
+            raise FileTooLarge("File to be parsed exceeded maximum size")
+        if size <= MAPPED_FILE_THRESHOLD:
+            with open(input_file, "rb") as binary_file:
+                content = binary_file.read().decode("utf-8")
+            return run_parser(
+                parser, content, memo_size=memo_size, max_failures=max_failures
+            )
+        with MappedFileStream.open(input_file, max_size=max_size) as stream:
+            return _parse_stream(
+                parser,
+                stream,
+                lambda positions: [stream.location(position) for position in positions],
+                memo_size,
+                max_failures,
+            )
+    content = input_file.read(max_size)
+    if input_file.read(1):
+        raise FileTooLarge("File to be parsed exceeded maximum size")
+    return run_parser(parser, content, memo_size=memo_size, max_failures=max_failures)
+
+
+def _parse_stream(parser, input_stream, locate_all, memo_size, max_failures=None):
+    stream, result = run(
+        parser, input_stream, memo_size=memo_size, max_failures=max_failures
+    )
     if result.is_failure():
         failures = result.get_failures()
-        final_message = " OR ".join(map(render_failure, failures))
+        positions = sorted({failure.position for failure in failures})
+        locations = dict(zip(positions, locate_all(positions)))
+        final_message = " OR ".join(
+            "{message} @ {location}".format(
+                message=failure.message,
+                location=display_location(*locations[failure.position]),
+            )
+            for failure in failures
+        )
         raise ParsingFailed(final_message)
     else:
         return parsing_result(value=result.value, remaining_input=stream.to_string())
 
 
-def parse_file(parser, input_file, max_size=None):
-    content = input_file.read(max_size)
-    if input_file.read(1):
-        raise FileTooLarge("File to be parsed exceeded maximum size")
-    return run_parser(parser, content)
+READ_CHUNK_SIZE = 65536
+"""Number of characters that ``parse_iter`` reads at once."""
+
+
+def parse_iter(
+    parser,
+    source: Union[str, TextIO],
+    max_size: Optional[int] = None,
+    chunk_size: int = READ_CHUNK_SIZE,
+) -> Iterator[Any]:
+    """Apply ``parser`` repeatedly to ``source`` and yield every value
+    as soon as it was parsed.
+
+    ``source`` is either a string or a file opened in text mode.  The
+    input is read in chunks of ``chunk_size`` characters and released
+    after every value, so memory use is bounded by the largest value
+    instead of the whole input.  Like with ``parse_file``,
+    ``FileTooLarge`` is raised if ``max_size`` is given and a single
+    value spans more than ``max_size`` characters.
+
+    ``parse_iter(json_document(), '{"a": 1} [2]')`` yields
+    ``{"a": 1}`` and ``[2]``.
+    """
+    incremental_parser = IncrementalParser(parser, max_size=max_size)
+    for chunk in _read_chunks(source, chunk_size):
+        yield from incremental_parser.feed(chunk)
+    yield from incremental_parser.close()
+
+
+def _read_chunks(source: Union[str, TextIO], chunk_size: int) -> Iterator[str]:
+    if isinstance(source, str):
+        for index in range(0, len(source), chunk_size):
+            yield source[index : index + chunk_size]
+    else:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
 
 
 whitespace_unicode_characters_decimals: List[int] = [
@@ -200,7 +356,9 @@ whitespace_unicode_characters_decimals: List[int] = [
     12288,
 ]
 
-whitespace = one_of("".join(map(chr, whitespace_unicode_characters_decimals)))
+whitespace_characters = "".join(map(chr, whitespace_unicode_characters_decimals))
+
+whitespace = one_of(whitespace_characters)
 """Parse any character that is classified as a whitespace character by unicode
 standard.  That includes newline characters."""
 
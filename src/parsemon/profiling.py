@@ -0,0 +1,142 @@
+"""Find out which parsers of a grammar take the most time.
+
+``profile`` records statistics for the named parsers of every parser
+run that is started in its ``with`` block::
+
+    with profile() as profiler:
+        run_parser(json_document(), document)
+    print(profiler.report(sort_by="time"))
+
+Parsers built with ``do`` are named after the decorated function.
+Other parsers can be named with ``named``.
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from parsemon.extensions import trampoline
+
+from .internals.first_set import first_set, with_first_set
+from .internals.instrumentation import Observer, observe, parser_name, with_name
+from .internals.structure import describe
+
+
+def named(parser, label: str):
+    """Show ``parser`` under ``label`` in profiles.  The resulting
+    parser behaves exactly like ``parser``."""
+
+    def _named_parser(stream, continuation):
+        return trampoline.Call(parser, stream, continuation)
+
+    with_first_set(_named_parser, first_set(parser))
+    return describe(with_name(_named_parser, label), "named", parser, label)
+
+
+@dataclass
+class ParserStatistics:
+    """What a named parser did during a profile.
+
+    ``consumed`` counts the characters of successful invocations.
+    ``backtracks`` counts the failures after consuming input, which
+    make enclosing choices reset the stream.  ``time`` is the time in
+    seconds between entering and exiting the parser, including the
+    parsers that it ran.  Recursive invocations are only timed once.
+    """
+
+    name: str
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    backtracks: int = 0
+    consumed: int = 0
+    time: float = 0.0
+
+
+SORT_KEYS = tuple(field.name for field in fields(ParserStatistics))
+
+
+class Profiler(Observer):
+    """Collects ``ParserStatistics`` by parser name."""
+
+    def __init__(self) -> None:
+        self.statistics: Dict[str, ParserStatistics] = dict()
+        self._active_names: Counter = Counter()
+        self._invocations: List[Tuple[str, int, float]] = []
+
+    def enter(self, parser, position: int) -> None:
+        name = parser_name(parser)
+        if name is None:
+            return
+        self._active_names[name] += 1
+        self._invocations.append((name, position, time.perf_counter()))
+
+    def exit(self, parser, position: int, parsing_result) -> None:
+        if parser_name(parser) is None:
+            return
+        name, start_position, start_time = self._invocations.pop()
+        self._active_names[name] -= 1
+        statistics = self.statistics.get(name)
+        if statistics is None:
+            statistics = self.statistics[name] = ParserStatistics(name)
+        statistics.calls += 1
+        if parsing_result.is_failure():
+            statistics.failures += 1
+            if position > start_position:
+                statistics.backtracks += 1
+        else:
+            statistics.successes += 1
+            statistics.consumed += position - start_position
+        if not self._active_names[name]:
+            statistics.time += time.perf_counter() - start_time
+
+    def sorted_statistics(self, sort_by: str = "time") -> List[ParserStatistics]:
+        """Return the statistics of all named parsers, largest
+        ``sort_by`` first.  ``sort_by`` is a field of
+        ``ParserStatistics``."""
+        if sort_by not in SORT_KEYS:
+            raise ValueError(
+                "Cannot sort by {sort_by!r}, expected one of {keys}".format(
+                    sort_by=sort_by, keys=", ".join(SORT_KEYS)
+                )
+            )
+        return sorted(
+            self.statistics.values(),
+            key=lambda statistics: getattr(statistics, sort_by),
+            reverse=sort_by != "name",
+        )
+
+    def report(self, sort_by: str = "time", limit: Optional[int] = None) -> str:
+        """Render the statistics as a table sorted like
+        ``sorted_statistics`` does.  Only the first ``limit`` rows
+        are shown if ``limit`` is given."""
+        rows: List[Tuple[str, ...]] = [
+            (
+                statistics.name,
+                str(statistics.calls),
+                str(statistics.successes),
+                str(statistics.failures),
+                str(statistics.backtracks),
+                str(statistics.consumed),
+                "{0:.6f}".format(statistics.time),
+            )
+            for statistics in self.sorted_statistics(sort_by)[:limit]
+        ]
+        rows.insert(0, SORT_KEYS)
+        widths = [max(len(row[column]) for row in rows) for column in range(7)]
+        return "\n".join(
+            "  ".join(
+                [row[0].ljust(widths[0])]
+                + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+            )
+            for row in rows
+        )
+
+
+@contextmanager
+def profile() -> Iterator[Profiler]:
+    """Profile the named parsers of all parser runs in the ``with``
+    block.  Runs are slower while they are profiled."""
+    with observe(Profiler()) as profiler:
+        yield profiler
@@ -1,4 +1,5 @@
-from typing import List
+from bisect import bisect_left
+from typing import Iterable, List, Tuple
 
 
 def display_location(line, column) -> str:
@@ -9,12 +10,12 @@ def display_location(line, column) -> str:
 
 
 def find_linebreak_indices(document) -> List[int]:
-    def iterate():
-        for character, index in zip(document, range(0, len(document))):
-            if character == "\n":
-                yield index
-
-    return list(iterate())
+    indices = []
+    index = document.find("\n")
+    while index >= 0:
+        indices.append(index)
+        index = document.find("\n", index + 1)
+    return indices
 
 
 def find_line_in_indices(index, indices):
@@ -45,3 +46,28 @@ def find_location_in_indices(index, indices):
                     start = middle
         column = index - indices[line - 2] - 1
     return line, column
+
+
+class SourceMap:
+    """Translate offsets in a document into lines and columns.
+
+    The positions of all line breaks are collected once when the map
+    is created.  Every lookup afterwards is a binary search, so
+    locating many offsets in a large document is cheap.  Lines start
+    at 1 and columns at 0, like in ``display_location``.
+    """
+
+    def __init__(self, document: str) -> None:
+        self._linebreaks = find_linebreak_indices(document)
+
+    def locate(self, offset: int) -> Tuple[int, int]:
+        """Return line and column of ``offset``."""
+        line = bisect_left(self._linebreaks, offset)
+        if line == 0:
+            return 1, offset
+        return line + 1, offset - self._linebreaks[line - 1] - 1
+
+    def locate_all(self, offsets: Iterable[int]) -> List[Tuple[int, int]]:
+        """Return line and column of every offset in ``offsets``."""
+        locate = self.locate
+        return [locate(offset) for offset in offsets]
@@ -1,8 +1,19 @@
 from __future__ import annotations
 
+import heapq
 import io
+import mmap
+import os
+import re
 from abc import ABC, abstractmethod
-from typing import Optional, TextIO
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, TextIO, Tuple, Union
+
+from parsemon.extensions import stream as extension_stream
+
+from .error import FileTooLarge
 
 
 class Stream(ABC):
@@ -35,6 +46,57 @@ class Stream(ABC):
     def reset_stream(self, reset_point: ResetPoint) -> None:
         pass
 
+    def match_pattern(self, pattern: re.Pattern) -> Optional[re.Match]:
+        """Match ``pattern`` at the current position and advance the
+        stream past the match.
+
+        Patterns are matched like ``pattern.match(content, position)``
+        on the whole input would match them.  Anchors and lookbehind
+        assertions take the input before the position into account,
+        e.g. ``^`` only matches at the beginning of the input and
+        ``\\b`` does not match in the middle of a word.  Streams that
+        do not keep their input in a single string match against a
+        window of it.  The window starts at least
+        ``PATTERN_LOOKBEHIND_SIZE`` characters before the position and
+        reaches at least ``PATTERN_WINDOW_SIZE`` characters past it.
+        It grows for as long as a match reaches its end.  Only the
+        groups of the returned match are meaningful, its positions
+        can be relative to the window.
+
+        This generic implementation cannot see the input before the
+        position and matches as if the input started there.  Stream
+        implementations should override it.
+        """
+        reset_point = self.get_reset_point()
+        window = []
+        window_size = PATTERN_WINDOW_SIZE
+        while True:
+            while len(window) < window_size:
+                character = self.read()
+                if character is None:
+                    break
+                window.append(character)
+            found = pattern.match("".join(window))
+            is_exhausted = len(window) < window_size
+            if is_exhausted or found is None or found.end() < len(window):
+                break
+            window_size *= 2
+        self.reset_stream(reset_point)
+        reset_point.destroy()
+        if found is not None:
+            for _ in range(found.end()):
+                self.read()
+        return found
+
+
+PATTERN_WINDOW_SIZE = 4096
+"""Initial number of characters that ``Stream.match_pattern`` reads
+ahead to match a regular expression."""
+
+PATTERN_LOOKBEHIND_SIZE = 64
+"""Number of characters before the position that ``Stream.match_pattern``
+provides at least to anchors and lookbehind assertions."""
+
 
 class ResetPoint(ABC):
     @abstractmethod
@@ -58,6 +120,13 @@ class StringStreamResetPoint(ResetPoint):
 
 
 class StringStream(Stream):
+    """Pure python implementation of a stream over a string.
+
+    Prefer ``NativeStringStream`` when possible.  Native primitives
+    read its buffer directly instead of calling into python for every
+    character.
+    """
+
     def __init__(self, content: str, position: int) -> None:
         self.content = content
         self._position = position
@@ -93,26 +162,67 @@ class StringStream(Stream):
     def reset_stream(self, reset_point: ResetPoint) -> None:
         self._position = reset_point.get_position()
 
+    def match_pattern(self, pattern: re.Pattern) -> Optional[re.Match]:
+        found = pattern.match(self.content, self._position)
+        if found is not None:
+            self._position = found.end()
+        return found
+
+
+IO_CHUNK_SIZE = 8192
+"""Number of characters that ``IOStream`` reads from its file at once."""
+
 
 class IOStreamResetPoint(ResetPoint):
-    def __init__(self, position: int):
+    """A reset point that keeps the input after its position in the
+    buffer of its ``IOStream`` until it is destroyed."""
+
+    def __init__(self, stream: IOStream, position: int) -> None:
+        self._stream: Optional[IOStream] = stream
         self.position = position
 
     def destroy(self) -> None:
-        pass
+        if self._stream is not None:
+            self._stream._unpin(self.position)
+            self._stream = None
 
     def get_position(self) -> int:
         return self.position
 
 
 class IOStream(Stream):
-    def __init__(self, stream: TextIO):
-        self._peeked_char: Optional[str] = None
+    """A stream over a file opened in text mode.
+
+    The file is read in chunks of ``chunk_size`` characters.  Positions
+    are counted in characters by the stream itself, so they are valid
+    for every encoding and the file does not need to be seekable.  The
+    stream only keeps the chunks from the current position or the
+    oldest reset point that was not destroyed yet, whichever comes
+    first, and the ``PATTERN_LOOKBEHIND_SIZE`` characters before it.
+    Resetting the stream to input that was released raises a
+    ``ValueError``.
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int = IO_CHUNK_SIZE) -> None:
         self._stream = stream
-
-    def next(self) -> Optional[str]:
-        self._peeked_char = self.read()
-        return self._peeked_char
+        self._chunk_size = max(chunk_size, 1)
+        # The chunks before ``self._first`` were released.  They are
+        # removed from the lists once they make up half of them.
+        self._chunks: List[str] = []
+        self._chunk_starts: List[int] = []
+        self._first = 0
+        self._end = 0
+        self._chunk = ""
+        self._chunk_start = 0
+        self._window = ""
+        self._window_start = 0
+        self._position = 0
+        # A heap of the pinned positions.  Positions stay in the heap
+        # after their last reset point was destroyed until they reach
+        # the top or until most of the heap is such positions.
+        self._pins: List[int] = []
+        self._pinned_positions: Counter[int] = Counter()
+        self._is_exhausted = False
 
     @classmethod
     def from_string(cls, content: str) -> IOStream:
@@ -120,25 +230,447 @@ class IOStream(Stream):
             stream=io.StringIO(content),
         )
 
+    def next(self) -> Optional[str]:
+        index = self._position - self._chunk_start
+        if 0 <= index < len(self._chunk):
+            return self._chunk[index]
+        if not self._move_to(self._position):
+            return None
+        return self._chunk[self._position - self._chunk_start]
+
     def read(self) -> Optional[str]:
-        if self._peeked_char:
-            result = self._peeked_char
-            self._peeked_char = None
-            return result
-        else:
-            return self._stream.read(1) or None
+        character = self.next()
+        if character is not None:
+            self._position += 1
+        return character
 
     def position(self) -> int:
-        return self._stream.tell() + (-1 if self._peeked_char else 0)
+        return self._position
 
     def to_string(self) -> str:
-        result: str = ""
-        if self._peeked_char:
-            result = self._peeked_char
-        return result + self._stream.read()
+        while self._fill():
+            pass
+        if self._position >= self._end:
+            return ""
+        index = self._chunk_index(self._position)
+        rest = "".join(self._chunks[index:])
+        return rest[self._position - self._chunk_starts[index] :]
 
     def get_reset_point(self) -> IOStreamResetPoint:
-        return IOStreamResetPoint(self.position())
+        if self._position not in self._pinned_positions:
+            heapq.heappush(self._pins, self._position)
+            if len(self._pins) > 2 * len(self._pinned_positions) + 16:
+                self._pins = list(self._pinned_positions)
+                self._pins.append(self._position)
+                heapq.heapify(self._pins)
+        self._pinned_positions[self._position] += 1
+        return IOStreamResetPoint(self, self._position)
+
+    def reset_stream(self, reset_point: ResetPoint) -> None:
+        position = reset_point.get_position()
+        if position < self._offset():
+            raise ValueError(
+                "Cannot reset stream to position {position}, the input before "
+                "position {offset} was released".format(
+                    position=position, offset=self._offset()
+                )
+            )
+        self._position = position
+
+    def match_pattern(self, pattern: re.Pattern) -> Optional[re.Match]:
+        """Match ``pattern`` against a window of the buffered input as
+        described in ``Stream.match_pattern``.  The window is reused by
+        the following matches."""
+        required = PATTERN_WINDOW_SIZE
+        while True:
+            window_end = self._window_start + len(self._window)
+            is_complete = self._is_exhausted and window_end == self._end
+            is_before_window = (
+                self._window_start > 0
+                and self._position - self._window_start < PATTERN_LOOKBEHIND_SIZE
+            )
+            if is_before_window or (
+                window_end - self._position < required and not is_complete
+            ):
+                self._load_window(required)
+                window_end = self._window_start + len(self._window)
+                is_complete = self._is_exhausted and window_end == self._end
+            found = pattern.match(self._window, self._position - self._window_start)
+            if found is None or found.end() < len(self._window) or is_complete:
+                break
+            required = 2 * (window_end - self._position)
+        if found is not None:
+            self._position = self._window_start + found.end()
+        return found
+
+    def _load_window(self, required: int) -> None:
+        """Join the chunks around the current position into the window
+        that ``match_pattern`` matches against."""
+        while self._end - self._position < 2 * required and self._fill():
+            pass
+        start = max(self._position - PATTERN_LOOKBEHIND_SIZE, 0)
+        index = max(self._chunk_index(start), self._first)
+        self._window = "".join(self._chunks[index:])
+        if index < len(self._chunks):
+            self._window_start = self._chunk_starts[index]
+        else:
+            self._window_start = self._end
+
+    def _offset(self) -> int:
+        if self._first < len(self._chunk_starts):
+            return self._chunk_starts[self._first]
+        return self._end
+
+    def _chunk_index(self, position: int) -> int:
+        return bisect_right(self._chunk_starts, position, self._first) - 1
+
+    def _move_to(self, position: int) -> bool:
+        """Make the chunk containing ``position`` the current chunk.
+        Returns ``False`` if the file ends before ``position``."""
+        while position >= self._end:
+            if not self._fill():
+                return False
+        index = self._chunk_index(position)
+        self._chunk = self._chunks[index]
+        self._chunk_start = self._chunk_starts[index]
+        return True
+
+    def _fill(self) -> bool:
+        """Read the next chunk of the file.  Returns ``False`` if the
+        file is exhausted."""
+        if self._is_exhausted:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._is_exhausted = True
+            return False
+        self._release()
+        self._chunks.append(chunk)
+        self._chunk_starts.append(self._end)
+        self._end += len(chunk)
+        return True
+
+    def _release(self) -> None:
+        while self._pins and self._pins[0] not in self._pinned_positions:
+            heapq.heappop(self._pins)
+        oldest_position = self._position
+        if self._pins:
+            oldest_position = min(self._pins[0], oldest_position)
+        # Keep some input before the oldest position for lookbehind
+        # assertions in ``match_pattern``.
+        oldest_position -= PATTERN_LOOKBEHIND_SIZE
+        while (
+            self._first < len(self._chunks)
+            and self._chunk_starts[self._first] + len(self._chunks[self._first])
+            <= oldest_position
+        ):
+            self._first += 1
+        if self._first > len(self._chunks) // 2:
+            del self._chunks[: self._first]
+            del self._chunk_starts[: self._first]
+            self._first = 0
+
+    def _unpin(self, position: int) -> None:
+        self._pinned_positions[position] -= 1
+        if self._pinned_positions[position] <= 0:
+            del self._pinned_positions[position]
+
+
+class BytesStream(Stream):
+    """A stream over binary data, e.g. the frames of a wire protocol.
+
+    ``content`` can be any object that supports the buffer protocol,
+    like ``bytes``, ``bytearray`` or ``memoryview``.  It is not copied.
+    Positions are counted in bytes.  Character parsers see every byte
+    as the character with the same code point, as if the content was
+    decoded with latin-1.  The parsers in ``parsemon.binary`` read
+    from the buffer directly with ``take``.
+    """
+
+    def __init__(
+        self, content: Union[bytes, bytearray, memoryview], position: int = 0
+    ) -> None:
+        self._buffer = memoryview(content).cast("B")
+        self._position = position
+
+    @classmethod
+    def from_string(cls, content: str) -> BytesStream:
+        return cls(content.encode("latin-1"))
+
+    def next(self) -> Optional[str]:
+        if self._position < len(self._buffer):
+            return chr(self._buffer[self._position])
+        return None
+
+    def read(self) -> Optional[str]:
+        character = self.next()
+        if character is not None:
+            self._position += 1
+        return character
+
+    def take(self, count: int) -> Optional[memoryview]:
+        """Return the next ``count`` bytes as a view into the content
+        and advance the stream past them.  Returns ``None`` without
+        advancing if fewer bytes are left."""
+        end = self._position + count
+        if end > len(self._buffer):
+            return None
+        view = self._buffer[self._position : end]
+        self._position = end
+        return view
+
+    def position(self) -> int:
+        return self._position
+
+    def remaining(self) -> memoryview:
+        """Return a view of the content that was not consumed yet."""
+        return self._buffer[self._position :]
+
+    def to_string(self) -> str:
+        return str(self.remaining(), "latin-1")
+
+    def get_reset_point(self) -> StringStreamResetPoint:
+        return StringStreamResetPoint(self._position)
+
+    def reset_stream(self, reset_point: ResetPoint) -> None:
+        self._position = reset_point.get_position()
+
+    def match_pattern(self, pattern: re.Pattern) -> Optional[re.Match]:
+        """Patterns compiled from ``bytes`` are matched against the
+        content directly.  Patterns compiled from ``str`` are matched
+        against a window of the latin-1 view of the content as
+        described in ``Stream.match_pattern``."""
+        if isinstance(pattern.pattern, bytes):
+            found = pattern.match(self._buffer, self._position)
+            if found is not None:
+                self._position = found.end()
+            return found
+        start = max(self._position - PATTERN_LOOKBEHIND_SIZE, 0)
+        end = self._position + PATTERN_WINDOW_SIZE
+        while True:
+            window = str(self._buffer[start:end], "latin-1")
+            found = pattern.match(window, self._position - start)
+            if found is None or found.end() < len(window) or end >= len(self._buffer):
+                break
+            end = self._position + 2 * (end - self._position)
+        if found is not None:
+            self._position = start + found.end()
+        return found
+
+
+MAPPED_BLOCK_SIZE = 65536
+"""Number of bytes that ``MappedFileStream`` decodes at once."""
+
+MAPPED_CACHED_BLOCKS = 8
+"""Number of decoded blocks that ``MappedFileStream`` keeps around."""
+
+
+class MappedFileStream(Stream):
+    """A stream over UTF-8 encoded bytes, usually a memory mapped file.
+
+    The content is decoded lazily in blocks of about ``block_size``
+    bytes as the parser reaches them.  Only the most recently used
+    blocks are kept, so memory use does not grow with the size of the
+    input.  Positions are counted in characters like in every other
+    stream.
+    """
+
+    def __init__(
+        self, content: Union[bytes, mmap.mmap], block_size: int = MAPPED_BLOCK_SIZE
+    ) -> None:
+        self._content = content
+        self._size = len(content)
+        self._block_size = max(block_size, 4)
+        self._byte_starts: List[int] = [0]
+        self._char_starts: List[int] = [0]
+        # The number of line breaks before every block and the
+        # position of the last of them, for ``location``.
+        self._linebreaks_before: List[int] = [0]
+        self._last_linebreak_before: List[int] = [-1]
+        self._is_complete = False
+        self._cache: OrderedDict[int, str] = OrderedDict()
+        self._position = 0
+        self._load_block(0)
+
+    @classmethod
+    def from_string(cls, content: str) -> MappedFileStream:
+        return cls(content.encode("utf-8"))
+
+    @classmethod
+    @contextmanager
+    def open(
+        cls, path: Union[str, os.PathLike], max_size: Optional[int] = None
+    ) -> Iterator[MappedFileStream]:
+        """Map the file at ``path`` into memory and provide a stream
+        over it.  ``FileTooLarge`` is raised without reading the file
+        if it is larger than ``max_size`` bytes."""
+        with open(path, "rb") as input_file:
+            size = os.fstat(input_file.fileno()).st_size
+            if max_size is not None and size > max_size:
+                raise FileTooLarge("File to be parsed exceeded maximum size")
+            if size == 0:
+                yield cls(b"")
+                return
+            with mmap.mmap(
+                input_file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mapped_file:
+                yield cls(mapped_file)
+
+    def next(self) -> Optional[str]:
+        offset = self._position - self._block_start
+        if 0 <= offset < len(self._block):
+            return self._block[offset]
+        if not self._move_to(self._position):
+            return None
+        return self._block[self._position - self._block_start]
+
+    def read(self) -> Optional[str]:
+        character = self.next()
+        if character is not None:
+            self._position += 1
+        return character
+
+    def position(self) -> int:
+        return self._position
+
+    def to_string(self) -> str:
+        return self._content[self._byte_offset(self._position) :].decode("utf-8")
+
+    def get_reset_point(self) -> StringStreamResetPoint:
+        return StringStreamResetPoint(self._position)
 
     def reset_stream(self, reset_point: ResetPoint) -> None:
-        self._stream.seek(reset_point.get_position())
+        self._position = reset_point.get_position()
+
+    def match_pattern(self, pattern: re.Pattern) -> Optional[re.Match]:
+        """Match ``pattern`` against the decoded block at the current
+        position.  Matches near the edges of the block are matched
+        against a window of the neighbouring blocks as described in
+        ``Stream.match_pattern``."""
+        if self._move_to(self._position):
+            offset = self._position - self._block_start
+            if offset >= PATTERN_LOOKBEHIND_SIZE or self._block_start == 0:
+                found = pattern.match(self._block, offset)
+                is_last_block = (
+                    self._is_complete
+                    and self._block_index == len(self._byte_starts) - 1
+                )
+                if found is not None and (
+                    found.end() < len(self._block) or is_last_block
+                ):
+                    self._position = self._block_start + found.end()
+                    return found
+                if found is None and (
+                    is_last_block or len(self._block) - offset >= PATTERN_WINDOW_SIZE
+                ):
+                    return None
+        required = PATTERN_WINDOW_SIZE
+        while True:
+            window, window_start, is_complete = self._window(
+                max(self._position - PATTERN_LOOKBEHIND_SIZE, 0),
+                self._position + required,
+            )
+            found = pattern.match(window, self._position - window_start)
+            if found is None or found.end() < len(window) or is_complete:
+                break
+            required *= 2
+        if found is not None:
+            self._position = window_start + found.end()
+        return found
+
+    def _window(self, start: int, end: int) -> Tuple[str, int, bool]:
+        """Return the decoded blocks from the one containing ``start``
+        up to at least ``end``, the position of their first character
+        and whether they reach the end of the content."""
+        self._move_to(end)
+        index = bisect_right(self._char_starts, start) - 1
+        window_start = self._char_starts[index]
+        blocks = []
+        while index < len(self._char_starts) - 1 and self._char_starts[index] < end:
+            self._load_block(index)
+            blocks.append(self._block)
+            index += 1
+        is_complete = self._is_complete and index == len(self._char_starts) - 1
+        return "".join(blocks), window_start, is_complete
+
+    def location(self, position: int) -> Tuple[int, int]:
+        """Return line and column of ``position`` like
+        ``sourcemap.find_location_in_indices`` does for a decoded
+        document."""
+        if not self._move_to(position):
+            position = self._char_starts[-1]
+            return (
+                self._linebreaks_before[-1] + 1,
+                position - self._last_linebreak_before[-1] - 1,
+            )
+        offset = position - self._block_start
+        linebreaks = self._linebreaks_before[self._block_index] + self._block.count(
+            "\n", 0, offset
+        )
+        last_linebreak = self._block.rfind("\n", 0, offset)
+        if last_linebreak < 0:
+            last_linebreak = self._last_linebreak_before[self._block_index]
+        else:
+            last_linebreak += self._block_start
+        return linebreaks + 1, position - last_linebreak - 1
+
+    def _byte_offset(self, position: int) -> int:
+        if not self._move_to(position):
+            return self._size
+        offset = position - self._block_start
+        return self._block_byte_start + len(self._block[:offset].encode("utf-8"))
+
+    def _move_to(self, position: int) -> bool:
+        """Make the block containing ``position`` the current block.
+        Returns ``False`` if ``position`` is past the end of the
+        content."""
+        while not self._is_complete and position >= self._char_starts[-1]:
+            self._load_block(len(self._char_starts) - 1)
+        if position >= self._char_starts[-1]:
+            return False
+        index = bisect_right(self._char_starts, position) - 1
+        self._load_block(index)
+        return True
+
+    def _load_block(self, index: int) -> None:
+        try:
+            block = self._cache[index]
+            self._cache.move_to_end(index)
+        except KeyError:
+            block = self._decode_block(index)
+        self._block = block
+        self._block_index = index
+        self._block_start = self._char_starts[index]
+        self._block_byte_start = self._byte_starts[index]
+
+    def _decode_block(self, index: int) -> str:
+        start = self._byte_starts[index]
+        end = min(start + self._block_size, self._size)
+        # Do not split the encoding of a character between blocks.
+        while end < self._size and self._content[end] & 0xC0 == 0x80:
+            end -= 1
+        block = self._content[start:end].decode("utf-8")
+        if index == len(self._byte_starts) - 1 and not self._is_complete:
+            self._char_starts.append(self._char_starts[index] + len(block))
+            self._linebreaks_before.append(
+                self._linebreaks_before[index] + block.count("\n")
+            )
+            last_linebreak = block.rfind("\n")
+            self._last_linebreak_before.append(
+                self._char_starts[index] + last_linebreak
+                if last_linebreak >= 0
+                else self._last_linebreak_before[index]
+            )
+            if end < self._size:
+                self._byte_starts.append(end)
+            else:
+                self._is_complete = True
+        self._cache[index] = block
+        if len(self._cache) > MAPPED_CACHED_BLOCKS:
+            self._cache.popitem(last=False)
+        return block
+
+
+NativeStringStream = extension_stream.StringStream
+Stream.register(NativeStringStream)
+ResetPoint.register(extension_stream.StringStreamResetPoint)
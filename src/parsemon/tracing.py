@@ -0,0 +1,102 @@
+"""Record what a parser does, step by step.
+
+``trace`` sends an event to a sink for every parser that is entered
+or exited and for every reset of the stream in the parser runs that
+are started in its ``with`` block::
+
+    events = []
+    with trace(events):
+        run_parser(json_document(), document)
+
+A sink is a list that the events are appended to, a function that is
+called with every event, a file opened in text mode or the path of a
+file.  Files receive one JSON object per event and line.  Runs outside
+of ``trace`` use the native trampoline and are not slowed down.
+"""
+import json
+import os
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterator, Optional, TextIO
+
+from .internals.instrumentation import Observer, display_name, observe
+
+ENTER = "enter"
+SUCCESS = "success"
+FAILURE = "failure"
+RESET = "reset"
+
+
+@dataclass(frozen=True)
+class TraceEvent:
+    """A step of a parser run.
+
+    ``kind`` is one of ``"enter"``, ``"success"``, ``"failure"`` and
+    ``"reset"``.  Parsers exit with a success or a failure at
+    ``position``.  ``depth`` is the number of parsers that were
+    entered but did not exit yet.  Resets move the stream from
+    ``reset_from`` back to ``position`` and have no parser.
+    """
+
+    kind: str
+    position: int
+    parser: Optional[str] = None
+    depth: int = 0
+    reset_from: Optional[int] = None
+
+
+class Tracer(Observer):
+    """Sends ``TraceEvent`` objects to ``emit``."""
+
+    def __init__(self, emit: Callable[[TraceEvent], None]) -> None:
+        self.emit = emit
+        self.depth = 0
+
+    def enter(self, parser, position: int) -> None:
+        self.emit(TraceEvent(ENTER, position, display_name(parser), self.depth))
+        self.depth += 1
+
+    def exit(self, parser, position: int, parsing_result) -> None:
+        self.depth -= 1
+        self.emit(
+            TraceEvent(
+                FAILURE if parsing_result.is_failure() else SUCCESS,
+                position,
+                display_name(parser),
+                self.depth,
+            )
+        )
+
+    def reset(self, position: int, target: int) -> None:
+        self.emit(TraceEvent(RESET, target, depth=self.depth, reset_from=position))
+
+
+@contextmanager
+def trace(sink) -> Iterator[Tracer]:
+    """Send the events of all parser runs in the ``with`` block to
+    ``sink``."""
+    if isinstance(sink, (str, os.PathLike)):
+        with open(sink, "w") as trace_file:
+            with observe(Tracer(_emit_json_lines(trace_file))) as tracer:
+                yield tracer
+        return
+    if isinstance(sink, list):
+        emit = sink.append
+    elif hasattr(sink, "write"):
+        emit = _emit_json_lines(sink)
+    elif callable(sink):
+        emit = sink
+    else:
+        raise TypeError(
+            "Cannot send trace events to {sink!r}, expected a list, a function, "
+            "a file or a path".format(sink=sink)
+        )
+    with observe(Tracer(emit)) as tracer:
+        yield tracer
+
+
+def _emit_json_lines(trace_file: TextIO) -> Callable[[TraceEvent], None]:
+    def emit(event: TraceEvent) -> None:
+        trace_file.write(json.dumps(asdict(event)) + "\n")
+
+    return emit
@@ -1,74 +1,640 @@
+use pyo3::exceptions::PyTypeError;
+use pyo3::gc::PyVisit;
 use pyo3::prelude::*;
-use pyo3::types::{PyDict, PyString, PyTuple};
+use pyo3::types::PyString;
+use pyo3::PyTraverseError;
+use std::sync::Arc;
 
 use crate::result;
+use crate::stream::Stream;
 use crate::trampoline;
 
 #[pyclass]
 pub struct LiteralParser {
-    expected_string: String,
+    expected_string: Arc<str>,
+    expected_characters: Vec<char>,
+    value: PyObject,
 }
 
 #[pymethods]
 impl LiteralParser {
     #[new]
-    fn new(expected: String) -> Self {
+    fn new(py: Python, expected: String) -> Self {
         LiteralParser {
-            expected_string: expected,
+            expected_characters: expected.chars().collect(),
+            value: PyString::new(py, &expected).into(),
+            expected_string: Arc::from(expected),
         }
     }
 
+    /// The characters a successful parse can start with, `None` if
+    /// the parser also succeeds without consuming input.
+    #[getter]
+    fn first_set(&self) -> Option<CharacterSet> {
+        self.expected_characters
+            .first()
+            .map(|character| CharacterSet::new(&character.to_string()))
+    }
+
     fn __call__(
         &self,
         py: Python,
         stream: PyObject,
         continuation: PyObject,
     ) -> PyResult<trampoline::Call> {
-        let result = self.parse(py, &stream, &continuation)?;
-        Ok(trampoline::Call {
-            function: Some(continuation),
-            args: Some(PyTuple::new(py, &[stream, result.into_py(py)]).into_py(py)),
-            kwargs: Some(PyDict::new(py).into_py(py)),
-        })
+        let result = self.parse(py, stream.as_ref(py))?;
+        Ok(trampoline::Call::positional(
+            py,
+            continuation,
+            (stream, result.into_py(py)),
+        ))
     }
 }
 
 impl LiteralParser {
-    fn parse(
+    fn parse(&self, py: Python, stream: &PyAny) -> PyResult<result::Result> {
+        let mut stream = Stream::new(stream)?;
+        if self.consume_expected(&mut stream)? {
+            Ok(result::success(py, self.value.clone_ref(py)))
+        } else {
+            Ok(result::rejected(
+                result::Reason::Literal {
+                    expected: self.expected_string.clone(),
+                    found: stream.next()?,
+                },
+                stream.position()?,
+            ))
+        }
+    }
+
+    /// Consume the longest prefix of the expected string that is
+    /// found in the stream and report if the whole string was found.
+    fn consume_expected(&self, stream: &mut Stream) -> PyResult<bool> {
+        if let Stream::Native(native_stream) = stream {
+            let mut native_stream = native_stream.try_borrow_mut()?;
+            let matching = native_stream
+                .remaining()
+                .zip(self.expected_characters.iter())
+                .take_while(|(found, expected)| *found == **expected)
+                .count();
+            native_stream.skip(matching);
+            return Ok(matching == self.expected_characters.len());
+        }
+        for expected_character in self.expected_characters.iter() {
+            if stream.next()? == Some(*expected_character) {
+                stream.read()?;
+            } else {
+                return Ok(false);
+            }
+        }
+        Ok(true)
+    }
+}
+
+/// A set of characters that answers membership queries in constant
+/// time for ASCII characters and by binary search for everything
+/// else.  A negated set contains every character except the ones
+/// listed.  Parsers report the characters they can start with as a
+/// `CharacterSet`.
+#[pyclass]
+#[derive(Clone)]
+pub struct CharacterSet {
+    ascii: u128,
+    other: Vec<char>,
+    negated: bool,
+}
+
+#[pymethods]
+impl CharacterSet {
+    #[new]
+    #[args(negated = "false")]
+    fn py_new(characters: &str, negated: bool) -> Self {
+        let characters = CharacterSet::new(characters);
+        if negated {
+            characters.negate()
+        } else {
+            characters
+        }
+    }
+
+    #[getter]
+    fn negated(&self) -> bool {
+        self.negated
+    }
+
+    fn __contains__(&self, character: char) -> bool {
+        self.contains(character)
+    }
+
+    fn __or__(&self, other: PyRef<CharacterSet>) -> CharacterSet {
+        self.union(&other)
+    }
+
+    fn __repr__(&self) -> String {
+        let characters: String = (0u8..128)
+            .map(char::from)
+            .filter(|character| self.ascii & (1u128 << (*character as u32)) != 0)
+            .chain(self.other.iter().copied())
+            .collect();
+        format!("CharacterSet({:?}, negated={})", characters, self.negated)
+    }
+}
+
+impl CharacterSet {
+    pub fn new(characters: &str) -> Self {
+        let mut ascii = 0u128;
+        let mut other = Vec::new();
+        for character in characters.chars() {
+            if character.is_ascii() {
+                ascii |= 1u128 << (character as u32);
+            } else {
+                other.push(character);
+            }
+        }
+        other.sort_unstable();
+        other.dedup();
+        CharacterSet {
+            ascii,
+            other,
+            negated: false,
+        }
+    }
+
+    pub fn negate(mut self) -> Self {
+        self.negated = !self.negated;
+        self
+    }
+
+    pub fn contains(&self, character: char) -> bool {
+        self.contains_listed(character) != self.negated
+    }
+
+    fn contains_listed(&self, character: char) -> bool {
+        if character.is_ascii() {
+            self.ascii & (1u128 << (character as u32)) != 0
+        } else {
+            self.other.binary_search(&character).is_ok()
+        }
+    }
+
+    pub fn union(&self, other: &CharacterSet) -> CharacterSet {
+        match (self.negated, other.negated) {
+            (false, false) => {
+                let mut listed: Vec<char> = self
+                    .other
+                    .iter()
+                    .chain(other.other.iter())
+                    .copied()
+                    .collect();
+                listed.sort_unstable();
+                listed.dedup();
+                CharacterSet {
+                    ascii: self.ascii | other.ascii,
+                    other: listed,
+                    negated: false,
+                }
+            }
+            (true, true) => CharacterSet {
+                ascii: self.ascii & other.ascii,
+                other: self
+                    .other
+                    .iter()
+                    .copied()
+                    .filter(|character| other.contains_listed(*character))
+                    .collect(),
+                negated: true,
+            },
+            (false, true) => other.without(self),
+            (true, false) => self.without(other),
+        }
+    }
+
+    /// The negated set of all characters that are neither listed in
+    /// `self` nor in `other`.
+    fn without(&self, other: &CharacterSet) -> CharacterSet {
+        CharacterSet {
+            ascii: self.ascii & !other.ascii,
+            other: self
+                .other
+                .iter()
+                .copied()
+                .filter(|character| !other.contains_listed(*character))
+                .collect(),
+            negated: true,
+        }
+    }
+}
+
+#[pyclass]
+pub struct OneOfParser {
+    characters: CharacterSet,
+    expected: Arc<str>,
+}
+
+#[pymethods]
+impl OneOfParser {
+    #[new]
+    fn new(expected: String) -> Self {
+        OneOfParser {
+            characters: CharacterSet::new(&expected),
+            expected: Arc::from(expected),
+        }
+    }
+
+    #[getter]
+    fn first_set(&self) -> CharacterSet {
+        self.characters.clone()
+    }
+
+    fn __call__(
         &self,
         py: Python,
-        stream: &PyObject,
-        _continuation: &PyObject,
-    ) -> PyResult<result::Result> {
-        for expected_character in self.expected_string.chars().map(|c| c.to_string()) {
-            let next_character = stream
-                .call_method(py, "next", (), None)?
-                .into_ref(py)
-                .str()?
-                .to_str()?;
-            if expected_character == next_character {
-                stream.call_method(py, "read", (), None)?;
-            } else {
-                let position = stream.call_method(py, "position", (), None)?;
-                return Ok(result::failure(
-                    py,
-                    format!(
-                        "Expected `{}` but found `{}`.",
-                        &self.expected_string, next_character
-                    ),
-                    position.extract(py)?,
-                ));
+        stream: PyObject,
+        continuation: PyObject,
+    ) -> PyResult<trampoline::Call> {
+        let result = self.parse(py, stream.as_ref(py))?;
+        Ok(trampoline::Call::positional(
+            py,
+            continuation,
+            (stream, result.into_py(py)),
+        ))
+    }
+}
+
+impl OneOfParser {
+    fn parse(&self, py: Python, stream: &PyAny) -> PyResult<result::Result> {
+        let mut input = Stream::new(stream)?;
+        Ok(
+            match consume_if(&mut input, |character| self.characters.contains(character))? {
+                Ok(character) => result::success(py, character_to_python(py, character)),
+                Err(found) => result::rejected(
+                    result::Reason::OneOf {
+                        expected: self.expected.clone(),
+                        found,
+                    },
+                    input.position()?,
+                ),
+            },
+        )
+    }
+}
+
+#[pyclass]
+pub struct NoneOfParser {
+    characters: CharacterSet,
+    forbidden: Arc<str>,
+}
+
+#[pymethods]
+impl NoneOfParser {
+    #[new]
+    fn new(forbidden: String) -> Self {
+        NoneOfParser {
+            characters: CharacterSet::new(&forbidden).negate(),
+            forbidden: Arc::from(forbidden),
+        }
+    }
+
+    #[getter]
+    fn first_set(&self) -> CharacterSet {
+        self.characters.clone()
+    }
+
+    fn __call__(
+        &self,
+        py: Python,
+        stream: PyObject,
+        continuation: PyObject,
+    ) -> PyResult<trampoline::Call> {
+        let result = self.parse(py, stream.as_ref(py))?;
+        Ok(trampoline::Call::positional(
+            py,
+            continuation,
+            (stream, result.into_py(py)),
+        ))
+    }
+}
+
+impl NoneOfParser {
+    fn parse(&self, py: Python, stream: &PyAny) -> PyResult<result::Result> {
+        let mut input = Stream::new(stream)?;
+        Ok(
+            match consume_if(&mut input, |character| self.characters.contains(character))? {
+                Ok(character) => result::success(py, character_to_python(py, character)),
+                Err(found) => result::rejected(
+                    result::Reason::NoneOf {
+                        forbidden: self.forbidden.clone(),
+                        found,
+                    },
+                    input.position()?,
+                ),
+            },
+        )
+    }
+}
+
+#[pyclass]
+pub struct CharacterParser {
+    count: usize,
+}
+
+#[pymethods]
+impl CharacterParser {
+    #[new]
+    #[args(count = "1")]
+    fn new(count: usize) -> Self {
+        CharacterParser { count }
+    }
+
+    #[getter]
+    fn first_set(&self) -> Option<CharacterSet> {
+        if self.count > 0 {
+            Some(CharacterSet::new("").negate())
+        } else {
+            None
+        }
+    }
+
+    fn __call__(
+        &self,
+        py: Python,
+        stream: PyObject,
+        continuation: PyObject,
+    ) -> PyResult<trampoline::Call> {
+        let result = self.parse(py, stream.as_ref(py))?;
+        Ok(trampoline::Call::positional(
+            py,
+            continuation,
+            (stream, result.into_py(py)),
+        ))
+    }
+}
+
+impl CharacterParser {
+    fn parse(&self, py: Python, stream: &PyAny) -> PyResult<result::Result> {
+        let mut input = Stream::new(stream)?;
+        let mut characters = String::with_capacity(self.count);
+        let mut read_count = 0;
+        while read_count < self.count {
+            match input.read()? {
+                Some(character) => characters.push(character),
+                None => break,
             }
+            read_count += 1;
         }
-        Ok(result::success(
+        Ok(if read_count < self.count {
+            result::rejected(result::Reason::Character, input.position()?)
+        } else {
+            result::success(py, PyString::new(py, &characters).into())
+        })
+    }
+}
+
+#[pyclass]
+pub struct EndOfFileParser {}
+
+#[pymethods]
+impl EndOfFileParser {
+    #[new]
+    fn new() -> Self {
+        EndOfFileParser {}
+    }
+
+    #[getter]
+    fn first_set(&self) -> Option<CharacterSet> {
+        None
+    }
+
+    fn __call__(
+        &self,
+        py: Python,
+        stream: PyObject,
+        continuation: PyObject,
+    ) -> PyResult<trampoline::Call> {
+        let result = self.parse(py, stream.as_ref(py))?;
+        Ok(trampoline::Call::positional(
             py,
-            PyObject::from(PyString::new(py, &self.expected_string)),
+            continuation,
+            (stream, result.into_py(py)),
         ))
     }
 }
 
+impl EndOfFileParser {
+    fn parse(&self, py: Python, stream: &PyAny) -> PyResult<result::Result> {
+        let input = Stream::new(stream)?;
+        Ok(match input.next()? {
+            None => result::success(py, py.None()),
+            Some(found) => result::rejected(result::Reason::EndOfFile { found }, input.position()?),
+        })
+    }
+}
+
+enum CharacterTest {
+    Set(CharacterSet),
+    Predicate(PyObject),
+}
+
+/// Consume the longest run of characters that pass a test in one step
+/// and return it as a single string.
+#[pyclass]
+pub struct SpanParser {
+    test: CharacterTest,
+    negate: bool,
+    minimum: usize,
+    collect: bool,
+    description: Arc<str>,
+}
+
+#[pymethods]
+impl SpanParser {
+    #[new]
+    #[args(minimum = "0", collect = "true", negate = "false")]
+    fn new(characters: &PyAny, minimum: usize, collect: bool, negate: bool) -> PyResult<Self> {
+        let (test, description) = if let Ok(characters) = characters.downcast::<PyString>() {
+            let characters = characters.to_str()?;
+            (
+                CharacterTest::Set(CharacterSet::new(characters)),
+                format!("one of `{}`", characters),
+            )
+        } else if characters.is_callable() {
+            (
+                CharacterTest::Predicate(characters.into()),
+                format!("satisfying {}", characters.repr()?.to_str()?),
+            )
+        } else {
+            return Err(PyTypeError::new_err(
+                "Expected a string of characters or a predicate",
+            ));
+        };
+        Ok(SpanParser {
+            test,
+            negate,
+            minimum,
+            collect,
+            description: Arc::from(if negate {
+                format!("not {}", description)
+            } else {
+                description
+            }),
+        })
+    }
+
+    fn __call__(
+        &self,
+        py: Python,
+        stream: PyObject,
+        continuation: PyObject,
+    ) -> PyResult<trampoline::Call> {
+        let result = self.parse(py, stream.as_ref(py))?;
+        Ok(trampoline::Call::positional(
+            py,
+            continuation,
+            (stream, result.into_py(py)),
+        ))
+    }
+
+    #[getter]
+    fn first_set(&self) -> Option<CharacterSet> {
+        match &self.test {
+            CharacterTest::Set(characters) if self.minimum > 0 => Some(if self.negate {
+                characters.clone().negate()
+            } else {
+                characters.clone()
+            }),
+            _ => None,
+        }
+    }
+
+    fn __traverse__(&self, visit: PyVisit) -> std::result::Result<(), PyTraverseError> {
+        if let CharacterTest::Predicate(predicate) = &self.test {
+            visit.call(predicate)?;
+        }
+        Ok(())
+    }
+}
+
+impl SpanParser {
+    fn accepts(&self, py: Python, character: char) -> PyResult<bool> {
+        let passed = match &self.test {
+            CharacterTest::Set(characters) => characters.contains(character),
+            CharacterTest::Predicate(predicate) => predicate
+                .call1(py, (character_to_python(py, character),))?
+                .is_true(py)?,
+        };
+        Ok(passed != self.negate)
+    }
+
+    fn parse(&self, py: Python, stream: &PyAny) -> PyResult<result::Result> {
+        let mut input = Stream::new(stream)?;
+        let mut span = String::new();
+        let mut count = 0;
+        let mut scanned = false;
+        if let CharacterTest::Set(characters) = &self.test {
+            if let Stream::Native(native_stream) = &input {
+                let mut native_stream = native_stream.try_borrow_mut()?;
+                let accepted = native_stream
+                    .remaining()
+                    .take_while(|character| characters.contains(*character) != self.negate);
+                if self.collect {
+                    span = accepted.collect();
+                    count = span.chars().count();
+                } else {
+                    count = accepted.count();
+                }
+                native_stream.skip(count);
+                scanned = true;
+            }
+        }
+        if !scanned {
+            while let Some(character) = input.next()? {
+                if !self.accepts(py, character)? {
+                    break;
+                }
+                input.read()?;
+                count += 1;
+                if self.collect {
+                    span.push(character);
+                }
+            }
+        }
+        if count < self.minimum {
+            return Ok(result::rejected(
+                result::Reason::Span {
+                    description: self.description.clone(),
+                    found: input.next()?,
+                },
+                input.position()?,
+            ));
+        }
+        if self.collect {
+            Ok(result::success(py, PyString::new(py, &span).into()))
+        } else {
+            Ok(result::success(py, py.None()))
+        }
+    }
+}
+
+/// Consume the next character if it is accepted.  Otherwise the
+/// character that was found is returned as the error, `None` meaning
+/// the end of the input.
+fn consume_if<F>(
+    stream: &mut Stream,
+    accept: F,
+) -> PyResult<std::result::Result<char, Option<char>>>
+where
+    F: Fn(char) -> bool,
+{
+    match stream.next()? {
+        Some(character) if accept(character) => {
+            stream.read()?;
+            Ok(Ok(character))
+        }
+        found => Ok(Err(found)),
+    }
+}
+
+fn character_to_python(py: Python, character: char) -> PyObject {
+    let mut buffer = [0u8; 4];
+    PyString::new(py, character.encode_utf8(&mut buffer)).into()
+}
+
+/// Run a native primitive parser directly on `stream` without going
+/// through the trampoline.  Returns `None` if `parser` is not one of
+/// the primitives defined in this module.
+pub fn parse_native(
+    py: Python,
+    parser: &PyAny,
+    stream: &PyAny,
+) -> PyResult<Option<result::Result>> {
+    macro_rules! parse_as {
+        ($($parser_type:ty),*) => {
+            $(
+                if let Ok(parser) = parser.downcast::<PyCell<$parser_type>>() {
+                    return Ok(Some(parser.borrow().parse(py, stream)?));
+                }
+            )*
+        };
+    }
+    parse_as!(
+        LiteralParser,
+        OneOfParser,
+        NoneOfParser,
+        SpanParser,
+        CharacterParser,
+        EndOfFileParser
+    );
+    Ok(None)
+}
+
 pub fn initialize_module(module: &PyModule) -> PyResult<()> {
+    module.add_class::<CharacterSet>()?;
     module.add_class::<LiteralParser>()?;
+    module.add_class::<OneOfParser>()?;
+    module.add_class::<NoneOfParser>()?;
+    module.add_class::<CharacterParser>()?;
+    module.add_class::<EndOfFileParser>()?;
+    module.add_class::<SpanParser>()?;
     Ok(())
 }
 
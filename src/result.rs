@@ -2,16 +2,134 @@ use pyo3::gc::PyVisit;
 use pyo3::prelude::*;
 use pyo3::wrap_pyfunction;
 use pyo3::PyTraverseError;
+use std::sync::Arc;
+
+/// Why a parser failed.  Most failures are discarded by choices, so
+/// only the arguments are stored and the message is rendered when it
+/// is read.
+#[derive(Clone, PartialEq)]
+pub enum Reason {
+    Message(Arc<str>),
+    Expected(Arc<str>),
+    Literal {
+        expected: Arc<str>,
+        found: Option<char>,
+    },
+    OneOf {
+        expected: Arc<str>,
+        found: Option<char>,
+    },
+    NoneOf {
+        forbidden: Arc<str>,
+        found: Option<char>,
+    },
+    Character,
+    EndOfFile {
+        found: char,
+    },
+    Span {
+        description: Arc<str>,
+        found: Option<char>,
+    },
+}
+
+impl Reason {
+    pub fn render(&self) -> String {
+        match self {
+            Reason::Message(message) => message.to_string(),
+            Reason::Expected(expected) => format!("Expected {}", expected),
+            Reason::Literal { expected, found } => format!(
+                "Expected `{}` but found `{}`.",
+                expected,
+                display_character(*found)
+            ),
+            Reason::OneOf { expected, found } => format!(
+                "Expected one of `{}` but found {}",
+                expected,
+                display_character(*found)
+            ),
+            Reason::NoneOf {
+                forbidden,
+                found: None,
+            } => format!(
+                "Expected any char except `{}` but found end of string",
+                forbidden
+            ),
+            Reason::NoneOf {
+                forbidden,
+                found: Some(found),
+            } => format!(
+                "Expected anything except one of `{}` but found {}",
+                forbidden, found
+            ),
+            Reason::Character => String::from("Expected character but found end of string"),
+            Reason::EndOfFile { found } => {
+                format!("Expected end-of-file but found `{}`", found)
+            }
+            Reason::Span { description, found } => format!(
+                "Expected a character {} but found {}",
+                description,
+                display_character(*found)
+            ),
+        }
+    }
+}
+
+/// A `Reason` that python parsers create once and attach to every
+/// failure they report with `rejected`, so that failing does not
+/// format or copy a message.
+#[pyclass(name = "Reason")]
+#[derive(Clone)]
+pub struct PyReason {
+    reason: Reason,
+}
+
+#[pymethods]
+impl PyReason {
+    /// Fail with the message `message`.
+    #[staticmethod]
+    fn message(message: &str) -> Self {
+        PyReason {
+            reason: Reason::Message(Arc::from(message)),
+        }
+    }
+
+    /// Fail with the message `Expected <expected>`.
+    #[staticmethod]
+    fn expected(expected: &str) -> Self {
+        PyReason {
+            reason: Reason::Expected(Arc::from(expected)),
+        }
+    }
+
+    fn __str__(&self) -> String {
+        self.reason.render()
+    }
+}
+
+fn display_character(character: Option<char>) -> String {
+    match character {
+        Some(character) => character.to_string(),
+        None => String::from("end of string"),
+    }
+}
 
 #[pyclass]
 #[derive(Clone)]
 pub struct Failure {
-    #[pyo3(get)]
-    message: String,
+    reason: Reason,
     #[pyo3(get)]
     position: usize,
 }
 
+#[pymethods]
+impl Failure {
+    #[getter]
+    fn message(&self) -> String {
+        self.reason.render()
+    }
+}
+
 #[pyclass]
 #[derive(Clone)]
 pub struct Result {
@@ -59,20 +177,67 @@ impl Result {
     }
 
     fn __add__(&self, rhs: Result) -> PyResult<Result> {
+        Ok(self.combine(rhs))
+    }
+
+    /// Like `+`, but only keep the failures at the farthest position,
+    /// at most `limit` of them.
+    #[pyo3(name = "merge_farthest")]
+    fn py_merge_farthest(&self, rhs: Result, limit: usize) -> Result {
+        self.merge_farthest(rhs, limit)
+    }
+}
+
+impl Result {
+    /// Combine the results of two alternatives.  If both failed, the
+    /// failures of both are kept, otherwise the successful result
+    /// wins.
+    pub fn combine(&self, rhs: Result) -> Result {
         if self.is_failure() {
             if rhs.is_failure() {
-                let mut failures = Vec::new();
-                failures.append(&mut self.failures.iter().cloned().collect());
-                failures.append(&mut rhs.failures.iter().cloned().collect());
-                Ok(Result {
+                let mut failures = self.failures.clone();
+                failures.extend(rhs.failures);
+                Result {
                     value: None,
                     failures,
-                })
+                }
             } else {
-                Ok(rhs)
+                rhs
             }
         } else {
-            Ok(self.clone())
+            self.clone()
+        }
+    }
+
+    /// Combine the results of two alternatives like `combine`, but
+    /// keep only the distinct failures that got farthest into the
+    /// input, at most `limit` of them.
+    pub fn merge_farthest(&self, rhs: Result, limit: usize) -> Result {
+        if !self.is_failure() || !rhs.is_failure() {
+            return self.combine(rhs);
+        }
+        let limit = limit.max(1);
+        let farthest = self
+            .failures
+            .iter()
+            .chain(rhs.failures.iter())
+            .map(|failure| failure.position)
+            .max()
+            .unwrap_or(0);
+        let mut failures: Vec<Failure> = Vec::with_capacity(limit.min(4));
+        for failure in self.failures.iter().chain(rhs.failures.iter()) {
+            if failures.len() >= limit {
+                break;
+            }
+            if failure.position == farthest
+                && !failures.iter().any(|kept| kept.reason == failure.reason)
+            {
+                failures.push(failure.clone());
+            }
+        }
+        Result {
+            value: None,
+            failures,
         }
     }
 }
@@ -87,15 +252,29 @@ pub fn success<'p>(_python: Python<'p>, value: PyObject) -> Result {
 
 #[pyfunction]
 pub fn failure<'p>(_python: Python<'p>, message: String, position: usize) -> Result {
+    rejected(Reason::Message(Arc::from(message)), position)
+}
+
+/// A failure at `position` for a reason that was created beforehand.
+#[pyfunction]
+#[pyo3(name = "rejected")]
+pub fn py_rejected<'p>(_python: Python<'p>, reason: PyRef<PyReason>, position: usize) -> Result {
+    rejected(reason.reason.clone(), position)
+}
+
+/// A failure whose message is rendered from `reason` when it is read.
+pub fn rejected(reason: Reason, position: usize) -> Result {
     Result {
         value: None,
-        failures: vec![Failure { message, position }],
+        failures: vec![Failure { reason, position }],
     }
 }
 
 pub fn initialize_module(module: &PyModule) -> PyResult<()> {
     module.add_function(wrap_pyfunction!(success, module)?)?;
     module.add_function(wrap_pyfunction!(failure, module)?)?;
+    module.add_function(wrap_pyfunction!(py_rejected, module)?)?;
+    module.add_class::<PyReason>()?;
     module.add_class::<Failure>()?;
     module.add_class::<Result>()?;
     Ok(())
@@ -0,0 +1,276 @@
+use pyo3::prelude::*;
+use pyo3::type_object::PyTypeInfo;
+use pyo3::types::{PyString, PyType};
+
+#[pyclass]
+#[derive(Clone)]
+pub struct StringStreamResetPoint {
+    position: usize,
+}
+
+#[pymethods]
+impl StringStreamResetPoint {
+    fn destroy(&self) {}
+
+    fn get_position(&self) -> usize {
+        self.position
+    }
+}
+
+/// The characters of a string, stored with the smallest code unit that
+/// holds every one of them, like python stores its strings.  ASCII
+/// and latin-1 text takes one byte per character and every character
+/// can still be read by its index.
+enum Characters {
+    Narrow(Box<[u8]>),
+    Wide(Box<[u16]>),
+    Full(Box<[char]>),
+}
+
+impl Characters {
+    fn new(content: &str) -> Self {
+        let maximum = content.chars().map(u32::from).max().unwrap_or(0);
+        if maximum < 0x100 {
+            Characters::Narrow(content.chars().map(|character| character as u8).collect())
+        } else if maximum < 0x10000 {
+            Characters::Wide(content.chars().map(|character| character as u16).collect())
+        } else {
+            Characters::Full(content.chars().collect())
+        }
+    }
+
+    fn len(&self) -> usize {
+        match self {
+            Characters::Narrow(units) => units.len(),
+            Characters::Wide(units) => units.len(),
+            Characters::Full(characters) => characters.len(),
+        }
+    }
+
+    fn get(&self, index: usize) -> Option<char> {
+        match self {
+            Characters::Narrow(units) => units.get(index).map(|unit| char::from(*unit)),
+            Characters::Wide(units) => units
+                .get(index)
+                .and_then(|unit| char::from_u32(u32::from(*unit))),
+            Characters::Full(characters) => characters.get(index).copied(),
+        }
+    }
+}
+
+/// A stream over a python string.  The string itself is kept to match
+/// regular expressions against it, native primitives read the
+/// characters from a compact copy.
+#[pyclass]
+pub struct StringStream {
+    source: Py<PyString>,
+    content: Characters,
+    position: usize,
+}
+
+#[pymethods]
+impl StringStream {
+    #[new]
+    #[args(position = "0")]
+    fn new(content: &PyString, position: usize) -> PyResult<Self> {
+        let characters = Characters::new(content.to_str()?);
+        let position = position.min(characters.len());
+        Ok(StringStream {
+            source: content.into(),
+            content: characters,
+            position,
+        })
+    }
+
+    #[classmethod]
+    fn from_string(_cls: &PyType, content: &PyString) -> PyResult<Self> {
+        StringStream::new(content, 0)
+    }
+
+    #[pyo3(name = "next")]
+    fn py_next(&self) -> Option<String> {
+        self.peek().map(String::from)
+    }
+
+    #[pyo3(name = "read")]
+    fn py_read(&mut self) -> Option<String> {
+        self.advance().map(String::from)
+    }
+
+    #[pyo3(name = "position")]
+    fn py_position(&self) -> usize {
+        self.position
+    }
+
+    #[pyo3(name = "to_string")]
+    fn py_to_string(&self) -> String {
+        self.remaining().collect()
+    }
+
+    fn get_reset_point(&self) -> StringStreamResetPoint {
+        StringStreamResetPoint {
+            position: self.position,
+        }
+    }
+
+    /// Match a compiled regular expression against the underlying
+    /// string at the current position and advance the stream past
+    /// the match.
+    fn match_pattern(&mut self, py: Python, pattern: &PyAny) -> PyResult<PyObject> {
+        let found = pattern.call_method1("match", (self.source.clone_ref(py), self.position))?;
+        if !found.is_none() {
+            let end = found.call_method0("end")?.extract()?;
+            self.seek(end);
+        }
+        Ok(found.into())
+    }
+
+    fn reset_stream(&mut self, reset_point: &PyAny) -> PyResult<()> {
+        let position = if StringStreamResetPoint::is_type_of(reset_point) {
+            reset_point
+                .downcast::<PyCell<StringStreamResetPoint>>()?
+                .borrow()
+                .position
+        } else {
+            reset_point.call_method0("get_position")?.extract()?
+        };
+        self.seek(position);
+        Ok(())
+    }
+}
+
+impl StringStream {
+    pub fn peek(&self) -> Option<char> {
+        self.content.get(self.position).copied()
+    }
+
+    pub fn advance(&mut self) -> Option<char> {
+        let character = self.peek();
+        if character.is_some() {
+            self.position += 1;
+        }
+        character
+    }
+
+    pub fn remaining(&self) -> impl Iterator<Item = char> + '_ {
+        (self.position..self.content.len()).filter_map(move |index| self.content.get(index))
+    }
+
+    pub fn skip(&mut self, count: usize) {
+        self.seek(self.position + count);
+    }
+
+    pub fn seek(&mut self, position: usize) {
+        self.position = position.min(self.content.len());
+    }
+}
+
+/// A reset point as seen from native code.  Reset points of the
+/// native `StringStream` are plain positions, every other stream
+/// hands out python objects that we have to keep around.
+pub enum ResetPoint {
+    Native(usize),
+    Foreign(PyObject),
+}
+
+/// Access to an arbitrary python stream from native code.  The
+/// native `StringStream` is read directly, every other
+/// implementation of the `Stream` ABC is accessed through its python
+/// methods.  The native stream is only borrowed for the duration of a
+/// single operation, so python code called in between, e.g. the
+/// predicate of a span, can use the stream as well.
+pub enum Stream<'p> {
+    Native(&'p PyCell<StringStream>),
+    Foreign(&'p PyAny),
+}
+
+impl<'p> Stream<'p> {
+    pub fn new(stream: &'p PyAny) -> PyResult<Self> {
+        if StringStream::is_type_of(stream) {
+            Ok(Stream::Native(stream.downcast::<PyCell<StringStream>>()?))
+        } else {
+            Ok(Stream::Foreign(stream))
+        }
+    }
+
+    pub fn next(&self) -> PyResult<Option<char>> {
+        match self {
+            Stream::Native(stream) => Ok(stream.try_borrow()?.peek()),
+            Stream::Foreign(stream) => first_character(stream.call_method0("next")?),
+        }
+    }
+
+    pub fn read(&mut self) -> PyResult<Option<char>> {
+        match self {
+            Stream::Native(stream) => Ok(stream.try_borrow_mut()?.advance()),
+            Stream::Foreign(stream) => first_character(stream.call_method0("read")?),
+        }
+    }
+
+    pub fn position(&self) -> PyResult<usize> {
+        match self {
+            Stream::Native(stream) => Ok(stream.try_borrow()?.position),
+            Stream::Foreign(stream) => stream.call_method0("position")?.extract(),
+        }
+    }
+
+    pub fn get_reset_point(&self) -> PyResult<ResetPoint> {
+        match self {
+            Stream::Native(stream) => Ok(ResetPoint::Native(stream.try_borrow()?.position)),
+            Stream::Foreign(stream) => Ok(ResetPoint::Foreign(
+                stream.call_method0("get_reset_point")?.into(),
+            )),
+        }
+    }
+
+    pub fn reset_stream(&mut self, py: Python, reset_point: &ResetPoint) -> PyResult<()> {
+        match (self, reset_point) {
+            (Stream::Native(stream), ResetPoint::Native(position)) => {
+                stream.try_borrow_mut()?.seek(*position);
+                Ok(())
+            }
+            (Stream::Native(stream), ResetPoint::Foreign(reset_point)) => {
+                let position = reset_point.call_method0(py, "get_position")?.extract(py)?;
+                stream.try_borrow_mut()?.seek(position);
+                Ok(())
+            }
+            (Stream::Foreign(stream), ResetPoint::Foreign(reset_point)) => {
+                stream.call_method1("reset_stream", (reset_point.clone_ref(py),))?;
+                Ok(())
+            }
+            (Stream::Foreign(stream), ResetPoint::Native(position)) => {
+                let reset_point = Py::new(
+                    py,
+                    StringStreamResetPoint {
+                        position: *position,
+                    },
+                )?;
+                stream.call_method1("reset_stream", (reset_point,))?;
+                Ok(())
+            }
+        }
+    }
+}
+
+impl ResetPoint {
+    pub fn destroy(self, py: Python) -> PyResult<()> {
+        if let ResetPoint::Foreign(reset_point) = self {
+            reset_point.call_method0(py, "destroy")?;
+        }
+        Ok(())
+    }
+}
+
+fn first_character(character: &PyAny) -> PyResult<Option<char>> {
+    if character.is_none() {
+        Ok(None)
+    } else {
+        Ok(character.extract::<&str>()?.chars().next())
+    }
+}
+
+pub fn initialize_module(module: &PyModule) -> PyResult<()> {
+    module.add_class::<StringStream>()?;
+    module.add_class::<StringStreamResetPoint>()?;
+    Ok(())
+}
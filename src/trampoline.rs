@@ -1,37 +1,42 @@
 use pyo3::exceptions::PyException;
 use pyo3::gc::PyVisit;
 use pyo3::prelude::*;
-use pyo3::type_object::PyTypeInfo;
 use pyo3::types::{PyDict, PyTuple};
 use pyo3::wrap_pyfunction;
 use pyo3::PyTraverseError;
 
-#[pyclass]
-#[derive(Clone)]
+/// A pending call in the trampoline.  Parsemon itself only ever
+/// passes positional arguments, so no keyword dictionary is allocated
+/// unless keyword arguments are actually given.  The function and
+/// the positional arguments are readable from python so that python
+/// code can observe the calls that it bounces.
+#[pyclass(freelist = 1024)]
 pub struct Call {
+    #[pyo3(get)]
     pub function: Option<PyObject>,
-    pub args: Option<PyObject>,
-    pub kwargs: Option<PyObject>,
+    #[pyo3(get)]
+    pub args: Option<Py<PyTuple>>,
+    pub kwargs: Option<Py<PyDict>>,
 }
 
 #[pymethods]
 impl Call {
     #[new]
     #[args(args = "*", kwargs = "**")]
-    fn new(
-        py: Python,
-        function: PyObject,
-        args: &PyTuple,
-        kwargs: Option<&PyDict>,
-    ) -> PyResult<Self> {
-        Ok(Self {
+    fn new(function: PyObject, args: &PyTuple, kwargs: Option<&PyDict>) -> Self {
+        Self {
             function: Some(function),
-            args: Some(args.to_object(py)),
-            kwargs: match kwargs {
-                Some(dict) => Some(dict.to_object(py)),
-                None => Some(PyDict::new(py).to_object(py)),
-            },
-        })
+            args: Some(args.into()),
+            kwargs: kwargs.filter(|dict| !dict.is_empty()).map(Py::from),
+        }
+    }
+
+    /// Perform the pending call and return whatever the called
+    /// function returned.  This lets python code drive a trampoline
+    /// that it has to suspend.
+    #[pyo3(name = "invoke")]
+    fn py_invoke(&self, py: Python) -> PyResult<PyObject> {
+        self.invoke(py)
     }
 
     fn __traverse__(&self, visit: PyVisit) -> std::result::Result<(), PyTraverseError> {
@@ -55,35 +60,43 @@ impl Call {
 }
 
 impl Call {
-    fn get_args<'py>(&'py self, py: Python<'py>) -> PyResult<&'py PyTuple> {
-        match &self.args {
-            Some(args) => args.extract(py),
-            None => Err(PyException::new_err(
-                "Could not get arguments for trampoline call",
-            )),
+    /// Construct a call that only takes positional arguments.  This
+    /// is what native parsers use to invoke their continuations.
+    pub fn positional(py: Python, function: PyObject, args: impl IntoPy<Py<PyTuple>>) -> Self {
+        Self {
+            function: Some(function),
+            args: Some(args.into_py(py)),
+            kwargs: None,
         }
     }
-    fn get_kwargs<'py>(&'py self, py: Python<'py>) -> PyResult<&'py PyDict> {
+
+    fn invoke(&self, py: Python) -> PyResult<PyObject> {
+        let function = match &self.function {
+            Some(function) => function,
+            None => {
+                return Err(PyException::new_err(
+                    "Could not get function for trampoline call",
+                ))
+            }
+        };
+        let args = match &self.args {
+            Some(args) => args.as_ref(py),
+            None => {
+                return Err(PyException::new_err(
+                    "Could not get arguments for trampoline call",
+                ))
+            }
+        };
         match &self.kwargs {
-            Some(kwargs) => kwargs.extract(py),
-            None => Err(PyException::new_err(
-                "Could not get keyword arguments for trampoline call",
-            )),
-        }
-    }
-    fn get_function(&self) -> PyResult<&PyObject> {
-        match &self.function {
-            Some(function) => Ok(function),
-            None => Err(PyException::new_err(
-                "Could not get function for trampoline call",
-            )),
+            Some(kwargs) => function.call(py, args, Some(kwargs.as_ref(py))),
+            None => function.call1(py, args),
         }
     }
 }
 
-#[pyclass]
-#[derive(Clone)]
+#[pyclass(freelist = 1024)]
 pub struct Result {
+    #[pyo3(get)]
     value: Option<PyObject>,
 }
 
@@ -106,6 +119,21 @@ impl Result {
     }
 }
 
+/// Invoke pending calls until an object that is not a `Call` is
+/// returned and hand back that object.
+pub fn bounce(py: Python, mut object: PyObject) -> PyResult<PyObject> {
+    loop {
+        // The returned object is owned by us, so bouncing does not
+        // grow the GIL pool and the call object goes back to the
+        // freelist as soon as it was invoked.
+        let next_object = match object.as_ref(py).downcast::<PyCell<Call>>() {
+            Ok(call) => call.borrow().invoke(py)?,
+            Err(_) => return Ok(object),
+        };
+        object = next_object;
+    }
+}
+
 #[pyfunction(args = "*", kwargs = "**")]
 fn with_trampoline(
     py: Python,
@@ -113,15 +141,12 @@ fn with_trampoline(
     args: &PyTuple,
     kwargs: Option<&PyDict>,
 ) -> PyResult<PyObject> {
-    let mut object = trampoline.call(args, kwargs)?;
-    while Call::is_type_of(object) {
-        let call_object = object.extract::<Call>()?;
-        let function = call_object.get_function()?;
-        let args = call_object.get_args(py)?;
-        let kwargs = call_object.get_kwargs(py)?;
-        object = function.call(py, args, Some(kwargs))?.into_ref(py);
+    let object = bounce(py, trampoline.call(args, kwargs)?.into())?;
+    let result = object.as_ref(py).downcast::<PyCell<Result>>()?.borrow();
+    match &result.value {
+        Some(value) => Ok(value.clone_ref(py)),
+        None => Ok(py.None()),
     }
-    Ok(object.extract::<Result>()?.value.unwrap())
 }
 
 pub fn initialize_trampoline(module: &PyModule) -> PyResult<()> {
@@ -0,0 +1,530 @@
+use pyo3::exceptions::PyValueError;
+use pyo3::gc::PyVisit;
+use pyo3::prelude::*;
+use pyo3::types::PyList;
+use pyo3::PyTraverseError;
+use std::sync::Arc;
+
+use crate::primitives;
+use crate::result;
+use crate::stream::{ResetPoint, Stream};
+use crate::trampoline;
+
+/// A single instruction of a compiled parser.  Parsers push their
+/// value onto the value stack when they succeed.  When a parser fails,
+/// the machine unwinds the frame stack until it finds a frame that
+/// handles the failure.
+enum Instruction {
+    /// Run a native primitive parser directly.
+    Match(PyObject),
+    /// Run an arbitrary parser through a nested trampoline.
+    Call(PyObject),
+    /// Push a constant value.
+    Push(PyObject),
+    /// Discard the topmost value.
+    Pop,
+    /// Replace the topmost value with the result of calling a python
+    /// function with it.
+    Map(PyObject),
+    /// Call a python function with the topmost value and run the
+    /// parser it returns.
+    Bind(PyObject),
+    /// Fail with a message.
+    Fail(Arc<str>),
+    /// Continue at the given address if the following parser fails.
+    Choice(usize),
+    /// The first alternative of a choice succeeded, skip the second.
+    Commit(usize),
+    /// The second alternative of a choice succeeded.
+    EndChoice,
+    /// Reset the stream if the following parser fails.
+    Mark,
+    /// The parser protected by `Mark` succeeded.
+    Release,
+    /// Reset the stream if the following parser succeeds.
+    LookAhead,
+    /// The parser protected by `LookAhead` succeeded.
+    Rewind,
+    /// Start one more iteration of a loop.  If it fails, reset the
+    /// stream and continue at the given address.
+    Repeat(usize),
+    /// The current iteration of a loop succeeded, continue at the
+    /// given address.
+    Iterate(usize),
+    /// Push an empty list.
+    NewList,
+    /// Append the topmost value to the list below it.
+    Append,
+    /// Open the scope of a choice for `Cut`.
+    Scope,
+    /// Close the scope opened by `Scope`.
+    EndScope,
+    /// Commit to the current alternative of the innermost scope.
+    Cut,
+    /// Jump to a subroutine.
+    Jump(usize),
+    /// Return from a subroutine or finish the program.
+    Return,
+}
+
+enum Frame {
+    Choice {
+        alternative: usize,
+        height: usize,
+    },
+    Alternative {
+        failure: result::Result,
+    },
+    Mark {
+        reset_point: ResetPoint,
+    },
+    LookAhead {
+        reset_point: ResetPoint,
+    },
+    Repeat {
+        exit: usize,
+        height: usize,
+        reset_point: ResetPoint,
+    },
+    Return {
+        address: usize,
+    },
+    Scope,
+    /// A frame that was committed by `Cut`.  It keeps its place on
+    /// the stack but no longer handles failures.
+    Committed,
+}
+
+/// A parser compiled into a flat instruction sequence.  Programs are
+/// built by `parsemon.compile` and can be used like every other
+/// parser.
+#[pyclass]
+pub struct Program {
+    instructions: Vec<Instruction>,
+    first_set: PyObject,
+    cut_scope: PyObject,
+}
+
+#[pymethods]
+impl Program {
+    #[new]
+    fn new(
+        py: Python,
+        instructions: Vec<(String, PyObject)>,
+        first_set: PyObject,
+        cut_scope: PyObject,
+    ) -> PyResult<Self> {
+        let instructions = instructions
+            .into_iter()
+            .map(|(operation, operand)| decode(py, &operation, operand))
+            .collect::<PyResult<Vec<Instruction>>>()?;
+        Ok(Program {
+            instructions,
+            first_set,
+            cut_scope,
+        })
+    }
+
+    #[getter]
+    fn first_set(&self, py: Python) -> PyObject {
+        self.first_set.clone_ref(py)
+    }
+
+    fn __len__(&self) -> usize {
+        self.instructions.len()
+    }
+
+    fn __call__(
+        &self,
+        py: Python,
+        stream: PyObject,
+        continuation: PyObject,
+    ) -> PyResult<trampoline::Call> {
+        let result = self.execute(py, stream.as_ref(py))?;
+        Ok(trampoline::Call::positional(
+            py,
+            continuation,
+            (stream, result.into_py(py)),
+        ))
+    }
+
+    fn __traverse__(&self, visit: PyVisit) -> std::result::Result<(), PyTraverseError> {
+        visit.call(&self.first_set)?;
+        visit.call(&self.cut_scope)?;
+        for instruction in self.instructions.iter() {
+            match instruction {
+                Instruction::Match(object)
+                | Instruction::Call(object)
+                | Instruction::Push(object)
+                | Instruction::Map(object)
+                | Instruction::Bind(object) => visit.call(object)?,
+                _ => {}
+            }
+        }
+        Ok(())
+    }
+
+    fn __clear__(&mut self) {
+        self.instructions.clear();
+    }
+}
+
+impl Program {
+    fn execute(&self, py: Python, stream: &PyAny) -> PyResult<result::Result> {
+        let mut values: Vec<PyObject> = Vec::new();
+        let mut frames: Vec<Frame> = Vec::new();
+        let mut address = 0;
+        loop {
+            let outcome = match self.instructions.get(address) {
+                None => {
+                    return Err(PyValueError::new_err(
+                        "Program ended without a return instruction",
+                    ))
+                }
+                Some(Instruction::Match(parser)) => {
+                    match primitives::parse_native(py, parser.as_ref(py), stream)? {
+                        Some(parsing_result) => push_result(py, &mut values, parsing_result)?,
+                        None => {
+                            let parsing_result =
+                                self.run_scoped(py, parser, stream, &mut frames)?;
+                            push_result(py, &mut values, parsing_result)?
+                        }
+                    }
+                }
+                Some(Instruction::Call(parser)) => {
+                    let parsing_result = self.run_scoped(py, parser, stream, &mut frames)?;
+                    push_result(py, &mut values, parsing_result)?
+                }
+                Some(Instruction::Push(value)) => {
+                    values.push(value.clone_ref(py));
+                    None
+                }
+                Some(Instruction::Pop) => {
+                    pop(&mut values)?;
+                    None
+                }
+                Some(Instruction::Map(mapping)) => {
+                    let value = pop(&mut values)?;
+                    // Mirror `Result.map_value`, which turns a failing
+                    // mapping into a result of `None`.
+                    values.push(mapping.call1(py, (value,)).unwrap_or_else(|_| py.None()));
+                    None
+                }
+                Some(Instruction::Bind(binding)) => {
+                    let value = pop(&mut values)?;
+                    let parser = binding.call1(py, (value,))?;
+                    let parsing_result =
+                        match primitives::parse_native(py, parser.as_ref(py), stream)? {
+                            Some(parsing_result) => parsing_result,
+                            None => self.run_scoped(py, &parser, stream, &mut frames)?,
+                        };
+                    push_result(py, &mut values, parsing_result)?
+                }
+                Some(Instruction::Fail(message)) => Some(result::rejected(
+                    result::Reason::Message(message.clone()),
+                    Stream::new(stream)?.position()?,
+                )),
+                Some(Instruction::Choice(alternative)) => {
+                    frames.push(Frame::Choice {
+                        alternative: *alternative,
+                        height: values.len(),
+                    });
+                    None
+                }
+                Some(Instruction::Commit(target)) => {
+                    frames.pop();
+                    address = *target;
+                    continue;
+                }
+                Some(Instruction::EndChoice) => {
+                    frames.pop();
+                    None
+                }
+                Some(Instruction::Mark) => {
+                    frames.push(Frame::Mark {
+                        reset_point: Stream::new(stream)?.get_reset_point()?,
+                    });
+                    None
+                }
+                Some(Instruction::Release) => {
+                    if let Some(Frame::Mark { reset_point }) = frames.pop() {
+                        reset_point.destroy(py)?;
+                    }
+                    None
+                }
+                Some(Instruction::LookAhead) => {
+                    frames.push(Frame::LookAhead {
+                        reset_point: Stream::new(stream)?.get_reset_point()?,
+                    });
+                    None
+                }
+                Some(Instruction::Rewind) => {
+                    if let Some(Frame::LookAhead { reset_point }) = frames.pop() {
+                        Stream::new(stream)?.reset_stream(py, &reset_point)?;
+                        reset_point.destroy(py)?;
+                    }
+                    None
+                }
+                Some(Instruction::Repeat(exit)) => {
+                    frames.push(Frame::Repeat {
+                        exit: *exit,
+                        height: values.len(),
+                        reset_point: Stream::new(stream)?.get_reset_point()?,
+                    });
+                    None
+                }
+                Some(Instruction::Iterate(target)) => {
+                    if let Some(Frame::Repeat { reset_point, .. }) = frames.pop() {
+                        reset_point.destroy(py)?;
+                    }
+                    address = *target;
+                    continue;
+                }
+                Some(Instruction::NewList) => {
+                    values.push(PyList::empty(py).into());
+                    None
+                }
+                Some(Instruction::Append) => {
+                    let value = pop(&mut values)?;
+                    match values.last() {
+                        Some(list) => list.as_ref(py).downcast::<PyList>()?.append(value)?,
+                        None => return Err(PyValueError::new_err("Value stack is empty")),
+                    }
+                    None
+                }
+                Some(Instruction::Scope) => {
+                    frames.push(Frame::Scope);
+                    None
+                }
+                Some(Instruction::EndScope) => {
+                    frames.pop();
+                    None
+                }
+                Some(Instruction::Cut) => {
+                    self.cut(py, &mut frames)?;
+                    None
+                }
+                Some(Instruction::Jump(target)) => {
+                    frames.push(Frame::Return {
+                        address: address + 1,
+                    });
+                    address = *target;
+                    continue;
+                }
+                Some(Instruction::Return) => match frames.pop() {
+                    Some(Frame::Return {
+                        address: return_address,
+                    }) => {
+                        address = return_address;
+                        continue;
+                    }
+                    Some(_) => {
+                        return Err(PyValueError::new_err(
+                            "Returned from a subroutine with pending frames",
+                        ))
+                    }
+                    None => return Ok(result::success(py, pop(&mut values)?)),
+                },
+            };
+            address = match outcome {
+                None => address + 1,
+                Some(failure) => match unwind(
+                    py,
+                    stream,
+                    &self.cut_scope,
+                    &mut frames,
+                    &mut values,
+                    failure,
+                )? {
+                    Ok(handler) => handler,
+                    Err(failure) => return Ok(failure),
+                },
+            };
+        }
+    }
+
+    /// Run a parser through a nested trampoline.  A `cut` in the
+    /// parser that is not handled by one of its own choices commits
+    /// the innermost scope of this program.
+    fn run_scoped(
+        &self,
+        py: Python,
+        parser: &PyObject,
+        stream: &PyAny,
+        frames: &mut Vec<Frame>,
+    ) -> PyResult<result::Result> {
+        let frame = self.cut_scope.call_method0(py, "enter")?;
+        let parsing_result = match parser.as_ref(py).downcast::<PyCell<Program>>() {
+            Ok(program) => program.borrow().execute(py, stream),
+            Err(_) => run(py, parser, stream),
+        };
+        let is_committed: bool = self
+            .cut_scope
+            .call_method1(py, "leave", (frame,))?
+            .extract(py)?;
+        if is_committed {
+            self.cut(py, frames)?;
+        }
+        parsing_result
+    }
+
+    /// Commit the frames up to the innermost scope.  Their reset
+    /// points are destroyed and the failures of earlier alternatives
+    /// are dropped.  Without a scope in this program the cut is
+    /// passed on to the parsers that run the program.
+    fn cut(&self, py: Python, frames: &mut Vec<Frame>) -> PyResult<()> {
+        for frame in frames.iter_mut().rev() {
+            match frame {
+                Frame::Scope => return Ok(()),
+                Frame::Choice { .. } | Frame::Alternative { .. } => {
+                    *frame = Frame::Committed;
+                }
+                Frame::Mark { .. } => {
+                    if let Frame::Mark { reset_point } = std::mem::replace(frame, Frame::Committed)
+                    {
+                        reset_point.destroy(py)?;
+                    }
+                }
+                _ => {}
+            }
+        }
+        self.cut_scope.call_method0(py, "cut")?;
+        Ok(())
+    }
+}
+
+/// Pop frames until one of them handles `failure`.  Returns the
+/// address to continue at or the final failure if no frame handles
+/// it.  Failures of alternatives are merged as configured for the
+/// current run.
+fn unwind(
+    py: Python,
+    stream: &PyAny,
+    cut_scope: &PyObject,
+    frames: &mut Vec<Frame>,
+    values: &mut Vec<PyObject>,
+    mut failure: result::Result,
+) -> PyResult<std::result::Result<usize, result::Result>> {
+    while let Some(frame) = frames.pop() {
+        match frame {
+            Frame::Choice {
+                alternative,
+                height,
+            } => {
+                values.truncate(height);
+                frames.push(Frame::Alternative { failure });
+                return Ok(Ok(alternative));
+            }
+            Frame::Alternative { failure: previous } => {
+                failure = cut_scope
+                    .call_method1(py, "merge_failures", (previous, failure))?
+                    .extract(py)?;
+            }
+            Frame::Mark { reset_point } => {
+                Stream::new(stream)?.reset_stream(py, &reset_point)?;
+                reset_point.destroy(py)?;
+            }
+            Frame::LookAhead { reset_point } => {
+                reset_point.destroy(py)?;
+            }
+            Frame::Repeat {
+                exit,
+                height,
+                reset_point,
+            } => {
+                Stream::new(stream)?.reset_stream(py, &reset_point)?;
+                reset_point.destroy(py)?;
+                values.truncate(height);
+                return Ok(Ok(exit));
+            }
+            Frame::Return { .. } | Frame::Scope | Frame::Committed => {}
+        }
+    }
+    Ok(Err(failure))
+}
+
+/// Push the value of a successful result or hand back the failure.
+fn push_result(
+    py: Python,
+    values: &mut Vec<PyObject>,
+    parsing_result: result::Result,
+) -> PyResult<Option<result::Result>> {
+    if parsing_result.is_failure() {
+        Ok(Some(parsing_result))
+    } else {
+        values.push(parsing_result.value(py)?);
+        Ok(None)
+    }
+}
+
+fn pop(values: &mut Vec<PyObject>) -> PyResult<PyObject> {
+    values
+        .pop()
+        .ok_or_else(|| PyValueError::new_err("Value stack is empty"))
+}
+
+/// Run a parser that is not known to the machine through a nested
+/// trampoline.
+fn run(py: Python, parser: &PyObject, stream: &PyAny) -> PyResult<result::Result> {
+    let finish = Py::new(py, Finish {})?;
+    let outcome = trampoline::bounce(py, parser.call1(py, (stream, finish))?)?;
+    let parsing_result = outcome
+        .as_ref(py)
+        .downcast::<PyCell<result::Result>>()?
+        .borrow()
+        .clone();
+    Ok(parsing_result)
+}
+
+/// The continuation of parsers run through a nested trampoline.  It
+/// ends the trampoline by returning the parsing result.
+#[pyclass]
+pub struct Finish {}
+
+#[pymethods]
+impl Finish {
+    fn __call__(&self, _stream: PyObject, parsing_result: PyObject) -> PyObject {
+        parsing_result
+    }
+}
+
+fn decode(py: Python, operation: &str, operand: PyObject) -> PyResult<Instruction> {
+    let address = || operand.extract::<usize>(py);
+    Ok(match operation {
+        "match" => Instruction::Match(operand),
+        "call" => Instruction::Call(operand),
+        "push" => Instruction::Push(operand),
+        "pop" => Instruction::Pop,
+        "map" => Instruction::Map(operand),
+        "bind" => Instruction::Bind(operand),
+        "fail" => Instruction::Fail(Arc::from(operand.extract::<String>(py)?)),
+        "choice" => Instruction::Choice(address()?),
+        "commit" => Instruction::Commit(address()?),
+        "end_choice" => Instruction::EndChoice,
+        "mark" => Instruction::Mark,
+        "release" => Instruction::Release,
+        "look_ahead" => Instruction::LookAhead,
+        "rewind" => Instruction::Rewind,
+        "repeat" => Instruction::Repeat(address()?),
+        "iterate" => Instruction::Iterate(address()?),
+        "new_list" => Instruction::NewList,
+        "append" => Instruction::Append,
+        "scope" => Instruction::Scope,
+        "end_scope" => Instruction::EndScope,
+        "cut" => Instruction::Cut,
+        "jump" => Instruction::Jump(address()?),
+        "return" => Instruction::Return,
+        _ => {
+            return Err(PyValueError::new_err(format!(
+                "Unknown instruction `{}`",
+                operation
+            )))
+        }
+    })
+}
+
+pub fn initialize_module(module: &PyModule) -> PyResult<()> {
+    module.add_class::<Program>()?;
+    module.add_class::<Finish>()?;
+    Ok(())
+}
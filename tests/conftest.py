@@ -2,6 +2,9 @@ import os
 
 from pytest import fixture
 
+from parsemon import run_parser
+from parsemon.stream import NativeStringStream, StringStream
+
 
 class FileGenerator:
     def __init__(self, tmp_path_factory):
@@ -18,3 +21,17 @@ class FileGenerator:
 @fixture
 def file_generator(tmp_path_factory):
     return FileGenerator(tmp_path_factory)
+
+
+@fixture(
+    params=(
+        StringStream,
+        NativeStringStream,
+    ),
+    scope="module",
+)
+def runner(request):
+    def fixture(*args, **kwargs):
+        return run_parser(*args, stream_implementation=request.param, **kwargs)
+
+    return fixture
@@ -1,11 +1,11 @@
 from hypothesis import strategies as st
 
-from parsemon.stream import IOStream, StringStream
+from parsemon.stream import IOStream, NativeStringStream, StringStream
 
 
 @st.composite
 def stream_implementation(draw):
-    return draw(st.sampled_from([StringStream, IOStream]))
+    return draw(st.sampled_from([StringStream, NativeStringStream, IOStream]))
 
 
 @st.composite
@@ -0,0 +1,111 @@
+import struct
+
+import hypothesis.strategies as st
+import pytest
+from hypothesis import given
+
+from parsemon import chain, choices, literal, many, regex, unit
+from parsemon.binary import (
+    byte_literal,
+    integer,
+    length_prefixed,
+    parse_bytes,
+    take,
+)
+from parsemon.error import ParsingFailed
+from parsemon.stream import BytesStream
+
+
+def test_take_returns_a_view_into_the_input():
+    content = bytearray(b"abcdef")
+    result = parse_bytes(chain(take(2), take(3)), content)
+    assert isinstance(result.value, memoryview)
+    assert result.value == b"cde"
+    content[2] = ord("x")
+    assert result.value == b"xde"
+    assert result.remaining_input == b"f"
+
+
+def test_take_fails_without_consuming_input_at_end_of_input():
+    with pytest.raises(ParsingFailed) as error:
+        parse_bytes(chain(take(1), take(3)), b"abc")
+    assert "@ byte 1" in str(error.value)
+
+
+def test_bytes_stream_take_does_not_advance_past_the_end():
+    stream = BytesStream(b"ab")
+    assert stream.take(3) is None
+    assert stream.position() == 0
+
+
+@given(
+    value=st.integers(min_value=0, max_value=2**32 - 1),
+    byteorder=st.sampled_from(["big", "little"]),
+)
+def test_unsigned_integers_are_parsed_in_byte_order(value, byteorder):
+    content = value.to_bytes(4, byteorder)
+    assert parse_bytes(integer(4, byteorder), content).value == value
+
+
+@given(value=st.integers(min_value=-(2**15), max_value=2**15 - 1))
+def test_signed_integers_are_parsed_like_struct_does(value):
+    content = struct.pack("<h", value)
+    assert parse_bytes(integer(2, "little", signed=True), content).value == value
+
+
+def test_byte_literal_matches_exact_bytes():
+    assert parse_bytes(byte_literal(b"\x00\xff"), b"\x00\xff").value == b"\x00\xff"
+
+
+def test_byte_literal_does_not_consume_input_on_mismatch():
+    parser = choices(byte_literal(b"ab"), byte_literal(b"ac"))
+    assert parse_bytes(parser, b"ac").value == b"ac"
+
+
+def test_length_prefixed_blocks_are_parsed():
+    content = b"\x00\x03abc\x00\x01d"
+    assert [
+        bytes(block)
+        for block in parse_bytes(many(length_prefixed(integer(2))), content).value
+    ] == [b"abc", b"d"]
+
+
+def test_length_prefixed_block_fails_if_input_is_too_short():
+    with pytest.raises(ParsingFailed):
+        parse_bytes(length_prefixed(integer(1)), b"\x05abc")
+
+
+def test_character_parsers_see_bytes_as_latin_1_characters():
+    assert (
+        parse_bytes(chain(literal("\xff"), regex(b"[a-z]+")), b"\xffab").value == b"ab"
+    )
+
+
+def test_bytes_stream_accepts_buffer_objects():
+    for content in (b"ab", bytearray(b"ab"), memoryview(b"xab")[1:]):
+        stream = BytesStream(content)
+        assert stream.read() == "a"
+        assert stream.to_string() == "b"
+
+
+def test_text_patterns_see_the_input_before_the_position():
+    assert parse_bytes(chain(literal("a"), regex(r"(?<=a)\w+\b")), b"abc").value == "bc"
+
+
+@pytest.mark.parametrize(
+    "parser, message",
+    (
+        (take(3), "Expected 3 bytes"),
+        (integer(2), "Expected 2 byte integer"),
+        (byte_literal(b"ab"), "Expected b'ab'"),
+    ),
+)
+def test_failure_messages_describe_the_expected_input(parser, message):
+    with pytest.raises(ParsingFailed) as error:
+        parse_bytes(parser, b"x")
+    assert message in str(error.value)
+
+
+def test_empty_integer_succeeds_at_end_of_input_inside_choices():
+    parser = chain(take(1), choices(byte_literal(b"x"), integer(0), unit(None)))
+    assert parse_bytes(parser, b"a").value == 0
@@ -1,8 +1,20 @@
+import io
+import re
+
 import hypothesis.strategies as st
 import pytest
 from hypothesis import given
 
-from parsemon.stream import IOStream, StringStream
+from parsemon.sourcemap import SourceMap
+from parsemon.stream import (
+    PATTERN_LOOKBEHIND_SIZE,
+    PATTERN_WINDOW_SIZE,
+    IOStream,
+    MappedFileStream,
+    NativeStringStream,
+    Stream,
+    StringStream,
+)
 
 from . import strategies
 
@@ -10,7 +22,9 @@ from . import strategies
 @pytest.fixture(
     params=(
         StringStream,
+        NativeStringStream,
         IOStream,
+        MappedFileStream,
     ),
     scope="session",
 )
@@ -93,3 +107,193 @@ def test_peeking_next_character_does_not_change_result_of_to_string(
     stream = stream_implementation.from_string(content)
     stream.next()
     assert stream.to_string() == content
+
+
+def test_native_string_stream_implements_stream_interface():
+    assert isinstance(NativeStringStream.from_string(""), Stream)
+
+
+@given(text=st.text(min_size=1))
+def test_native_string_stream_can_be_reset_with_foreign_reset_point(text):
+    stream = NativeStringStream.from_string(text)
+    reset_point = StringStream.from_string(text).get_reset_point()
+    stream.read()
+    stream.reset_stream(reset_point)
+    assert stream.position() == 0
+
+
+def test_match_pattern_advances_stream_past_the_match(stream_implementation):
+    stream = stream_implementation.from_string("aaab")
+    found = stream.match_pattern(re.compile("a+"))
+    assert found.group() == "aaa"
+    assert stream.read() == "b"
+
+
+def test_match_pattern_does_not_advance_stream_without_match(
+    stream_implementation,
+):
+    stream = stream_implementation.from_string("b")
+    assert stream.match_pattern(re.compile("a+")) is None
+    assert stream.read() == "b"
+
+
+def test_match_pattern_can_match_more_than_the_initial_window(
+    stream_implementation,
+):
+    content = "a" * (PATTERN_WINDOW_SIZE * 3) + "b"
+    stream = stream_implementation.from_string(content)
+    found = stream.match_pattern(re.compile("a+"))
+    assert len(found.group()) == PATTERN_WINDOW_SIZE * 3
+    assert stream.read() == "b"
+
+
+@pytest.mark.parametrize(
+    "pattern,expected",
+    (
+        (r"(?<=a)b", "b"),
+        (r"\bb", None),
+        (r"\Bb", "b"),
+        (r"^b", None),
+    ),
+)
+def test_match_pattern_sees_input_before_the_position(
+    stream_implementation, pattern, expected
+):
+    stream = stream_implementation.from_string("ab")
+    stream.read()
+    found = stream.match_pattern(re.compile(pattern))
+    assert (found and found.group()) == expected
+
+
+@pytest.mark.parametrize(
+    "stream",
+    (
+        lambda content: IOStream(io.StringIO(content), chunk_size=3),
+        lambda content: MappedFileStream(content.encode("utf-8"), block_size=4),
+    ),
+)
+def test_match_pattern_looks_behind_across_chunks(stream):
+    content = "x" * (PATTERN_LOOKBEHIND_SIZE * 3) + "y"
+    stream = stream(content)
+    for _ in range(PATTERN_LOOKBEHIND_SIZE * 3):
+        stream.read()
+    pattern = re.compile("(?<=x{%d})y" % PATTERN_LOOKBEHIND_SIZE)
+    assert stream.match_pattern(pattern).group() == "y"
+
+
+@given(text=st.text())
+def test_mapped_file_stream_decodes_characters_across_block_boundaries(text):
+    stream = MappedFileStream(text.encode("utf-8"), block_size=4)
+    characters = []
+    while stream.next() is not None:
+        characters.append(stream.read())
+    assert "".join(characters) == text
+
+
+@given(text=st.text(), data=st.data())
+def test_mapped_file_stream_can_be_reset_to_earlier_blocks(text, data):
+    stream = MappedFileStream(text.encode("utf-8"), block_size=4)
+    position = data.draw(st.integers(min_value=0, max_value=len(text)))
+    for _ in range(position):
+        stream.read()
+    reset_point = stream.get_reset_point()
+    stream = MappedFileStream(text.encode("utf-8"), block_size=4)
+    stream.reset_stream(reset_point)
+    assert stream.to_string() == text[position:]
+
+
+def test_mapped_file_stream_matches_patterns_across_block_boundaries():
+    stream = MappedFileStream("xäöüäöüy".encode("utf-8"), block_size=4)
+    stream.read()
+    match = stream.match_pattern(re.compile("[äöü]+"))
+    assert match.group() == "äöüäöü"
+    assert stream.read() == "y"
+
+
+def test_mapped_file_stream_locates_positions_in_later_blocks():
+    stream = MappedFileStream("ab\nä\ncdef".encode("utf-8"), block_size=4)
+    assert stream.location(7) == (3, 2)
+
+
+@given(text=st.text(alphabet="a\nä€"), data=st.data())
+def test_mapped_file_stream_locates_positions_like_source_map(text, data):
+    stream = MappedFileStream(text.encode("utf-8"), block_size=4)
+    position = data.draw(st.integers(min_value=0, max_value=len(text)))
+    assert stream.location(position) == SourceMap(text).locate(position)
+
+
+@given(text=st.text(), data=st.data())
+def test_io_stream_can_be_reset_across_chunks(text, data):
+    stream = IOStream(io.StringIO(text), chunk_size=3)
+    position = data.draw(st.integers(min_value=0, max_value=len(text)))
+    for _ in range(position):
+        stream.read()
+    reset_point = stream.get_reset_point()
+    while stream.read() is not None:
+        pass
+    stream.reset_stream(reset_point)
+    reset_point.destroy()
+    assert stream.position() == position
+    assert stream.to_string() == text[position:]
+
+
+def test_io_stream_next_does_not_consume_input():
+    stream = IOStream.from_string("ab")
+    assert stream.next() == "a"
+    assert stream.next() == "a"
+    assert stream.position() == 0
+
+
+def test_io_stream_counts_positions_in_characters(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_text("äöü€x", encoding="utf-8")
+    with open(path, encoding="utf-8") as input_file:
+        stream = IOStream(input_file, chunk_size=2)
+        reset_point = stream.get_reset_point()
+        for _ in range(4):
+            stream.read()
+        assert stream.position() == 4
+        stream.reset_stream(reset_point)
+        assert stream.to_string() == "äöü€x"
+
+
+def test_io_stream_releases_input_after_reset_points_are_destroyed():
+    stream = IOStream(io.StringIO("a" * 200), chunk_size=4)
+    reset_point = stream.get_reset_point()
+    for _ in range(50):
+        stream.read()
+    reset_point.destroy()
+    for _ in range(100):
+        stream.read()
+    with pytest.raises(ValueError):
+        stream.reset_stream(reset_point)
+
+
+def test_io_stream_keeps_input_of_oldest_reset_point():
+    stream = IOStream(io.StringIO("abcdefghij" * 100), chunk_size=4)
+    reset_points = []
+    for _ in range(5):
+        reset_points.append(stream.get_reset_point())
+        for _ in range(100):
+            stream.read()
+    for reset_point in reset_points[2:]:
+        reset_point.destroy()
+    reset_points[0].destroy()
+    for _ in range(20):
+        stream.read()
+    stream.reset_stream(reset_points[1])
+    assert stream.to_string() == "abcdefghij" * 90
+    with pytest.raises(ValueError):
+        stream.reset_stream(reset_points[0])
+
+
+def test_io_stream_matches_patterns_across_chunks():
+    stream = IOStream(io.StringIO("ab cd" * 2000), chunk_size=3)
+    pattern = re.compile(r"\b\w+ ?")
+    matches = []
+    while True:
+        found = stream.match_pattern(pattern)
+        if found is None:
+            break
+        matches.append(found.group())
+    assert matches == ["ab "] + ["cdab "] * 1999 + ["cd"]
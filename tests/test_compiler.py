@@ -0,0 +1,132 @@
+import hypothesis.strategies as st
+import pytest
+from hypothesis import given
+
+from parsemon import (
+    bind,
+    chain,
+    character,
+    choice,
+    choices,
+    cut,
+    do,
+    enclosed_by,
+    fail,
+    fmap,
+    literal,
+    many,
+    many1,
+    named,
+    none_of,
+    one_of,
+    regex,
+    seperated_by,
+    skip_many,
+    take_while,
+    try_parser,
+    unit,
+)
+from parsemon.compiler import compile
+from parsemon.error import ParsingFailed
+from parsemon.internals import look_ahead
+from parsemon.json import json_document
+
+
+def outcome(runner, parser, text):
+    try:
+        parsing_result = runner(parser, text)
+    except ParsingFailed as error:
+        return ("failure", str(error))
+    return ("success", parsing_result.value, parsing_result.remaining_input)
+
+
+@do
+def committed_digit():
+    yield literal("0")
+    yield cut()
+    return (yield one_of("01"))
+
+
+@do
+def digit_pair():
+    first = yield one_of("0123456789")
+    second = yield one_of("0123456789")
+    return first + second
+
+
+PARSERS = [
+    literal("ab"),
+    chain(literal("a"), literal("b")),
+    choice(literal("ab"), literal("b")),
+    choice(literal("ax"), choice(literal("b"), unit("unit"))),
+    choices(literal("a"), literal("b"), literal("ab")),
+    try_parser(chain(literal("a"), literal("x"))),
+    choice(try_parser(chain(literal("a"), literal("x"))), literal("ab")),
+    look_ahead(literal("a")),
+    fmap(str.upper, none_of("x")),
+    bind(character(), lambda found: literal(found)),
+    many(literal("ab")),
+    many1(choice(literal("a"), literal("b"))),
+    skip_many(one_of("ab")),
+    seperated_by(take_while("ab"), literal("x")),
+    seperated_by(literal("a"), literal("x")),
+    enclosed_by(many(none_of("x")), literal("x")),
+    choice(digit_pair(), fail("no digits")),
+    chain(many(literal("a")), fail("expected failure")),
+    choice(chain(literal("a"), cut(), literal("b")), literal("ax")),
+    choices(literal("x"), chain(literal("a"), cut(), literal("b")), unit("unit")),
+    choice(try_parser(chain(literal("a"), cut(), literal("x"))), literal("ab")),
+    try_parser(choice(chain(literal("a"), cut(), literal("b")), literal("ax"))),
+    choice(committed_digit(), literal("0x")),
+    named(choice(literal("a"), literal("b")), "a or b"),
+    choices(many(literal("a")), many(literal("b"))),
+    choice(regex("a+x"), literal("ab")),
+]
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+@given(text=st.text(alphabet="abx01", max_size=6))
+def test_compiled_parser_behaves_like_original_parser(runner, parser, text):
+    assert outcome(runner, compile(parser), text) == outcome(runner, parser, text)
+
+
+def test_compiled_json_document_parses_nested_document(runner):
+    document = '{"a": [1, -2.5e3, "x", true, null, {"b": []}]}'
+    assert runner(compile(json_document()), document).value == {
+        "a": [1, -2.5e3, "x", True, None, {"b": []}]
+    }
+
+
+def test_compiled_json_document_keeps_error_messages(runner):
+    assert outcome(runner, compile(json_document()), "[1,") == outcome(
+        runner, json_document(), "[1,"
+    )
+
+
+def test_shared_parsers_are_compiled_once():
+    shared = chain(literal("a"), literal("b"), literal("c"))
+    duplicate = chain(literal("a"), literal("b"), literal("c"))
+    assert len(compile(choice(shared, shared))) < len(
+        compile(choice(shared, duplicate))
+    )
+
+
+def test_deeply_nested_parsers_can_be_compiled(runner):
+    parser = literal("a")
+    for _ in range(5000):
+        parser = choice(literal("b"), parser)
+    assert runner(compile(parser), "a").value == "a"
+
+
+def test_named_parsers_do_not_add_instructions():
+    parser = chain(literal("a"), literal("b"))
+    assert len(compile(named(parser, "ab"))) == len(compile(parser))
+
+
+def test_choices_without_first_sets_are_compiled_like_choice():
+    first, second = many(literal("a")), many(literal("b"))
+    assert len(compile(choices(first, second))) == len(compile(choice(first, second)))
+
+
+def test_compiled_parser_reports_first_set():
+    assert "a" in compile(literal("abc")).first_set
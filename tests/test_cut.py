@@ -0,0 +1,116 @@
+import pytest
+
+from parsemon import (
+    bind,
+    chain,
+    choice,
+    choices,
+    cut,
+    do,
+    literal,
+    many,
+    run_parser,
+    try_parser,
+    unit,
+)
+from parsemon.error import ParsingFailed
+from parsemon.internals import backtracking
+from parsemon.internals.structure import may_cut
+from parsemon.stream import StringStream, StringStreamResetPoint
+
+
+def test_choice_does_not_try_other_alternatives_after_cut(runner):
+    parser = choice(chain(literal("a"), cut(), literal("b")), literal("ac"))
+    with pytest.raises(ParsingFailed):
+        runner(parser, "ac")
+    assert runner(parser, "ab").value == "b"
+
+
+def test_failures_before_cut_are_not_reported(runner):
+    parser = choices(
+        literal("x"), literal("y"), chain(literal("a"), cut(), literal("b"))
+    )
+    with pytest.raises(ParsingFailed) as error:
+        runner(parser, "ac")
+    assert "`x`" not in str(error.value)
+    assert "`b`" in str(error.value)
+
+
+def test_cut_only_commits_the_innermost_choice(runner):
+    inner = choice(chain(literal("a"), cut(), literal("b")), literal("ac"))
+    parser = choice(try_parser(inner), literal("ac"))
+    assert runner(parser, "ac").value == "ac"
+
+
+def test_try_parser_does_not_reset_after_cut(runner):
+    parser = choice(try_parser(chain(literal("a"), cut(), literal("b"))), unit(None))
+    with pytest.raises(ParsingFailed) as error:
+        runner(parser, "ac")
+    assert "C: 1" in str(error.value)
+
+
+def test_cut_in_do_block_commits_enclosing_choice(runner):
+    @do
+    def committed():
+        yield literal("a")
+        yield cut()
+        return (yield literal("b"))
+
+    with pytest.raises(ParsingFailed):
+        runner(choice(try_parser(committed()), literal("ac")), "ac")
+
+
+def test_cut_outside_of_choice_succeeds_without_consuming_input(runner):
+    assert runner(chain(cut(), many(literal("a"))), "aa").value == ["a", "a"]
+
+
+class CountingStream(StringStream):
+    """Count the reset points that were not destroyed yet."""
+
+    def __init__(self, content: str, position: int) -> None:
+        super().__init__(content, position)
+        self.live_reset_points = 0
+
+    def get_reset_point(self):
+        self.live_reset_points += 1
+        stream = self
+
+        class CountingResetPoint(StringStreamResetPoint):
+            def destroy(self) -> None:
+                stream.live_reset_points -= 1
+
+        return CountingResetPoint(self.position())
+
+
+def test_cut_destroys_reset_points_of_enclosing_try_parser():
+    def probe(stream, continuation):
+        return unit(stream.live_reset_points)(stream, continuation)
+
+    without_cut = try_parser(chain(literal("a"), probe))
+    with_cut = try_parser(chain(literal("a"), cut(), probe))
+    assert run_parser(without_cut, "a", stream_implementation=CountingStream).value
+    assert not run_parser(with_cut, "a", stream_implementation=CountingStream).value
+
+
+def test_parsers_built_without_cut_may_not_cut():
+    parser = choice(literal("a"), try_parser(many(chain(literal("b"), unit(1)))))
+    assert not may_cut(parser)
+
+
+def test_parsers_containing_cut_may_cut():
+    assert may_cut(choice(literal("a"), many(chain(literal("b"), cut()))))
+
+
+def test_parsers_returned_by_bind_may_cut():
+    assert may_cut(bind(literal("a"), lambda _: unit(None)))
+
+
+def test_leaving_choice_frames_out_of_order_raises():
+    token = backtracking.current_choice_frames.set([])
+    try:
+        outer = backtracking.enter(backtracking.ChoiceFrame(is_choice=True))
+        backtracking.enter(backtracking.ChoiceFrame(is_choice=True))
+        with pytest.raises(RuntimeError):
+            backtracking.leave(outer)
+    finally:
+        backtracking.current_choice_frames.reset(token)
@@ -1,6 +1,25 @@
+import pytest
 from pytest import raises
 
-from parsemon import do, run_parser, unit
+from parsemon import (
+    chain,
+    character,
+    choice,
+    do,
+    end_of_file,
+    fail,
+    literal,
+    none_of,
+    one_of,
+    run_parser,
+    take_while1,
+    try_parser,
+    unit,
+)
+from parsemon.compiler import compile
+from parsemon.error import ParsingFailed
+from parsemon.internals import run
+from parsemon.stream import NativeStringStream
 
 
 def test_attribute_errors_are_propagated_correctly():
@@ -14,3 +33,58 @@ def test_attribute_errors_are_propagated_correctly():
     with raises(AttributeError) as error:
         run_parser(parser(), "")
     assert str(error.value) == "'dict' object has no attribute 'a'"
+
+
+@pytest.mark.parametrize(
+    "parser,text,message",
+    [
+        (literal("ab"), "ax", "Expected `ab` but found `x`."),
+        (literal("ab"), "a", "Expected `ab` but found `end of string`."),
+        (one_of("ab"), "x", "Expected one of `ab` but found x"),
+        (none_of("ab"), "a", "Expected anything except one of `ab` but found a"),
+        (none_of("ab"), "", "Expected any char except `ab` but found end of string"),
+        (character(2), "a", "Expected character but found end of string"),
+        (end_of_file(), "a", "Expected end-of-file but found `a`"),
+        (take_while1("ab"), "x", "Expected a character one of `ab` but found x"),
+        (fail("custom message"), "", "custom message"),
+    ],
+)
+def test_failures_render_their_messages_when_read(parser, text, message):
+    _, parsing_result = run(parser, NativeStringStream.from_string(text))
+    (failure,) = parsing_result.get_failures()
+    assert failure.message == message
+
+
+@pytest.fixture(params=(lambda parser: parser, compile), ids=("trampoline", "compiled"))
+def prepare(request):
+    return request.param
+
+
+def failure_message(parser, text, **kwargs):
+    with raises(ParsingFailed) as error:
+        run_parser(parser, text, **kwargs)
+    return str(error.value)
+
+
+def test_all_failures_are_reported_by_default(prepare):
+    parser = prepare(choice(try_parser(chain(literal("a"), literal("b"))), one_of("x")))
+    message = failure_message(parser, "ac")
+    assert "`b`" in message
+    assert "`x`" in message
+
+
+def test_only_farthest_failures_are_reported_if_limited(prepare):
+    parser = prepare(choice(try_parser(chain(literal("a"), literal("b"))), one_of("x")))
+    message = failure_message(parser, "ac", max_failures=8)
+    assert "`b`" in message
+    assert "`x`" not in message
+
+
+def test_number_of_farthest_failures_is_limited(prepare):
+    parser = prepare(choice(one_of("a"), choice(one_of("b"), one_of("c"))))
+    assert failure_message(parser, "x", max_failures=2).count(" OR ") == 1
+
+
+def test_duplicate_farthest_failures_are_reported_once(prepare):
+    parser = prepare(choice(one_of("a"), one_of("a")))
+    assert failure_message(parser, "x", max_failures=8).count(" OR ") == 0
@@ -1,6 +1,26 @@
-from pytest import raises
+from pytest import fixture, raises
 
-from parsemon import FileTooLarge, literal, many, parse_file
+from parsemon import (
+    FileTooLarge,
+    chain,
+    choice,
+    literal,
+    many,
+    parse_file,
+    parse_iter,
+)
+from parsemon import parser as parser_module
+from parsemon.error import ParsingFailed
+from parsemon.json import json_document, whitespaces
+
+
+@fixture(params=("read", "mapped"))
+def path_reading(request, monkeypatch):
+    """Parse files given by path after reading them at once or through
+    a memory map."""
+    if request.param == "mapped":
+        monkeypatch.setattr(parser_module, "MAPPED_FILE_THRESHOLD", -1)
+    return request.param
 
 
 def test_can_open_file_and_run_a_parser(file_generator):
@@ -15,3 +35,82 @@ def test_raise_an_exception_if_file_size_is_larger_then_allowed(file_generator):
     with open(test_file_path) as input_file:
         with raises(FileTooLarge):
             parse_file(many(literal("a")), input_file, max_size=500)
+
+
+def test_parse_iter_yields_records_of_a_file(file_generator):
+    test_file_path = file_generator.create_file(content='{"a": 1}\n[2]\n"x"\n')
+    with open(test_file_path) as input_file:
+        assert list(parse_iter(json_document(), input_file, chunk_size=3)) == [
+            {"a": 1},
+            [2],
+            "x",
+        ]
+
+
+def test_parse_iter_yields_records_before_reading_the_whole_file(file_generator):
+    test_file_path = file_generator.create_file(content="[1]\n" * 1000)
+    with open(test_file_path) as input_file:
+        records = parse_iter(json_document(), input_file, chunk_size=16)
+        assert next(records) == [1]
+        assert input_file.tell() < 100
+
+
+def test_parse_iter_accepts_strings():
+    assert list(
+        parse_iter(chain(whitespaces, literal("ab")), "ab ab", chunk_size=1)
+    ) == [
+        "ab",
+        "ab",
+    ]
+
+
+def test_parse_iter_applies_max_size_to_single_records(file_generator):
+    test_file_path = file_generator.create_file(content="[1]\n" * 1000)
+    with open(test_file_path) as input_file:
+        assert len(list(parse_iter(json_document(), input_file, max_size=10))) == 1000
+
+
+def test_parse_iter_raises_if_a_record_is_larger_than_allowed(file_generator):
+    test_file_path = file_generator.create_file(content="[1]\n[" + "1," * 100 + "1]")
+    with open(test_file_path) as input_file:
+        records = parse_iter(json_document(), input_file, max_size=50)
+        assert next(records) == [1]
+        with raises(FileTooLarge):
+            next(records)
+
+
+def test_parse_file_accepts_a_path(file_generator, path_reading):
+    test_file_path = file_generator.create_file(content="abcde")
+    assert parse_file(literal("abcde"), test_file_path).value == "abcde"
+
+
+def test_parse_file_with_a_path_reports_remaining_input(file_generator, path_reading):
+    test_file_path = file_generator.create_file(content="abcde")
+    assert parse_file(literal("ab"), test_file_path).remaining_input == "cde"
+
+
+def test_parse_file_with_a_path_checks_the_size_before_parsing(
+    file_generator, path_reading
+):
+    test_file_path = file_generator.create_file(content="a" * 1000)
+    with raises(FileTooLarge):
+        parse_file(many(literal("a")), test_file_path, max_size=500)
+
+
+def test_parse_file_accepts_a_path_to_an_empty_file(file_generator, path_reading):
+    test_file_path = file_generator.create_file(content="")
+    assert parse_file(many(literal("a")), test_file_path).value == []
+
+
+def test_parse_file_with_a_path_reports_failure_location(file_generator, path_reading):
+    test_file_path = file_generator.create_file(content="a\nb")
+    with raises(ParsingFailed) as error:
+        parse_file(chain(literal("a\n"), literal("a")), test_file_path)
+    assert "L: 2, C: 0" in str(error.value)
+
+
+def test_parse_file_with_a_path_limits_reported_failures(file_generator, path_reading):
+    test_file_path = file_generator.create_file(content="ax")
+    with raises(ParsingFailed) as error:
+        parse_file(choice(literal("ab"), literal("ac")), test_file_path, max_failures=1)
+    assert " OR " not in str(error.value)
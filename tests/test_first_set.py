@@ -0,0 +1,214 @@
+import hypothesis.strategies as st
+import pytest
+from hypothesis import given
+
+from parsemon import (
+    chain,
+    character,
+    choice,
+    choices,
+    enclosed_by,
+    end_of_file,
+    fail,
+    fmap,
+    literal,
+    many,
+    many1,
+    none_of,
+    one_of,
+    run_parser,
+    take_while,
+    take_while1,
+    try_parser,
+    unit,
+)
+from parsemon.error import ParsingFailed
+from parsemon.extensions import trampoline
+from parsemon.extensions.primitives import CharacterSet
+from parsemon.internals.first_set import first_set
+from parsemon.stream import StringStream
+
+
+def counting(parser):
+    calls = []
+
+    def _counting_parser(stream, continuation):
+        calls.append(stream.position())
+        return trampoline.Call(parser, stream, continuation)
+
+    _counting_parser.first_set = first_set(parser)
+    return _counting_parser, calls
+
+
+@given(characters=st.text(), character=st.characters())
+def test_character_set_contains_exactly_the_given_characters(characters, character):
+    assert (character in CharacterSet(characters)) == (character in characters)
+
+
+@given(characters=st.text(), character=st.characters())
+def test_negated_character_set_contains_all_other_characters(characters, character):
+    assert (character in CharacterSet(characters, negated=True)) == (
+        character not in characters
+    )
+
+
+@given(
+    left=st.text(),
+    left_negated=st.booleans(),
+    right=st.text(),
+    right_negated=st.booleans(),
+    character=st.characters(),
+)
+def test_union_of_character_sets_contains_characters_of_both(
+    left, left_negated, right, right_negated, character
+):
+    left_set = CharacterSet(left, negated=left_negated)
+    right_set = CharacterSet(right, negated=right_negated)
+    assert (character in (left_set | right_set)) == (
+        character in left_set or character in right_set
+    )
+
+
+def test_literal_reports_its_first_character():
+    assert "a" in first_set(literal("abc"))
+    assert "b" not in first_set(literal("abc"))
+
+
+def test_empty_literal_has_no_first_set():
+    assert first_set(literal("")) is None
+
+
+def test_one_of_and_none_of_report_their_characters():
+    assert "x" in first_set(one_of("xy"))
+    assert "z" not in first_set(one_of("xy"))
+    assert "x" not in first_set(none_of("xy"))
+    assert "z" in first_set(none_of("xy"))
+
+
+def test_parsers_that_can_succeed_without_input_have_no_first_set():
+    assert first_set(unit(1)) is None
+    assert first_set(end_of_file()) is None
+    assert first_set(many(literal("a"))) is None
+    assert first_set(take_while("a")) is None
+
+
+def test_first_set_is_passed_through_combinators():
+    parser = literal("a")
+    assert "a" in first_set(chain(parser, unit(1)))
+    assert "a" in first_set(fmap(str.upper, parser))
+    assert "a" in first_set(try_parser(parser))
+    assert "a" in first_set(many1(parser))
+    assert "a" in first_set(enclosed_by(unit(1), parser))
+    assert "a" in first_set(take_while1("a"))
+    assert "a" in first_set(character())
+
+
+def test_first_set_of_choice_is_union_of_alternatives():
+    parser = choice(literal("a"), literal("b"))
+    assert "a" in first_set(parser)
+    assert "b" in first_set(parser)
+    assert "c" not in first_set(parser)
+    assert first_set(choice(literal("a"), unit(1))) is None
+
+
+def test_fail_has_empty_first_set():
+    assert "a" not in first_set(fail("error"))
+
+
+def test_choices_skips_alternatives_that_cannot_match(runner):
+    first, first_calls = counting(literal("a"))
+    second, second_calls = counting(literal("b"))
+    third, third_calls = counting(literal("c"))
+    assert runner(choices(first, second, third), "c").value == "c"
+    assert not first_calls
+    assert not second_calls
+    assert third_calls
+
+
+def test_choices_runs_alternatives_without_first_set(runner):
+    parser = choices(literal("a"), fmap(lambda _: "unknown", unit(None)))
+    assert runner(parser, "b").value == "unknown"
+
+
+@given(text=st.text(alphabet="abcx", max_size=3))
+def test_choices_keeps_ordering_of_alternatives(runner, text):
+    parser = choices(
+        literal("ab"),
+        chain(literal("a"), unit("first a")),
+        literal("b"),
+        take_while("abc"),
+    )
+    assert (
+        runner(parser, text).value
+        == run_parser(
+            choice(
+                literal("ab"),
+                choice(
+                    chain(literal("a"), unit("first a")),
+                    choice(literal("b"), take_while("abc")),
+                ),
+            ),
+            text,
+        ).value
+    )
+
+
+def test_choices_keeps_error_messages_of_all_alternatives(runner):
+    parser = choices(literal("ab"), literal("b"), literal("c"))
+    with pytest.raises(ParsingFailed) as dispatched:
+        runner(parser, "ax")
+    with pytest.raises(ParsingFailed) as chained:
+        runner(
+            choice(literal("ab"), choice(literal("b"), literal("c"))),
+            "ax",
+        )
+    assert str(dispatched.value) == str(chained.value)
+
+
+def test_choices_behaves_like_choice_if_an_alternative_consumes_input(runner):
+    parser = choices(literal("ax"), literal("b"), unit("unit"))
+    assert runner(parser, "ab").value == "b"
+
+
+def test_choices_does_not_rerun_alternative_that_consumed_input(runner):
+    first, first_calls = counting(chain(literal("a"), literal("x")))
+    parser = choices(first, literal("b"), unit("unit"))
+    assert runner(parser, "ab").value == "b"
+    assert first_calls == [0]
+
+
+def test_choices_runs_skipped_alternatives_once_to_report_failures(runner):
+    first, first_calls = counting(literal("a"))
+    second, second_calls = counting(chain(literal("b"), literal("x")))
+    parser = choices(first, second)
+    with pytest.raises(ParsingFailed) as dispatched:
+        runner(parser, "by")
+    with pytest.raises(ParsingFailed) as chained:
+        runner(choice(literal("a"), chain(literal("b"), literal("x"))), "by")
+    assert str(dispatched.value) == str(chained.value)
+    assert first_calls == [0]
+    assert second_calls == [0]
+
+
+def test_choices_dispatches_on_characters_outside_of_ascii(runner):
+    parser = many(choices(literal("ä"), literal("ö"), literal("a")))
+    assert runner(parser, "öäa").value == ["ö", "ä", "a"]
+
+
+class ResetPointCountingStream(StringStream):
+    reset_points = 0
+
+    def get_reset_point(self):
+        ResetPointCountingStream.reset_points += 1
+        return super().get_reset_point()
+
+
+def reset_points_of_run(parser, text):
+    ResetPointCountingStream.reset_points = 0
+    run_parser(parser, text, stream_implementation=ResetPointCountingStream)
+    return ResetPointCountingStream.reset_points
+
+
+def test_choices_takes_no_reset_point_if_no_alternative_was_skipped():
+    parser = choices(literal("a"), literal("b"))
+    assert reset_points_of_run(parser, "a") == reset_points_of_run(literal("a"), "a")
@@ -0,0 +1,43 @@
+from parsemon import chain, choice, literal, many, record_hotspots, try_parser
+from parsemon.hotspots import Hotspot
+
+
+def backtracking_parser():
+    return many(choice(try_parser(chain(literal("ab"), literal("c"))), literal("abd")))
+
+
+def test_input_before_reset_is_counted_as_parsed_again(runner):
+    with record_hotspots() as hotspots:
+        assert runner(backtracking_parser(), "abdabc").value == ["abd", "c"]
+    assert hotspots.histogram() == {0: 1, 1: 1}
+    assert hotspots.regions() == [Hotspot(0, 2, 1)]
+
+
+def test_repeated_resets_add_up(runner):
+    with record_hotspots() as hotspots:
+        runner(backtracking_parser(), "abdabd")
+    assert hotspots.regions() == [Hotspot(0, 2, 1), Hotspot(3, 5, 1)]
+
+
+def test_overlapping_resets_are_split_into_regions(runner):
+    parser = choice(
+        try_parser(chain(literal("abc"), literal("x"))),
+        choice(try_parser(chain(literal("a"), literal("x"))), literal("abcd")),
+    )
+    with record_hotspots() as hotspots:
+        runner(parser, "abcd")
+    assert hotspots.regions() == [Hotspot(0, 1, 2), Hotspot(1, 3, 1)]
+
+
+def test_report_renders_locations_of_hottest_regions_first(runner):
+    document = "abd\nabdabd"
+    with record_hotspots() as hotspots:
+        runner(chain(literal("abd\n"), backtracking_parser()), document)
+    assert hotspots.report(document, limit=1) == "1 times: L: 2, C: 0 to L: 2, C: 1"
+
+
+def test_runs_without_resets_have_no_hotspots(runner):
+    with record_hotspots() as hotspots:
+        runner(literal("abc"), "abc")
+    assert hotspots.histogram() == {}
+    assert hotspots.report("abc") == ""
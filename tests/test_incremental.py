@@ -0,0 +1,159 @@
+import hypothesis.strategies as st
+import pytest
+from hypothesis import given
+
+from parsemon import (
+    IncrementalParser,
+    chain,
+    choice,
+    literal,
+    many,
+    one_of,
+    regex,
+    run_parser,
+    unit,
+)
+from parsemon.compiler import compile
+from parsemon.error import ParsingFailed
+from parsemon.incremental import IncrementalStream, NeedMoreInput
+from parsemon.json import json_document, whitespaces
+from parsemon.stream import PATTERN_WINDOW_SIZE
+
+
+def feed_chunks(parser, chunks):
+    incremental_parser = IncrementalParser(parser)
+    values = []
+    for chunk in chunks:
+        values += incremental_parser.feed(chunk)
+    return values + incremental_parser.close()
+
+
+def test_incremental_stream_asks_for_more_input_until_closed():
+    stream = IncrementalStream()
+    stream.feed("a")
+    assert stream.read() == "a"
+    with pytest.raises(NeedMoreInput):
+        stream.next()
+    stream.close()
+    assert stream.next() is None
+
+
+def test_incremental_stream_keeps_absolute_positions_after_releasing_input():
+    stream = IncrementalStream()
+    stream.feed("ab\ncd")
+    stream.read()
+    stream.read()
+    stream.read()
+    stream.release_consumed()
+    stream.feed("")
+    assert stream.position() == 3
+    assert stream.to_string() == "cd"
+    assert stream.location(4) == (2, 1)
+
+
+def test_values_are_returned_as_soon_as_they_are_complete():
+    incremental_parser = IncrementalParser(chain(literal("ab"), unit(1)))
+    assert incremental_parser.feed("a") == []
+    assert incremental_parser.feed("ba") == [1]
+    assert incremental_parser.feed("b") == [1]
+    assert incremental_parser.close() == []
+
+
+def test_json_documents_are_parsed_across_chunk_boundaries():
+    assert feed_chunks(json_document(), ['{"a": ', "[1, 2", "]} [tr", "ue]"]) == [
+        {"a": [1, 2]},
+        [True],
+    ]
+
+
+@given(
+    documents=st.lists(st.sampled_from(['{"a": 1}', "[]", '"x"', "-1.5", "null"])),
+    chunk_size=st.integers(min_value=1, max_value=8),
+)
+def test_feeding_in_chunks_gives_the_same_values_as_run_parser(documents, chunk_size):
+    text = " ".join(documents)
+    chunks = [
+        text[index : index + chunk_size] for index in range(0, len(text), chunk_size)
+    ]
+    expected = run_parser(many(json_document()), text).value
+    assert feed_chunks(json_document(), chunks) == expected
+
+
+def test_regex_waits_for_input_that_could_extend_the_match():
+    parser = chain(whitespaces, regex("[0-9]+"))
+    incremental_parser = IncrementalParser(parser)
+    assert incremental_parser.feed("12") == []
+    assert incremental_parser.feed("3 4") == ["123"]
+    assert incremental_parser.close() == ["4"]
+
+
+def test_failing_regex_does_not_wait_for_close():
+    parser = choice(regex("[0-9]+;"), literal("x" * PATTERN_WINDOW_SIZE))
+    incremental_parser = IncrementalParser(parser)
+    assert incremental_parser.feed("x" * PATTERN_WINDOW_SIZE) == [
+        "x" * PATTERN_WINDOW_SIZE
+    ]
+
+
+def test_failing_regex_waits_for_more_input_near_the_end_of_the_buffer():
+    incremental_parser = IncrementalParser(choice(regex("ab"), literal("a")))
+    assert incremental_parser.feed("a") == []
+    assert incremental_parser.feed("b") == ["ab"]
+
+
+def test_regex_matches_long_input_that_was_fed_in_small_chunks():
+    text = "1" * (3 * PATTERN_WINDOW_SIZE) + ";"
+    chunks = [text[index : index + 7] for index in range(0, len(text), 7)]
+    assert feed_chunks(regex("[0-9]+;"), chunks) == [text]
+
+
+def test_regex_sees_released_input_before_the_position():
+    incremental_parser = IncrementalParser(regex(r"a|(?<=a)b"))
+    assert incremental_parser.feed("a") == []
+    assert incremental_parser.feed("b") == ["a"]
+    assert incremental_parser.feed("c") == ["b"]
+
+
+def test_close_raises_on_incomplete_input():
+    incremental_parser = IncrementalParser(literal("abc"))
+    incremental_parser.feed("ab")
+    with pytest.raises(ParsingFailed):
+        incremental_parser.close()
+
+
+def test_failure_is_raised_after_completed_values_were_returned():
+    incremental_parser = IncrementalParser(one_of("a"))
+    assert incremental_parser.feed("aab") == ["a", "a"]
+    with pytest.raises(ParsingFailed):
+        incremental_parser.feed("a")
+
+
+def test_failure_reports_location_in_whole_input():
+    incremental_parser = IncrementalParser(chain(one_of("a\n"), unit(None)))
+    incremental_parser.feed("a\na\n")
+    with pytest.raises(ParsingFailed) as error:
+        incremental_parser.feed("b")
+    assert "L: 3, C: 0" in str(error.value)
+
+
+def test_parser_that_does_not_consume_input_is_rejected():
+    with pytest.raises(ParsingFailed):
+        IncrementalParser(many(literal("a"))).feed("b")
+
+
+def test_feed_after_close_is_rejected():
+    incremental_parser = IncrementalParser(literal("a"))
+    incremental_parser.close()
+    with pytest.raises(ValueError):
+        incremental_parser.feed("a")
+
+
+def test_compiled_parser_is_rejected():
+    with pytest.raises(ValueError):
+        IncrementalParser(compile(literal("ab")))
+
+
+def test_compiled_parser_inside_parser_fed_chunk_by_chunk_is_rejected():
+    parser = chain(literal("x"), compile(literal("ab")))
+    with pytest.raises(ValueError):
+        feed_chunks(parser, ["x", "a", "b"])
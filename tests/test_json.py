@@ -1,6 +1,8 @@
+from functools import reduce
+
 import pytest
 
-from parsemon import ParsingFailed, run_parser
+from parsemon import ParsingFailed, choice, run_parser
 from parsemon.json import (
     json_bool,
     json_document,
@@ -9,6 +11,7 @@ from parsemon.json import (
     json_number,
     json_object,
     json_string,
+    json_value,
 )
 
 
@@ -149,3 +152,32 @@ def test_json_document_trims_whitespaces():
 
 def test_json_document_accepts_floats_without_signed_exponent():
     assert run_parser(json_document(), "1.2e10").value == float("1.2e10")
+
+
+def test_deeply_nested_invalid_document_fails_in_linear_time():
+    def bounces(depth):
+        reports = []
+        with pytest.raises(ParsingFailed):
+            run_parser(json_document(), "[" * depth + "x", metrics=reports.append)
+        return reports[0].bounces
+
+    assert bounces(40) < 3 * bounces(20)
+
+
+def test_json_value_reports_the_failures_of_all_alternatives():
+    alternatives = reduce(
+        choice,
+        [
+            json_number(),
+            json_string(),
+            json_null(),
+            json_list(),
+            json_object(),
+            json_bool(),
+        ],
+    )
+    with pytest.raises(ParsingFailed) as dispatched:
+        run_parser(json_value(), "x")
+    with pytest.raises(ParsingFailed) as chained:
+        run_parser(alternatives, "x")
+    assert str(dispatched.value) == str(chained.value)
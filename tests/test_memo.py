@@ -0,0 +1,95 @@
+import pytest
+
+from parsemon import ParsingFailed, chain, choice, fmap, literal, memo, try_parser
+from parsemon.internals.memo import MemoTable
+from parsemon.stream import StringStream
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    def count_value(self, value):
+        self.count += 1
+        return value
+
+
+def test_memo_returns_result_of_wrapped_parser(runner):
+    assert runner(memo(literal("a")), "a").value == "a"
+
+
+def test_memo_reports_failure_of_wrapped_parser(runner):
+    with pytest.raises(ParsingFailed):
+        runner(memo(literal("a")), "b")
+
+
+def test_memo_parses_shared_prefix_only_once(runner):
+    counter = Counter()
+    prefix = memo(fmap(counter.count_value, literal("abc")))
+    parser = choice(
+        try_parser(chain(prefix, literal("x"))),
+        chain(prefix, literal("y")),
+    )
+    result = runner(parser, "abcy")
+    assert result.value == "y"
+    assert result.remaining_input == ""
+    assert counter.count == 1
+
+
+def test_memo_does_not_share_results_between_runs(runner):
+    counter = Counter()
+    parser = memo(fmap(counter.count_value, literal("a")))
+    runner(parser, "a")
+    runner(parser, "a")
+    assert counter.count == 2
+
+
+def test_memo_parses_again_if_memo_size_is_zero(runner):
+    counter = Counter()
+    prefix = memo(fmap(counter.count_value, literal("abc")))
+    parser = choice(
+        try_parser(chain(prefix, literal("x"))),
+        chain(prefix, literal("y")),
+    )
+    assert runner(parser, "abcy", memo_size=0).value == "y"
+    assert counter.count == 2
+
+
+def test_memo_table_evicts_entries_with_lowest_position_first():
+    table = MemoTable(max_size=2)
+    for position in (5, 1, 3):
+        table.store(("parser", position), StringStream("", 0).get_reset_point(), None)
+    assert len(table) == 2
+    assert table.lookup(("parser", 1)) is None
+    assert table.lookup(("parser", 3)) is not None
+    assert table.lookup(("parser", 5)) is not None
+
+
+class EndPoint:
+    def __init__(self):
+        self.is_destroyed = False
+
+    def destroy(self):
+        self.is_destroyed = True
+
+
+def test_memo_table_keeps_first_entry_stored_for_a_key():
+    table = MemoTable(max_size=2)
+    first, second = EndPoint(), EndPoint()
+    table.store(("parser", 1), first, "first")
+    table.store(("parser", 1), second, "second")
+    assert table.lookup(("parser", 1)) == (first, "first")
+    assert second.is_destroyed
+    table.store(("parser", 2), EndPoint(), None)
+    table.store(("parser", 3), EndPoint(), None)
+    assert len(table) == 2
+    assert first.is_destroyed
+
+
+def test_clearing_memo_table_destroys_end_points():
+    table = MemoTable(max_size=2)
+    end_point = EndPoint()
+    table.store(("parser", 1), end_point, None)
+    table.clear()
+    assert len(table) == 0
+    assert end_point.is_destroyed
@@ -0,0 +1,80 @@
+import pytest
+
+from parsemon import chain, choice, do, literal, measure, try_parser
+from parsemon.compiler import compile
+from parsemon.error import ParsingFailed
+from parsemon.extensions import trampoline
+from parsemon.metrics import with_measured_trampoline
+from parsemon.stream import NativeStringStream
+
+
+def test_results_carry_no_metrics_by_default(runner):
+    assert runner(literal("a"), "a").metrics is None
+
+
+def test_metrics_are_attached_to_result(runner):
+    metrics = runner(chain(literal("a"), literal("bc")), "abc", metrics=True).metrics
+    assert metrics.consumed == 3
+    assert metrics.bounces >= 5
+    assert metrics.failures == 0
+    assert metrics.seconds > 0
+    assert metrics.characters_per_second > 0
+
+
+def test_metrics_are_passed_to_callback_when_parsing_fails(runner):
+    reports = []
+    with pytest.raises(ParsingFailed):
+        runner(choice(literal("a"), literal("b")), "c", metrics=reports.append)
+    assert len(reports) == 1
+    assert reports[0].merged_failures == 1
+    assert reports[0].failures >= 3
+
+
+def test_merged_failures_of_compiled_choices_are_counted(runner):
+    reports = []
+    parser = compile(choice(literal("a"), choice(literal("b"), literal("c"))))
+    with pytest.raises(ParsingFailed):
+        runner(parser, "d", metrics=reports.append)
+    assert reports[0].merged_failures == 2
+
+
+def test_rollbacks_are_counted(runner):
+    parser = choice(try_parser(chain(literal("a"), literal("b"))), literal("ac"))
+    metrics = runner(parser, "ac", metrics=True).metrics
+    assert metrics.rollbacks >= 1
+    assert metrics.reset_points >= 1
+
+
+def test_peak_continuations_grow_with_nesting(runner):
+    @do
+    def nested():
+        yield literal("(")
+        yield choice(nested(), literal(""))
+        yield literal(")")
+
+    shallow = runner(nested(), "()", metrics=True).metrics
+    deep = runner(nested(), "(((())))", metrics=True).metrics
+    assert deep.peak_continuations > shallow.peak_continuations
+
+
+def test_measure_reports_every_run_in_its_block(runner):
+    reports = []
+    with measure(reports.append):
+        runner(literal("a"), "a")
+        runner(literal("ab"), "ab")
+    runner(literal("a"), "a")
+    assert [metrics.consumed for metrics in reports] == [1, 2]
+
+
+def test_measured_trampoline_counts_bounces():
+    reports = []
+    value = with_measured_trampoline(
+        reports.append,
+        trampoline.Call,
+        literal("a"),
+        NativeStringStream.from_string("a"),
+        lambda stream, parsing_result: trampoline.Result(parsing_result.value),
+    )
+    assert value == "a"
+    assert reports[0].bounces == 2
+    assert reports[0].peak_continuations == 1
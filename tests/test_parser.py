@@ -1,3 +1,5 @@
+import re
+
 import hypothesis.strategies as st
 import pytest
 from hypothesis import example, given
@@ -16,26 +18,21 @@ from parsemon import (
     many1,
     none_of,
     one_of,
+    regex,
     run_parser,
     seperated_by,
+    skip_many,
+    skip_many1,
+    skip_while,
+    take_while,
+    take_while1,
     try_parser,
     unit,
     whitespace,
 )
 from parsemon.error import ParsingFailed
+from parsemon.internals.structure import structure
 from parsemon.sourcemap import display_location
-from parsemon.stream import StringStream
-
-
-@pytest.fixture(
-    params=(StringStream,),
-    scope="module",
-)
-def runner(request):
-    def fixture(*args, **kwargs):
-        return run_parser(*args, stream_implementation=request.param, **kwargs)
-
-    return fixture
 
 
 @given(text=st.text())
@@ -199,6 +196,12 @@ def test_fail_throws_ParsingFailed_error(runner):
         runner(p, "")
 
 
+def test_fail_reports_its_message(runner):
+    with pytest.raises(ParsingFailed) as error:
+        runner(fail("custom error"), "")
+    assert "custom error" in str(error.value)
+
+
 @given(text=st.text(min_size=1, max_size=1))
 def test_character_parses_a_single_character(runner, text):
     p = character()
@@ -339,6 +342,134 @@ def test_onf_of_succeeds_if_trying_to_parse_something_in_the_set(runner):
     assert runner(one_of("123"), "1").value == "1"
 
 
+def test_skip_many_returns_none_and_consumes_all_occurences(runner):
+    result = runner(skip_many(literal("a")), "aaab")
+    assert result.value is None
+    assert result.remaining_input == "b"
+
+
+def test_skip_many_parses_empty_strings(runner):
+    assert runner(skip_many(literal("a")), "").value is None
+
+
+def test_skip_many1_fails_for_empty_strings(runner):
+    with pytest.raises(ParsingFailed):
+        runner(skip_many1(literal("a")), "")
+
+
+def test_skip_many1_consumes_all_occurences(runner):
+    assert runner(skip_many1(literal("a")), "aaab").remaining_input == "b"
+
+
+def test_many_resets_stream_when_last_attempt_fails_midway(runner):
+    p = many(literal("ab"))
+    assert runner(p, "ababa").remaining_input == "a"
+
+
+def test_seperated_by_does_not_consume_trailing_seperator(runner):
+    p = seperated_by(literal("a"), literal(","))
+    assert runner(p, "a,a,").remaining_input == ","
+
+
+@given(text=st.text(min_size=1, max_size=1), expected=st.text())
+def test_one_of_accepts_exactly_the_characters_given(runner, text, expected):
+    if text in expected:
+        assert runner(one_of(expected), text).value == text
+    else:
+        with pytest.raises(ParsingFailed):
+            runner(one_of(expected), text)
+
+
+@given(text=st.text(min_size=1, max_size=1), forbidden=st.text())
+def test_none_of_rejects_exactly_the_characters_given(runner, text, forbidden):
+    if text in forbidden:
+        with pytest.raises(ParsingFailed):
+            runner(none_of(forbidden), text)
+    else:
+        assert runner(none_of(forbidden), text).value == text
+
+
+def test_failure_of_one_of_contains_found_character(runner):
+    with pytest.raises(ParsingFailed) as err:
+        runner(one_of("123"), "x")
+    assert "x" in str(err.value)
+
+
+def test_regex_parses_matching_input(runner):
+    result = runner(regex("[0-9]+"), "123abc")
+    assert result.value == "123"
+    assert result.remaining_input == "abc"
+
+
+def test_regex_returns_requested_group(runner):
+    assert runner(regex(r"(\w+)=(\w+)", group=2), "key=value").value == "value"
+
+
+def test_regex_respects_flags(runner):
+    assert runner(regex("abc", flags=re.IGNORECASE), "ABC").value == "ABC"
+
+
+def test_regex_does_not_consume_input_on_failure(runner):
+    with pytest.raises(ParsingFailed):
+        runner(regex("[0-9]+"), "abc")
+    assert runner(choice(regex("[0-9]+"), literal("abc")), "abc").value == "abc"
+
+
+def test_failure_of_regex_contains_pattern(runner):
+    with pytest.raises(ParsingFailed) as error:
+        runner(regex("[0-9]+"), "abc")
+    assert "Expected input matching `[0-9]+`" in str(error.value)
+
+
+def test_regex_records_its_pattern_and_group():
+    assert structure(regex("a+", group=0)) == ("regex", re.compile("a+"), 0)
+
+
+def test_regex_continues_after_previous_parser(runner):
+    assert runner(chain(literal("a"), regex("b+")), "abbbc").value == "bbb"
+
+
+def test_take_while_returns_longest_run_of_accepted_characters(runner):
+    result = runner(take_while("ab"), "abbaca")
+    assert result.value == "abba"
+    assert result.remaining_input == "ca"
+
+
+def test_take_while_returns_empty_string_if_nothing_is_accepted(runner):
+    assert runner(take_while("ab"), "c").value == ""
+
+
+def test_take_while_accepts_predicate(runner):
+    assert runner(take_while(str.isdigit), "123a").value == "123"
+
+
+def test_take_while_can_negate_characters(runner):
+    assert runner(take_while('"', negate=True), 'abc"').value == "abc"
+
+
+def test_take_while1_fails_if_no_character_is_accepted(runner):
+    with pytest.raises(ParsingFailed):
+        runner(take_while1("ab"), "c")
+
+
+def test_take_while1_does_not_consume_input_on_failure(runner):
+    assert runner(choice(take_while1("a"), literal("b")), "b").value == "b"
+
+
+def test_skip_while_returns_none_and_consumes_run(runner):
+    result = runner(skip_while(" "), "   x")
+    assert result.value is None
+    assert result.remaining_input == "x"
+
+
+@given(text=st.text())
+def test_take_while_consumes_same_input_as_many_one_of(runner, text):
+    characters = "abc"
+    assert runner(take_while(characters), text).value == "".join(
+        runner(many(one_of(characters)), text).value
+    )
+
+
 def test_seperated_by_empty(runner):
     assert runner(seperated_by(literal("a"), literal(",")), "").value == []
 
@@ -384,6 +515,10 @@ def test_whitespace_parses_newline_char(runner):
     assert runner(whitespace, "\n").value == "\n"
 
 
+def test_whitespace_parses_ideographic_space(runner):
+    assert runner(whitespace, "\u3000").value == "\u3000"
+
+
 def test_that_fmap_does_not_change_error_messages(runner):
     parser = literal("a")
     with pytest.raises(ParsingFailed) as error_message_without_fmap:
@@ -400,3 +535,9 @@ def test_that_unit_parser_returns_complete_input_string_as_not_consumed(
 ):
     parser = unit(True)
     assert runner(parser, text).remaining_input == text
+
+
+def test_failures_on_the_first_line_of_a_longer_document_have_correct_columns(runner):
+    with pytest.raises(ParsingFailed) as err:
+        runner(chain(literal("ab"), fail("error")), "abc\nd\ne")
+    assert display_location(line=1, column=2) in str(err.value)
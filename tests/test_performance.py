@@ -1,12 +1,25 @@
 import pytest
 
-from parsemon import choices, literal, many, run_parser
-from parsemon.stream import IOStream, StringStream
+from parsemon import (
+    choice,
+    choices,
+    integer,
+    literal,
+    many,
+    one_of,
+    run_parser,
+    whitespace,
+)
+from parsemon.compiler import compile
+from parsemon.extensions import trampoline
+from parsemon.json import json_document
+from parsemon.stream import IOStream, NativeStringStream, StringStream
 
 
 @pytest.fixture(
     params=(
         StringStream,
+        NativeStringStream,
         IOStream,
     )
 )
@@ -50,5 +63,54 @@ def test_stack_performance_with_many_choices(
     )
 
 
+@pytest.mark.benchmark(group="general-performance")
+def test_tokenizing_performance_with_one_of(benchmark, runner):
+    parser = many(one_of("0123456789"))
+    benchmark(runner, parser, "0123456789" * 100)
+
+
+@pytest.mark.benchmark(group="json")
+def test_json_document_performance(benchmark):
+    document = (
+        "[" + ", ".join(['{"key": "value with some text", "n": 12345}'] * 20) + "]"
+    )
+    benchmark(run_parser, json_document(), document)
+
+
+@pytest.mark.benchmark(group="json")
+def test_compiled_json_document_performance(benchmark):
+    document = (
+        "[" + ", ".join(['{"key": "value with some text", "n": 12345}'] * 20) + "]"
+    )
+    benchmark(run_parser, compile(json_document()), document)
+
+
+@pytest.mark.benchmark(group="general-performance")
+def test_compiled_tokenizing_performance(benchmark, runner):
+    parser = compile(many(choices(literal("a"), one_of("0123456789"))))
+    benchmark(runner, parser, "0123456789a" * 100)
+
+
+@pytest.mark.benchmark(group="general-performance")
+def test_integer_performance(benchmark):
+    benchmark(run_parser, integer(), "-" + "1234567890" * 10)
+
+
+@pytest.mark.benchmark(group="trampoline")
+def test_trampoline_bounce_performance(benchmark):
+    def countdown(n):
+        if n:
+            return trampoline.Call(countdown, n - 1)
+        return trampoline.Result(n)
+
+    assert benchmark(trampoline.with_trampoline, countdown, 100000) == 0
+
+
+@pytest.mark.benchmark(group="failures")
+def test_failing_alternatives_performance(benchmark, runner):
+    parser = many(choice(whitespace, one_of("x")))
+    benchmark(runner, parser, "x" * 1000)
+
+
 if __name__ == "__main__":
     pytest.main(__file__)
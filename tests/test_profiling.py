@@ -0,0 +1,107 @@
+import pytest
+
+from parsemon import (
+    chain,
+    choice,
+    do,
+    literal,
+    many,
+    named,
+    one_of,
+    profile,
+    try_parser,
+)
+from parsemon.error import ParsingFailed
+from parsemon.internals.instrumentation import current_observers
+
+
+@do
+def pair():
+    first = yield one_of("ab")
+    second = yield one_of("ab")
+    return first + second
+
+
+def test_do_parsers_are_profiled_under_their_function_name(runner):
+    with profile() as profiler:
+        assert runner(many(pair()), "abba").value == ["ab", "ba"]
+    statistics = profiler.statistics["pair"]
+    assert statistics.calls == 3
+    assert statistics.successes == 2
+    assert statistics.failures == 1
+    assert statistics.consumed == 4
+
+
+def test_named_parsers_are_profiled_under_their_label(runner):
+    parser = named(chain(literal("a"), literal("b")), "a then b")
+    with profile() as profiler:
+        assert runner(parser, "ab").value == "b"
+    assert profiler.statistics["a then b"].calls == 1
+    assert profiler.statistics["a then b"].consumed == 2
+
+
+def test_failures_after_consuming_input_count_as_backtracks(runner):
+    parser = choice(
+        try_parser(named(chain(literal("a"), literal("b")), "ab")),
+        named(literal("ac"), "ac"),
+    )
+    with profile() as profiler:
+        runner(parser, "ac")
+    assert profiler.statistics["ab"].failures == 1
+    assert profiler.statistics["ab"].backtracks == 1
+    assert profiler.statistics["ac"].backtracks == 0
+
+
+def test_failing_runs_are_profiled(runner):
+    with profile() as profiler:
+        with pytest.raises(ParsingFailed):
+            runner(pair(), "ax")
+    assert profiler.statistics["pair"].failures == 1
+
+
+def test_recursive_parsers_are_counted_once_per_invocation(runner):
+    @do
+    def nested():
+        yield literal("(")
+        yield choice(nested(), literal(""))
+        yield literal(")")
+
+    with profile() as profiler:
+        runner(nested(), "((()))")
+    assert profiler.statistics["nested"].calls == 4
+    assert profiler.statistics["nested"].successes == 3
+
+
+def test_report_is_sorted_by_the_given_field(runner):
+    with profile() as profiler:
+        runner(
+            chain(named(literal("a"), "once"), many(named(literal("b"), "often"))),
+            "abb",
+        )
+    lines = profiler.report(sort_by="calls").splitlines()
+    assert lines[0].split() == [
+        "name",
+        "calls",
+        "successes",
+        "failures",
+        "backtracks",
+        "consumed",
+        "time",
+    ]
+    assert [line.split()[0] for line in lines[1:]] == ["often", "once"]
+    assert len(profiler.report(sort_by="name", limit=1).splitlines()) == 2
+
+
+def test_report_rejects_unknown_sort_keys():
+    with profile() as profiler:
+        pass
+    with pytest.raises(ValueError):
+        profiler.report(sort_by="speed")
+
+
+def test_profile_only_observes_runs_inside_its_block(runner):
+    with profile() as profiler:
+        pass
+    runner(pair(), "ab")
+    assert profiler.statistics == {}
+    assert current_observers.get() == ()
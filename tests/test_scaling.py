@@ -0,0 +1,86 @@
+"""Check that the work of parsing grows linearly with the size of the
+input.
+
+Every grammar is run on inputs that double in size.  The work is
+measured as the number of calls that the trampoline bounced, which,
+unlike timings, is the same in every run.  The exponent of the growth
+is the slope of a line fitted to the logarithms of the sizes and
+bounce counts.  Quadratic behaviour, e.g. from copying the rest of
+the input or from running alternatives again, shows up as an exponent
+close to 2.  We allow up to ``MAXIMUM_EXPONENT``.
+"""
+import math
+
+import pytest
+
+from parsemon import character, choices, literal, many, one_of, run_parser, until
+from parsemon.error import ParsingFailed
+from parsemon.json import json_document
+from parsemon.stream import NativeStringStream, StringStream
+
+MAXIMUM_EXPONENT = 1.1
+SIZES = (1000, 2000, 4000, 8000)
+
+
+def bounces(parser, document, stream_implementation):
+    reports = []
+    try:
+        run_parser(
+            parser,
+            document,
+            stream_implementation=stream_implementation,
+            metrics=reports.append,
+        )
+    except ParsingFailed:
+        pass
+    return reports[-1].bounces
+
+
+def scaling_exponent(sizes, counts):
+    """Return the slope of the least squares fit of ``log(counts)``
+    over ``log(sizes)``."""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(count) for count in counts]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum(
+        (x - mean_x) ** 2 for x in xs
+    )
+
+
+def json_array(size):
+    item = '{"key": "value", "numbers": [1, -2.5e3, true, null]}'
+    return "[" + ", ".join([item] * (size // (len(item) + 2))) + "]"
+
+
+LINEAR_GRAMMARS = {
+    "json_document": (json_document, json_array),
+    "invalid_nested_json_document": (json_document, lambda size: "[" * size + "x"),
+    "many_choices": (
+        lambda: many(choices(literal("a"), literal("b"), one_of("cd"))),
+        lambda size: "abcd" * (size // 4),
+    ),
+    "until": (
+        lambda: until(character(), literal("end")),
+        lambda size: "x" * (size - 3) + "end",
+    ),
+    "failing_alternatives": (
+        lambda: many(choices(literal("ab"), literal("ac"), literal("a"))),
+        lambda size: "a" * size,
+    ),
+}
+
+
+@pytest.mark.parametrize("stream_implementation", (StringStream, NativeStringStream))
+@pytest.mark.parametrize("grammar", sorted(LINEAR_GRAMMARS))
+def test_parsing_work_grows_linearly(grammar, stream_implementation):
+    parser_factory, document_factory = LINEAR_GRAMMARS[grammar]
+    parser = parser_factory()
+    counts = [
+        bounces(parser, document_factory(size), stream_implementation) for size in SIZES
+    ]
+    assert scaling_exponent(SIZES, counts) < MAXIMUM_EXPONENT
+
+
+def test_scaling_exponent_of_quadratic_counts_is_two():
+    assert scaling_exponent((1, 2, 4), (1, 4, 16)) == pytest.approx(2)
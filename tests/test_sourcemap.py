@@ -2,6 +2,7 @@ from hypothesis import given
 from hypothesis import strategies as st
 
 from parsemon.sourcemap import (
+    SourceMap,
     display_location,
     find_column_in_indices,
     find_line_in_indices,
@@ -60,3 +61,31 @@ def test_find_column_in_indices_resturns_n_for_empty_indices(n):
 @given(n=st.integers(min_value=0))
 def test_find_column_in_indices_returns_n_minus_1_if_index_is_n_after_newline(n):
     assert find_column_in_indices(5 + n, [5]) == n - 1
+
+
+def naive_location(document, offset):
+    before = document[:offset]
+    return before.count("\n") + 1, offset - (before.rfind("\n") + 1)
+
+
+@given(document=st.text(alphabet="ab\n"), data=st.data())
+def test_source_map_locates_offsets_like_counting_linebreaks(document, data):
+    offset = data.draw(st.integers(min_value=0, max_value=len(document)))
+    assert SourceMap(document).locate(offset) == naive_location(document, offset)
+
+
+@given(document=st.text(alphabet="ab\n"), data=st.data())
+def test_source_map_locates_batches_of_offsets(document, data):
+    offsets = data.draw(
+        st.lists(st.integers(min_value=0, max_value=len(document)), max_size=10)
+    )
+    assert SourceMap(document).locate_all(offsets) == [
+        naive_location(document, offset) for offset in offsets
+    ]
+
+
+@given(document=st.text())
+def test_find_linebreak_indices_finds_every_linebreak(document):
+    assert find_linebreak_indices(document) == [
+        index for index, character in enumerate(document) if character == "\n"
+    ]
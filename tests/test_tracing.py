@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from parsemon import chain, choice, do, literal, many, trace, try_parser
+from parsemon.error import ParsingFailed
+from parsemon.tracing import TraceEvent
+
+
+@do
+def letters():
+    first = yield literal("a")
+    second = yield literal("b")
+    return first + second
+
+
+def test_events_are_appended_to_list(runner):
+    events = []
+    with trace(events):
+        runner(letters(), "ab")
+    assert events[0] == TraceEvent("enter", 0, "letters", 0)
+    assert events[-1] == TraceEvent("success", 2, "letters", 0)
+    assert [event.depth for event in events[1:-1]] == [1, 1, 1, 1]
+    assert [event.kind for event in events[1:-1]] == [
+        "enter",
+        "success",
+        "enter",
+        "success",
+    ]
+
+
+def test_failures_are_traced(runner):
+    events = []
+    with trace(events):
+        with pytest.raises(ParsingFailed):
+            runner(letters(), "ax")
+    assert events[-1] == TraceEvent("failure", 1, "letters", 0)
+
+
+def test_resets_of_the_stream_are_traced(runner):
+    events = []
+    parser = choice(try_parser(chain(literal("a"), literal("b"))), literal("ac"))
+    with trace(events):
+        assert runner(parser, "ac").value == "ac"
+    assert TraceEvent("reset", 0, depth=2, reset_from=1) in events
+
+
+def test_events_are_passed_to_callback(runner):
+    kinds = []
+    with trace(lambda event: kinds.append(event.kind)):
+        runner(literal("a"), "a")
+    assert kinds == ["enter", "success"]
+
+
+def test_events_are_written_as_json_lines(runner, tmp_path):
+    path = tmp_path / "trace.jsonl"
+    with trace(path):
+        runner(letters(), "ab")
+    with open(path) as trace_file:
+        events = [json.loads(line) for line in trace_file]
+    assert events[0] == {
+        "kind": "enter",
+        "position": 0,
+        "parser": "letters",
+        "depth": 0,
+        "reset_from": None,
+    }
+    assert len(events) == 6
+
+
+def test_traced_runs_give_the_same_results(runner):
+    parser = many(choice(try_parser(chain(literal("a"), literal("b"))), literal("a")))
+    with trace([]):
+        traced = runner(parser, "abaab")
+    assert traced == runner(parser, "abaab")
+
+
+def test_runs_outside_of_trace_are_not_traced(runner):
+    events = []
+    with trace(events):
+        pass
+    runner(literal("a"), "a")
+    assert events == []
+
+
+def test_unknown_sinks_are_rejected():
+    with pytest.raises(TypeError):
+        with trace(1):
+            pass
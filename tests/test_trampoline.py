@@ -0,0 +1,25 @@
+from parsemon.extensions import trampoline
+
+
+def countdown(n):
+    if n:
+        return trampoline.Call(countdown, n - 1)
+    return trampoline.Result("done")
+
+
+def test_trampoline_returns_value_of_final_result():
+    assert trampoline.with_trampoline(countdown, 10) == "done"
+
+
+def test_trampoline_can_bounce_more_often_than_recursion_limit():
+    assert trampoline.with_trampoline(countdown, 100000) == "done"
+
+
+def test_trampoline_passes_keyword_arguments_to_calls():
+    def function(x, y=None):
+        return trampoline.Result((x, y))
+
+    def start():
+        return trampoline.Call(function, 1, y=2)
+
+    assert trampoline.with_trampoline(start) == (1, 2)
@@ -2,20 +2,7 @@ import hypothesis.strategies as st
 import pytest
 from hypothesis import given
 
-from parsemon import ParsingFailed, literal, run_parser, until
-from parsemon.stream import StringStream
-
-
-@pytest.fixture(
-    params=(StringStream,),
-    scope="module",
-)
-def runner(request):
-    def fixture(*args, **kwargs):
-        return run_parser(*args, stream_implementation=request.param, **kwargs)
-
-    return fixture
-
+from parsemon import ParsingFailed, literal, until
 
 main_parser = literal("a")
 delimiter = literal("b")